@@ -1,35 +1,66 @@
 #!/usr/bin/env python3
 """
-Automated Arbitrage Bot for KyberSwap <-> Larry DEX
-Runs continuously, checking for profitable arbitrage opportunities every 30 seconds
-Uses 0.002 ETH per trade as requested
+Automated Arbitrage Bot for KyberSwap <-> Larry DEX (and other bonding-curve tokens)
+Runs continuously, checking for profitable arbitrage opportunities on every new block
+Sizes each trade to maximize profit between MIN_TRADE_AMOUNT_ETH and MAX_TRADE_AMOUNT_ETH
+Every configured market is scanned concurrently and the best net profit is executed
 """
 
 import asyncio
-import aiohttp
+import functools
 import json
-import time
 import os
+import time
 from web3 import Web3
 from decimal import Decimal
 import logging
 from dotenv import load_dotenv
+from kyber_client import KyberClient, KYBER_API_BASE
+from quote_cache import QuoteCache
+from async_chain import ChainClient
+from larry_pricing import LarryPricer
+from multicall import Multicall
+from block_scheduler import BlockScheduler
+from trade_sizer import TradeSizer
+from execution_pipeline import ExecutionPipeline
+from nonce_manager import NonceManager
+from tx_encoder import CallEncoder
+from tx_tracker import TxTracker
+from fee_engine import FeeEngine
+from preflight import Preflight
+from metrics import Metrics, QUOTE_AGE_BUCKETS
+from log_setup import setup_logging
+from markets import Market, Venue, RateBudget, load_markets, DEFAULT_VENUE, SCAN_CONCURRENCY
+from market_log import MarketLog
+from settlement_model import SettlementModel
 
 # Load environment variables
 load_dotenv()
 
 # Configuration
 RPC_URL = os.getenv("BASE_RPC_URL", "https://mainnet.base.org")
+WS_URL = os.getenv("BASE_WS_URL")  # Optional: newHeads subscription, otherwise eth_blockNumber polling
 CONTRACT_ADDRESS = "0xC14957db5A544167633cF8B480eB6FbB25b6da19"
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
-TRADE_AMOUNT_ETH = "0.002"
-TRADE_AMOUNT_WEI = Web3.to_wei(TRADE_AMOUNT_ETH, 'ether')
+MIN_TRADE_AMOUNT_ETH = "0.0005"  # Smallest size the optimizer considers
+MAX_TRADE_AMOUNT_ETH = "0.05"  # Largest size the optimizer considers (also capped by balance)
+GAS_RESERVE_ETH = "0.0005"  # Kept back from the balance for gas
+MIN_TRADE_AMOUNT_WEI = Web3.to_wei(MIN_TRADE_AMOUNT_ETH, 'ether')
+MAX_TRADE_AMOUNT_WEI = Web3.to_wei(MAX_TRADE_AMOUNT_ETH, 'ether')
+GAS_RESERVE_WEI = Web3.to_wei(GAS_RESERVE_ETH, 'ether')
 MIN_PROFIT_PERCENTAGE = 0.5  # Minimum 0.5% profit to execute trade
+CYCLE_DEADLINE_SECONDS = 5  # Quotes not back by then are cancelled for this cycle
+MAX_PENDING_TRADES = 3  # Trades allowed in flight before new opportunities are skipped
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))  # Local Prometheus /metrics endpoint (0 = off)
+MARKETS_FILE = os.getenv("MARKETS_FILE")  # Optional JSON of extra bonding-curve markets / venues (default: LARRY only)
+MARKET_LOG_DIR = os.getenv("MARKET_LOG_DIR")  # Optional: record every quote / curve state here for backtest.py
 
 # Token addresses
 ETH_ADDRESS = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
 LARRY_ADDRESS = "0x888d81e3ea5E8362B5f69188CBCF34Fa8da4b888"
 
+MARKETS = [Market("Larry", "LARRY", LARRY_ADDRESS, CONTRACT_ADDRESS)]
+
 # Contract ABI (minimal for our needs)
 CONTRACT_ABI = [
     {
@@ -45,298 +76,586 @@ CONTRACT_ABI = [
     }
 ]
 
-# Larry DEX ABI for price calculations
-LARRY_DEX_ABI = [
-    {
-        "inputs": [{"name": "value", "type": "uint256"}],
-        "name": "LARRYtoETH",
-        "outputs": [{"name": "", "type": "uint256"}],
-        "stateMutability": "view",
-        "type": "function"
-    },
-    {
-        "inputs": [{"name": "amount", "type": "uint256"}],
-        "name": "getBuyLARRY",
-        "outputs": [{"name": "", "type": "uint256"}],
-        "stateMutability": "view",
-        "type": "function"
-    }
-]
-
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class ArbitrageBot:
-    def __init__(self):
-        if not PRIVATE_KEY:
-            raise ValueError("PRIVATE_KEY not found in .env file")
+    def __init__(self, rpc_url=RPC_URL, ws_url=WS_URL, kyber_url=KYBER_API_BASE, markets_file=MARKETS_FILE,
+                 market_log_dir=MARKET_LOG_DIR, bus=None, name='v2', min_profit_pct=MIN_PROFIT_PERCENTAGE,
+                 max_trade_wei=MAX_TRADE_AMOUNT_WEI, address=None):
+        """address: watch-only wallet to price and size for; the private key is never read and there
+        are no nonces, signer or tracker, so the bot can rank opportunities but not send them
+        """
+        self.name = name
+        self.bus = bus
+        self.min_profit_pct = min_profit_pct
+        self.max_trade_wei = max_trade_wei
+        if bus:
+            # Chain access, wallet, nonces and the default venue's quotes are shared with the other strategies on the quote bus
+            self.chain, self.w3, self.account = bus.chain, bus.w3, bus.account
+            self.address = self.account.address
+            self.scheduler, self.multicall = bus.scheduler, bus.multicall
+            self.metrics = Metrics(prefix=f"arb_{name}")
+        else:
+            if not address and not PRIVATE_KEY:
+                raise ValueError("PRIVATE_KEY not found in .env file")
+            self.chain = ChainClient(rpc_url)
+            self.w3 = self.chain.w3
+            self.account = None if address else self.w3.eth.account.from_key(PRIVATE_KEY)
+            self.address = Web3.to_checksum_address(address) if address else self.account.address
+            self.multicall = Multicall(self.w3)
+            self.scheduler = BlockScheduler(self.w3, ws_url)
+            self.metrics = Metrics()
+        self.balance = None
+        self.block_number = None
+        self.opportunities = self.metrics.counter('opportunities_total', "Opportunities by outcome", ['outcome'])
+        # ArbitrageDirectionExecuted's own profit field is the fee-reduced payout, principal included
+        self.profit = self.metrics.counter('profit_wei_total', "ETH out minus ETH in of trades that gained, before gas (wei)")
+        self.loss = self.metrics.counter('loss_wei_total', "ETH in minus ETH out of trades that lost, before gas (wei)")
+        self.quote_age = self.metrics.histogram('quote_age_seconds', "Age of the Kyber quote when its trade is sent", QUOTE_AGE_BUCKETS)
+        if bus:
+            self.nonces, self.tracker = bus.nonces, bus.tracker
+        elif self.account:
+            self.nonces = NonceManager(self.w3, self.account, metrics=self.metrics)
+            self.tracker = TxTracker(self.w3, self.nonces)
+        else:
+            self.nonces = self.tracker = None
+        self.encoder = CallEncoder(CONTRACT_ABI[0])  # Calldata without eth_abi / web3 contract machinery
+        self.fees = FeeEngine(self.w3)
         
-        self.w3 = Web3(Web3.HTTPProvider(RPC_URL))
-        self.account = self.w3.eth.account.from_key(PRIVATE_KEY)
-        self.contract = self.w3.eth.contract(
-            address=Web3.to_checksum_address(CONTRACT_ADDRESS),
-            abi=CONTRACT_ABI
-        )
-        self.larry_contract = self.w3.eth.contract(
-            address=Web3.to_checksum_address(LARRY_ADDRESS),
-            abi=LARRY_DEX_ABI
-        )
-        logger.info(f"Bot initialized for account: {self.account.address}")
-        logger.info(f"Contract address: {CONTRACT_ADDRESS}")
-        logger.info(f"Trade amount: {TRADE_AMOUNT_ETH} ETH")
+        # Markets and the venues they trade against; every venue shares one aggregator rate budget
+        self.markets, venues = load_markets(markets_file, MARKETS, [Venue(DEFAULT_VENUE, kyber_url)])
+        self.markets_by_token = {market.token.lower(): market for market in self.markets}
+        self.market_log = MarketLog(market_log_dir) if market_log_dir else None
+        self.kyber_budget = bus.kyber_budget if bus else RateBudget()
+        self.scan_slots = asyncio.BoundedSemaphore(SCAN_CONCURRENCY)
+        self.venues = {
+            venue_name: bus.kyber if bus and venue_name == DEFAULT_VENUE else KyberClient(
+                venue.url, cache=QuoteCache(), sources=venue.sources, budget=self.kyber_budget,
+                on_quote=self.record_quote if self.market_log else None
+            )
+            for venue_name, venue in venues.items()
+        }
+        self.kyber = self.venues[DEFAULT_VENUE]
+        self.shared_kyber = bus.kyber if bus else None
+        self.tokens = [market.token for market in self.markets]
+        
+        # Per-market components, keyed by market name
+        self.contracts = {}
+        self.pricers = {}
+        self.sizers = {}
+        self.pipelines = {}
+        self.preflights = {}
+        self.settlements = {}
+        for market in self.markets:
+            self.contracts[market.name] = self.w3.eth.contract(
+                address=Web3.to_checksum_address(market.contract),
+                abi=CONTRACT_ABI
+            )
+            self.pricers[market.name] = LarryPricer(self.w3, market.token, self.multicall)
+            self.sizers[market.name] = TradeSizer(
+                functools.partial(self.get_kyberswap_route, venue=market.venue),
+                ETH_ADDRESS, market.token, MIN_TRADE_AMOUNT_WEI
+            )
+            self.pipelines[market.name] = ExecutionPipeline(
+                self.w3, functools.partial(self.build_kyberswap_swap, market=market), market.contract, self.fees
+            )
+            self.preflights[market.name] = Preflight(self.w3, self.address, market.contract)
+            self.settlements[market.name] = SettlementModel(self.w3, market.contract, self.address)
+        
+        logger.info(f"Bot initialized for account: {self.address}{'' if self.account else ' (watch-only)'}")
+        for market in self.markets:
+            logger.info(f"Market {market.symbol}: contract {market.contract}, against {market.venue}")
+        logger.info(f"Trade size: {MIN_TRADE_AMOUNT_ETH} - {Web3.from_wei(max_trade_wei, 'ether')} ETH (optimized per block)")
 
-    async def get_kyberswap_route(self, session, token_in, token_out, amount_in):
-        """Get route from KyberSwap API"""
-        try:
-            url = "https://aggregator-api.kyberswap.com/base/api/v1/routes"
-            params = {
-                "tokenIn": token_in,
-                "tokenOut": token_out,
-                "amountIn": str(amount_in)
-            }
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('data')
-                else:
-                    logger.error(f"KyberSwap route error: {response.status}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error getting KyberSwap route: {e}")
-            return None
+    async def get_kyberswap_route(self, token_in, token_out, amount_in, venue=DEFAULT_VENUE):
+        """Get route from KyberSwap API (cached per block)"""
+        with self.metrics.time('route_fetch'):
+            return await self.venues[venue].get_route(token_in, token_out, amount_in, self.block_number)
 
-    async def build_kyberswap_swap(self, session, route_summary):
+    async def build_kyberswap_swap(self, quote, market):
         """Build swap data from KyberSwap API"""
+        with self.metrics.time('build'):
+            return await self.venues[market.venue].build_route(
+                quote,
+                sender=market.contract,
+                recipient=market.contract,
+                slippage_tolerance=300  # 3%
+            )
+
+    async def read_cycle_state(self, block_number=None):
+        """Read every view a cycle needs (each market's curve state, wallet balance, L1 fee and, when due,
+        settlement parameters) in one multicall pinned to one block, with fee history in the same JSON-RPC batch
+        """
+        calls = {}
+        for market in self.markets:
+            for key, call in self.pricers[market.name].state_calls().items():
+                calls[(market.name, key)] = call
+        calls.update(self.settlement_calls(block_number))
+        calls['balance'] = self.multicall.eth_balance(self.address)
+        calls['block_number'] = self.multicall.block_number()
+        calls['l1_fee'] = self.fees.l1_fee_call()
+        
+        requests = [self.multicall.aggregate_request(list(calls.values()), block_number or 'latest')]
+        # Fee history rides in the same JSON-RPC batch, once per block
+        fetch_fees = self.fees.needs_refresh(block_number)
+        if fetch_fees:
+            requests.append(self.fees.history_request(block_number))
+
+        with self.metrics.time('state_read'):
+            responses = await self.w3.provider.make_batch_request(requests)
+        self.multicall.calls_made += 1
+        if 'error' in responses[0]:
+            raise ValueError(f"Multicall failed: {responses[0]['error']}")
+        values = dict(zip(calls, self.multicall.decode_aggregate(list(calls.values()), responses[0]['result'], block_number)))
+        if fetch_fees and 'result' in responses[1]:
+            self.fees.load_history(block_number, responses[1]['result'])
+        self.balance = values['balance']
+        self.block_number = values['block_number']
+        self.fees.load_l1_fee(values['block_number'], values['l1_fee'])
+        self.load_settlements(values['block_number'], values)
+        market_values = {market.name: {} for market in self.markets}
+        for name, value in values.items():
+            if isinstance(name, tuple) and len(name) == 2:
+                market_values[name[0]][name[1]] = value
+        for market in self.markets:
+            state = self.pricers[market.name].load(values['block_number'], market_values[market.name])
+            if self.market_log:
+                self.market_log.record_state(market.name, state)
+        return values['block_number']
+
+    def settlement_calls(self, block_number):
+        """Each market contract's settlement parameters as multicall calls, when due for a re-read
+        The V2 contract emits nothing when they change, so the periodic re-read is all that keeps them current
+        """
+        calls = {}
+        for market in self.markets:
+            settlement = self.settlements[market.name]
+            if settlement.needs_refresh(block_number):
+                for key, call in settlement.parameter_calls().items():
+                    calls[('settlement', market.name, key)] = call
+        return calls
+
+    def load_settlements(self, block_number, values):
+        """Take settlement parameters read by settlement_calls()"""
+        parameters = {}
+        for name, value in values.items():
+            if isinstance(name, tuple) and len(name) == 3 and name[0] == 'settlement':
+                parameters.setdefault(name[1], {})[name[2]] = value
+        for market_name, market_parameters in parameters.items():
+            self.settlements[market_name].load(block_number, market_parameters)
+
+    def state_calls(self, block_number):
+        """Views of this strategy's own for a quote bus multicall: its L1 fee (priced on its own calldata)
+        and, when due, the settlement parameters
+        """
+        calls = {'l1_fee': self.fees.l1_fee_call()}
+        calls.update(self.settlement_calls(block_number))
+        return calls
+
+    def requests(self, block_number):
+        """Raw JSON-RPC requests for a quote bus batch: none beyond the shared reads"""
+        return []
+
+    def load_snapshot(self, snapshot):
+        """Take a quote bus snapshot in place of read_cycle_state()"""
+        self.balance = snapshot.balance
+        self.block_number = snapshot.block_number
+        if snapshot.fee_history:
+            self.fees.load_history(snapshot.block_number, snapshot.fee_history)
+        self.fees.load_l1_fee(snapshot.block_number, snapshot.values[self.name]['l1_fee'])
+        self.load_settlements(snapshot.block_number, snapshot.values[self.name])
+        for market in self.markets:
+            self.pricers[market.name].state = snapshot.state(market.token)
+
+    def quote_requests(self, snapshot):
+        """Anchor quotes the sizers will ask for at a quote bus snapshot (markets on the shared default venue)"""
+        quotes = []
+        for market in self.markets:
+            if market.venue == DEFAULT_VENUE:
+                sizer = self.sizers[market.name]
+                max_amount = sizer.max_amount(snapshot.balance, GAS_RESERVE_WEI, self.max_trade_wei)
+                quotes += sizer.anchor_quotes(snapshot.state(market.token), max_amount)
+        return quotes
+
+    def record_quote(self, token_in, token_out, amount_in, quote):
+        """Append a fresh aggregator quote to the market log"""
+        eth_in = token_in.lower() == ETH_ADDRESS.lower()
+        market = self.markets_by_token.get((token_out if eth_in else token_in).lower())
+        if market:
+            self.market_log.record_quote(
+                market.name, self.block_number, eth_in, amount_in, quote.amount_out,
+                self.fees.trade_cost(eth_in, quote)
+            )
+
+    def get_larry_price_out(self, larry_amount, market):
+        """Calculate ETH output from the market's bonding curve (Larry DEX by default)"""
+        state = self.pricers[market.name].state
+        if not state:
+            logger.error(f"Error getting {market.name} price: {market.name} DEX state not loaded")
+            return 0
+        # Local LARRYtoETH against this block's backing / supply
+        with self.metrics.time('larry_pricing'):
+            return state.larry_to_eth(larry_amount)
+    
+    def get_larry_from_eth(self, eth_amount, market):
+        """Calculate token amount from ETH via the market's bonding curve (Larry DEX by default)"""
+        state = self.pricers[market.name].state
+        if not state:
+            logger.error(f"Error getting {market.symbol} from ETH: {market.name} DEX state not loaded")
+            return 0
+        # Local getBuyLARRY against this block's backing / supply / buy fee
+        with self.metrics.time('larry_pricing'):
+            return state.get_buy_larry(eth_amount)
+
+    def settled_profit(self, market, amount_wei, total_return, cost):
+        """What the caller nets from executeArbitrageWithSwapData after the protocol fee and the
+        transaction cost, in wei and as a percentage of the trade; a call that would revert only costs gas
+        """
+        outcome = self.settlements[market.name].swap_data([amount_wei], [total_return], [cost])
+        profit_wei = int(outcome['caller_net'][0])
+        return profit_wei, profit_wei / amount_wei * 100, int(outcome['protocol_fee'][0])
+
+    def direction_name(self, market, direction):
+        """e.g. ETH->LARRY(Kyber)->ETH(Larry)"""
+        if direction:
+            return f"ETH->{market.symbol}({market.venue})->ETH({market.name})"
+        return f"ETH->{market.symbol}({market.name})->ETH({market.venue})"
+
+    async def check_kyber_to_larry(self, market, block_number, max_amount):
+        """Direction 1: ETH -> token (venue) -> ETH (bonding curve)"""
+        amount_wei = await self.sizers[market.name].size_kyber_to_larry(self.pricers[market.name].state, max_amount)
+        if not amount_wei:
+            logger.info("[block %s] Direction 1 - %s: no profitable size up to %.6f ETH", block_number, self.direction_name(market, True), max_amount / 1e18,
+                        extra={'sample': 'no_size', 'block': block_number, 'market': market.name})
+            return None
+        
+        route_1 = await self.get_kyberswap_route(
+            ETH_ADDRESS, market.token, amount_wei, market.venue
+        )
+        
+        if not route_1:
+            return None
+        
+        larry_amount = route_1.amount_out
+        larry_amount_after_slippage = larry_amount * 999 // 1000  # 0.1% slippage
+        eth_out = self.get_larry_price_out(larry_amount_after_slippage, market)
+        cost_1 = self.fees.trade_cost(True, route_1)
+        profit_wei_1, profit_pct_1, fee_1 = self.settled_profit(market, amount_wei, eth_out, cost_1)
+        if profit_pct_1 >= self.min_profit_pct:
+            # Same score find_best ranks by, so the swap data built ahead is the trade that gets picked
+            self.pipelines[market.name].speculate(route_1, profit_wei_1)
+        
+        logger.info("[block %s] Direction 1 - %s: %.6f ETH -> %.6f %s -> %.6f ETH, fee %.8f ETH, gas %.8f ETH (Net profit: %.2f%%)",
+                    block_number, self.direction_name(market, True), amount_wei / 1e18, larry_amount / 1e18, market.symbol, eth_out / 1e18, fee_1 / 1e18, cost_1 / 1e18, profit_pct_1,
+                    extra={'block': block_number, 'market': market.name, 'direction': 1, 'profit_pct': profit_pct_1})
+        
+        return {
+            'route': route_1, 'profit_pct': profit_pct_1, 'amount_wei': amount_wei,
+            'profit_wei': profit_wei_1, 'quoted_at': route_1.fetched_at
+        }
+
+    async def check_larry_to_kyber(self, market, block_number, max_amount):
+        """Direction 2: ETH -> token (bonding curve) -> ETH (venue)"""
         try:
-            url = "https://aggregator-api.kyberswap.com/base/api/v1/route/build"
-            deadline = int(time.time()) + 3600  # 1 hour from now
+            amount_wei = await self.sizers[market.name].size_larry_to_kyber(self.pricers[market.name].state, max_amount)
+            if not amount_wei:
+                logger.info("[block %s] Direction 2 - %s: no profitable size up to %.6f ETH", block_number, self.direction_name(market, False), max_amount / 1e18,
+                            extra={'sample': 'no_size', 'block': block_number, 'market': market.name})
+                return None
             
-            payload = {
-                "routeSummary": route_summary,
-                "sender": CONTRACT_ADDRESS,
-                "recipient": CONTRACT_ADDRESS,
-                "slippageTolerance": 300,  # 3%
-                "deadline": deadline
-            }
+            # Get how much of the token the bonding curve gives us
+            larry_from_larry_dex = self.get_larry_from_eth(amount_wei, market)
+            
+            if larry_from_larry_dex <= 0:
+                return None
+            
+            # Check what we'd get selling it on the venue
+            route_2 = await self.get_kyberswap_route(
+                market.token, ETH_ADDRESS, larry_from_larry_dex, market.venue
+            )
+            
+            if not route_2:
+                return None
             
-            async with session.post(url, json=payload) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('data')
-                else:
-                    logger.error(f"KyberSwap build error: {response.status}")
-                    return None
+            eth_out_kyber = route_2.amount_out
+            eth_out_after_slippage = eth_out_kyber * 999 // 1000  # 0.1% slippage
+            cost_2 = self.fees.trade_cost(False, route_2)
+            profit_wei_2, profit_pct_2, fee_2 = self.settled_profit(market, amount_wei, eth_out_after_slippage, cost_2)
+            if profit_pct_2 >= self.min_profit_pct:
+                self.pipelines[market.name].speculate(route_2, profit_wei_2)
+            
+            logger.info("[block %s] Direction 2 - %s: %.6f ETH -> %.6f %s -> %.6f ETH, fee %.8f ETH, gas %.8f ETH (Net profit: %.2f%%)",
+                        block_number, self.direction_name(market, False), amount_wei / 1e18, larry_from_larry_dex / 1e18, market.symbol, eth_out_after_slippage / 1e18, fee_2 / 1e18, cost_2 / 1e18, profit_pct_2,
+                        extra={'block': block_number, 'market': market.name, 'direction': 2, 'profit_pct': profit_pct_2})
+            
+            return {
+                'route': route_2, 'profit_pct': profit_pct_2, 'amount_wei': amount_wei,
+                'profit_wei': profit_wei_2, 'quoted_at': route_2.fetched_at
+            }
         except Exception as e:
-            logger.error(f"Error building KyberSwap swap: {e}")
+            logger.debug("Direction 2 check failed: %s", e)
             return None
 
-    def get_larry_price_out(self, larry_amount):
-        """Calculate ETH output from Larry DEX (bonding curve)"""
-        try:
-            # Call Larry DEX directly to get Larry -> ETH conversion
-            eth_out = self.larry_contract.functions.LARRYtoETH(larry_amount).call()
-            return eth_out
-        except Exception as e:
-            logger.error(f"Error getting Larry price: {e}")
-            return 0
-    
-    def get_larry_from_eth(self, eth_amount):
-        """Calculate LARRY amount from ETH via Larry DEX"""
+    async def check_direction(self, market, direction, block_number, max_amount):
+        """One market / direction check, within the scan concurrency limit"""
+        async with self.scan_slots:
+            if direction:
+                return await self.check_kyber_to_larry(market, block_number, max_amount)
+            return await self.check_larry_to_kyber(market, block_number, max_amount)
+
+    async def check_both_arbitrage_directions(self, block_number=None):
+        """Check both directions of every market, priced against one block; returns the best net profit"""
         try:
-            # Call Larry DEX to get ETH -> LARRY conversion
-            larry_out = self.larry_contract.functions.getBuyLARRY(eth_amount).call()
-            return larry_out
+            # One batched state read per block; every bonding-curve quote below is then local
+            block_number = await self.read_cycle_state(block_number)
         except Exception as e:
-            logger.error(f"Error getting LARRY from ETH: {e}")
-            return 0
-
-    def calculate_profit_percentage(self, input_amount, output_amount):
-        """Calculate profit percentage"""
-        if input_amount == 0:
-            return 0
-        return ((output_amount - input_amount) / input_amount) * 100
+            logger.error(f"Error checking arbitrage opportunities: {e}")
+            return None
+        return await self.find_best(block_number)
 
-    async def check_both_arbitrage_directions(self, session):
-        """Check arbitrage opportunities in both directions"""
+    async def find_best(self, block_number):
+        """Best net profit over both directions of every market, from state already loaded for the block"""
         try:
-            best_route = None
-            best_profit = 0
-            best_direction = True
+            best = None
             
-            # Direction 1: ETH -> LARRY (KyberSwap) -> ETH (Larry)
-            route_1 = await self.get_kyberswap_route(
-                session, ETH_ADDRESS, LARRY_ADDRESS, TRADE_AMOUNT_WEI
-            )
+            for pipeline in self.pipelines.values():
+                pipeline.new_block(block_number)
+            max_amount = self.sizers[self.markets[0].name].max_amount(self.balance, GAS_RESERVE_WEI, self.max_trade_wei)
             
-            if route_1 and route_1.get('routeSummary'):
-                larry_amount = int(route_1['routeSummary']['amountOut'])
-                larry_amount_after_slippage = larry_amount * 999 // 1000  # 0.1% slippage
-                eth_out = self.get_larry_price_out(larry_amount_after_slippage)
-                profit_pct_1 = self.calculate_profit_percentage(TRADE_AMOUNT_WEI, eth_out)
-                
-                logger.info(f"Direction 1 - ETH->LARRY(Kyber)->ETH(Larry): {TRADE_AMOUNT_ETH} ETH -> {larry_amount/1e18:.6f} LARRY -> {eth_out/1e18:.6f} ETH (Profit: {profit_pct_1:.2f}%)")
-                
-                if profit_pct_1 >= MIN_PROFIT_PERCENTAGE and profit_pct_1 > best_profit:
-                    best_route = route_1['routeSummary']
-                    best_profit = profit_pct_1
-                    best_direction = True
+            # Every market / direction is independent, so price them concurrently and drop whatever
+            # misses the cycle deadline rather than acting on a stale quote later
+            tasks = {
+                asyncio.create_task(self.check_direction(market, direction, block_number, max_amount)): (market, direction)
+                for market in self.markets
+                for direction in (True, False)
+            }
+            done, pending = await asyncio.wait(tasks, timeout=CYCLE_DEADLINE_SECONDS)
             
-            # Direction 2: ETH -> LARRY (Larry) -> ETH (KyberSwap)
-            try:
-                # Get how much LARRY we'd get from Larry DEX
-                larry_from_larry_dex = self.get_larry_from_eth(TRADE_AMOUNT_WEI)
+            if pending:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                logger.warning(f"⏱️ {len(pending)} direction(s) missed the {CYCLE_DEADLINE_SECONDS}s cycle deadline")
+            
+            for task, (market, direction) in tasks.items():
+                if task not in done:
+                    continue
+                if task.exception():
+                    logger.error(f"Error checking direction: {task.exception()}")
+                    continue
                 
-                if larry_from_larry_dex > 0:
-                    # Check what we'd get selling this LARRY on KyberSwap
-                    route_2 = await self.get_kyberswap_route(
-                        session, LARRY_ADDRESS, ETH_ADDRESS, larry_from_larry_dex
-                    )
-                    
-                    if route_2 and route_2.get('routeSummary'):
-                        eth_out_kyber = int(route_2['routeSummary']['amountOut'])
-                        eth_out_after_slippage = eth_out_kyber * 999 // 1000  # 0.1% slippage
-                        profit_pct_2 = self.calculate_profit_percentage(TRADE_AMOUNT_WEI, eth_out_after_slippage)
-                        
-                        logger.info(f"Direction 2 - ETH->LARRY(Larry)->ETH(Kyber): {TRADE_AMOUNT_ETH} ETH -> {larry_from_larry_dex/1e18:.6f} LARRY -> {eth_out_after_slippage/1e18:.6f} ETH (Profit: {profit_pct_2:.2f}%)")
-                        
-                        if profit_pct_2 >= MIN_PROFIT_PERCENTAGE and profit_pct_2 > best_profit:
-                            best_route = route_2['routeSummary']
-                            best_profit = profit_pct_2
-                            best_direction = False
-            except Exception as e:
-                logger.debug(f"Direction 2 check failed: {e}")
+                candidate = task.result()
+                if not candidate or candidate['profit_pct'] < self.min_profit_pct:
+                    continue
+                # Ranked on expected net profit in wei, so a bigger trade at a thinner margin can win
+                if best is None or candidate['profit_wei'] > best['profit_wei']:
+                    best = dict(candidate, market=market, direction=direction, block_number=block_number)
             
-            if best_route and best_profit >= MIN_PROFIT_PERCENTAGE:
-                direction_name = "ETH->LARRY(Kyber)->ETH(Larry)" if best_direction else "ETH->LARRY(Larry)->ETH(Kyber)"
-                logger.info(f"🎯 Best opportunity: {direction_name} with {best_profit:.2f}% profit")
-                return best_route, best_profit, best_direction
+            if best:
+                best['direction_name'] = self.direction_name(best['market'], best['direction'])
+                logger.info("🎯 Best opportunity: %s with %.2f%% profit (%.8f ETH) on %.6f ETH",
+                            best['direction_name'], best['profit_pct'], best['profit_wei'] / 1e18, best['amount_wei'] / 1e18,
+                            extra={'block': block_number, 'market': best['market'].name, 'profit_wei': best['profit_wei']})
+                return best
             else:
-                logger.info("⏳ No profitable opportunities found in either direction")
-                return None, 0, True
+                logger.info("⏳ No profitable opportunities found in either direction", extra={'sample': 'no_opportunity', 'block': block_number})
+                return None
                 
         except Exception as e:
             logger.error(f"Error checking arbitrage opportunities: {e}")
-            return None, 0, True
+            return None
 
-    async def execute_arbitrage(self, route_summary, direction):
+    async def execute_arbitrage(self, opportunity):
         """Execute arbitrage trade"""
         try:
-            async with aiohttp.ClientSession() as session:
-                # Build swap data
-                swap_data_response = await self.build_kyberswap_swap(session, route_summary)
-                
-                if not swap_data_response or not swap_data_response.get('data'):
-                    logger.error("Failed to build swap data")
-                    return False
-                
-                swap_data = swap_data_response['data']
-                
-                # Validate swap data
-                if not swap_data or len(swap_data) < 10:
-                    logger.error("Invalid swap data received")
-                    return False
-                
-                expected_larry = int(route_summary['amountOut'])
-                min_return_larry = 1  # Set to 1 - let KyberSwap handle slippage
-                
-                logger.info(f"Expected LARRY: {expected_larry/1e18:.6f}, Min return set to: {min_return_larry}")
-                
-                # Prepare transaction
-                nonce = self.w3.eth.get_transaction_count(self.account.address)
-                gas_price = self.w3.eth.gas_price
-                
-                # Build transaction
-                try:
-                    logger.info(f"About to call contract with min_return_larry: {min_return_larry}")
-                    txn = self.contract.functions.executeArbitrageWithSwapData(
-                        bytes.fromhex(swap_data[2:]),  # Remove 0x prefix
-                        min_return_larry,
-                        direction
-                    ).build_transaction({
-                        'from': self.account.address,
-                        'value': TRADE_AMOUNT_WEI,
-                        'gas': 800000,  # Increased gas limit
-                        'gasPrice': gas_price,
-                        'nonce': nonce
-                    })
-                    
-                    # Log the transaction data for debugging
-                    logger.info(f"Transaction data: {txn.get('data', '')[:100]}...")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to build transaction: {e}")
-                    return False
-                
-                # Sign and send transaction
-                signed_txn = self.w3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-                tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+            quote = opportunity['route']
+            direction = opportunity['direction']
+            market = opportunity['market']
+            
+            # Swap data was built speculatively while the other leg was still being priced
+            swap_data_response = await self.pipelines[market.name].take_build(quote)
+            
+            if not swap_data_response or not swap_data_response.get('data'):
+                logger.error("Failed to build swap data")
+                return False
+            
+            swap_data = swap_data_response['data']
+            
+            # Validate swap data
+            if not swap_data or len(swap_data) < 10:
+                logger.error("Invalid swap data received")
+                return False
+            
+            expected_larry = quote.amount_out
+            min_return_larry = 1  # Set to 1 - let KyberSwap handle slippage
+            
+            logger.debug("Expected %s: %.6f, Min return set to: %s", market.symbol if direction else 'ETH', expected_larry / 1e18, min_return_larry)
+            
+            # Build transaction from state already in memory (chainId, this block's fees)
+            try:
+                calldata = self.encoder.encode(swap_data, min_return_larry, direction)
+                gas = self.fees.gas_limit(direction, quote)
+                txn = await self.pipelines[market.name].transaction(calldata, opportunity['amount_wei'], gas)
                 
-                logger.info(f"Transaction sent: {tx_hash.hex()}")
+                # Log the transaction data for debugging (hex-encoded only when DEBUG is on)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Transaction data: 0x%s...", calldata.hex()[:98])
                 
-                # Wait for confirmation
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+            except Exception as e:
+                logger.error(f"Failed to build transaction: {e}")
+                return False
+            
+            # Simulate the exact payload against the pending block; a revert here costs no gas
+            with self.metrics.time('preflight'):
+                passed, reason = await self.preflights[market.name].simulate(calldata, opportunity['amount_wei'], gas, opportunity['block_number'])
+            if not passed:
+                self.opportunities.inc(1, 'rejected')
+                logger.warning(f"🛑 Pre-flight simulation reverted, not broadcasting: {reason}")
+                return False
+            
+            if self.bus and not self.bus.reserve(txn, self.fees.l1_fee):
+                self.opportunities.inc(1, 'skipped')
+                logger.info("💸 Skipping trade: other strategies already committed this block's balance")
+                return False
+            
+            # Sign and send transaction (nonce assigned locally)
+            if opportunity.get('quoted_at'):
+                self.quote_age.observe(time.monotonic() - opportunity['quoted_at'])
+            tx_hash = await self.nonces.send(txn)
+            self.fees.remember_calldata(calldata)
+            self.opportunities.inc(1, 'executed')
+            
+            logger.info("Transaction sent: %s", tx_hash.hex(), extra={'block': opportunity['block_number'], 'nonce': txn['nonce']})
+            
+            # Confirmation is picked up by the background tracker; scanning carries on
+            self.tracker.track(tx_hash, txn['nonce'], self.on_trade_settled, opportunity)
+            return True
                 
-                if receipt.status == 1:
-                    logger.info(f"✅ Arbitrage executed successfully! Gas used: {receipt.gasUsed}")
-                    return True
-                else:
-                    logger.error(f"❌ Transaction failed - Receipt: {receipt}")
-                    return False
-                    
         except Exception as e:
             logger.error(f"Error executing arbitrage: {e}")
             return False
 
-    async def run_monitoring_loop(self):
-        """Main monitoring loop"""
+    def on_trade_settled(self, outcome):
+        """Log the result of a trade once the tracker sees it settle"""
+        opportunity = outcome['context']
+        self.opportunities.inc(1, outcome['status'])
+        if outcome['status'] != 'timeout':
+            self.metrics.stage('inclusion', outcome['latency'])
+        if outcome['status'] == 'success':
+            # Reverts stop early, so only successful trades feed the gas-limit cache
+            self.fees.record_gas(opportunity['direction'], opportunity['route'], outcome['gas_used'])
+            logger.info(f"✅ Arbitrage executed successfully! {opportunity['direction_name']} in block {outcome['block_number']}, gas used: {outcome['gas_used']} ({outcome['latency']:.1f}s)")
+            for event in outcome['events']:
+                if event['event'] == 'ArbitrageDirectionExecuted':
+                    result = event['ethOutput'] - event['ethInput']
+                    if result >= 0:
+                        self.profit.inc(result)
+                    else:
+                        self.loss.inc(-result)
+                    gas = outcome['gas_used'] * outcome['effective_gas_price']
+                    logger.info("💰 Profit: %.8f ETH before %.8f ETH L2 gas (%.6f ETH in, %.6f ETH out)",
+                                result / 1e18, gas / 1e18, event['ethInput'] / 1e18, event['ethOutput'] / 1e18)
+        elif outcome['status'] == 'reverted':
+            logger.error(f"❌ Transaction failed - reverted in block {outcome['block_number']}: {outcome['tx_hash']}")
+        else:
+            logger.warning(f"⌛ No receipt after {outcome['latency']:.0f}s for {outcome['tx_hash']}")
+
+    async def scan_block(self, block_number):
+        """Check one block for arbitrage opportunities and execute the best one"""
+        with self.metrics.time('cycle'):
+            await self.scan(block_number)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Quote cache: %s", self.kyber.cache.stats())
+            if self.tracker:
+                logger.debug("Transactions: %s", self.tracker.stats())
+            logger.debug("Pre-flight: %s", {name: preflight.stats() for name, preflight in self.preflights.items()})
+
+    async def scan(self, block_number):
+        """One scan cycle: price both directions, then execute the best opportunity"""
+        self.tracker.new_block(block_number)
+        # Check both directions for arbitrage opportunities
+        opportunity = await self.check_both_arbitrage_directions(block_number)
+        await self.nonces.replace_stuck()
+        
+        if opportunity:
+            await self.act_on(opportunity)
+
+    async def on_snapshot(self, snapshot):
+        """Quote bus cycle: decide against the shared snapshot (the bus handles the tracker and stuck nonces)"""
+        self.load_snapshot(snapshot)
+        opportunity = await self.find_best(snapshot.block_number)
+        if opportunity:
+            await self.act_on(opportunity)
+
+    async def act_on(self, opportunity):
+        """Execute an opportunity unless too many trades are still pending"""
+        self.opportunities.inc(1, 'seen')
+        if len(self.tracker.pending) >= MAX_PENDING_TRADES:
+            self.opportunities.inc(1, 'skipped')
+            logger.info("⏸️ Skipping opportunity: %d trades still pending", len(self.tracker.pending))
+        else:
+            logger.info("🎯 Executing %s arbitrage with %.2f%% profit (priced at block %s, head %s)",
+                        opportunity['direction_name'], opportunity['profit_pct'], opportunity['block_number'], self.scheduler.latest_block)
+            
+            success = await self.execute_arbitrage(opportunity)
+            
+            if success:
+                logger.info("📤 Arbitrage submitted")
+            else:
+                logger.error("❌ Arbitrage execution failed")
+
+    async def run_monitoring_loop(self, metrics_port=METRICS_PORT):
+        """Main monitoring loop: one scan per new block"""
         logger.info("🚀 Starting arbitrage monitoring...")
+        if metrics_port:
+            await self.metrics.start(port=metrics_port)
         
-        while True:
-            try:
-                async with aiohttp.ClientSession() as session:
-                    # Check both directions for arbitrage opportunities
-                    route_summary, profit_pct, direction = await self.check_both_arbitrage_directions(session)
-                    
-                    if route_summary and profit_pct >= MIN_PROFIT_PERCENTAGE:
-                        direction_name = "ETH->LARRY(Kyber)->ETH(Larry)" if direction else "ETH->LARRY(Larry)->ETH(Kyber)"
-                        logger.info(f"🎯 Executing {direction_name} arbitrage with {profit_pct:.2f}% profit")
-                        
-                        success = await self.execute_arbitrage(route_summary, direction)
-                        
-                        if success:
-                            logger.info("💰 Arbitrage completed successfully!")
-                        else:
-                            logger.error("❌ Arbitrage execution failed")
-                    else:
-                        logger.info("⏳ No profitable opportunities found in either direction")
-                
-                # Wait 30 seconds before next check
-                await asyncio.sleep(30)
-                
-            except KeyboardInterrupt:
-                logger.info("🛑 Bot stopped by user")
-                break
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                await asyncio.sleep(30)
+        try:
+            await self.scheduler.run(self.scan_block)
+        except KeyboardInterrupt:
+            logger.info("🛑 Bot stopped by user")
+        finally:
+            if self.tracker:
+                await self.tracker.stop()
+            await self.metrics.stop()
+            if self.nonces:
+                self.nonces.close()
+            await self.close()
+
+    async def close(self):
+        """Close this bot's venue clients and market log (a quote bus closes the client it shares)"""
+        for venue in self.venues.values():
+            if venue is not self.shared_kyber:
+                await venue.close()
+        if self.market_log:
+            self.market_log.close()
 
 async def main():
     """Main entry point"""
     bot = ArbitrageBot()
     
-    # Check account balance
-    balance = bot.w3.eth.get_balance(bot.account.address)
-    balance_eth = bot.w3.from_wei(balance, 'ether')
-    
-    if balance_eth < Decimal(TRADE_AMOUNT_ETH):
-        logger.error(f"Insufficient balance: {balance_eth} ETH (need at least {TRADE_AMOUNT_ETH} ETH)")
-        return
-    
-    logger.info(f"Account balance: {balance_eth} ETH")
-    
-    await bot.run_monitoring_loop()
+    # One pooled RPC session and one pooled KyberSwap session for the lifetime of the bot
+    async with bot.chain, bot.kyber:
+        # Check account balance
+        balance = await bot.w3.eth.get_balance(bot.account.address)
+        balance_eth = bot.w3.from_wei(balance, 'ether')
+        
+        min_required = Decimal(MIN_TRADE_AMOUNT_ETH) + Decimal(GAS_RESERVE_ETH)
+        
+        if balance_eth < min_required:
+            logger.error(f"Insufficient balance: {balance_eth} ETH (need at least {min_required} ETH)")
+            return
+        
+        logger.info(f"Account balance: {balance_eth} ETH")
+        
+        # Make sure local bonding-curve math agrees with the deployed Larry DEX
+        await bot.nonces.sync()
+        for pricer in bot.pricers.values():
+            await pricer.verify([MIN_TRADE_AMOUNT_WEI, MAX_TRADE_AMOUNT_WEI, Web3.to_wei(1000, 'ether')])
+        
+        await bot.run_monitoring_loop()
 
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(main())
\ No newline at end of file
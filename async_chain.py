@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Async chain access layer for the bots
+Wraps AsyncWeb3 on a pooled keep-alive HTTP session so RPCs never block the event loop;
+several comma-separated RPC URLs get a latency-aware ProviderPool instead of a single endpoint
+"""
+
+import aiohttp
+import logging
+from web3 import AsyncWeb3, AsyncHTTPProvider
+from provider_pool import ProviderPool
+
+# Connection pool tuning
+POOL_SIZE = 16              # Max open sockets to the RPC endpoint
+DNS_CACHE_TTL = 600         # Seconds to keep resolved addresses
+KEEPALIVE_TIMEOUT = 75      # Seconds an idle socket stays in the pool
+REQUEST_TIMEOUT = 10        # Seconds for a single JSON-RPC request
+
+logger = logging.getLogger(__name__)
+
+
+class ChainClient:
+    def __init__(self, rpc_url, pool_size=POOL_SIZE, dns_cache_ttl=DNS_CACHE_TTL,
+                 keepalive_timeout=KEEPALIVE_TIMEOUT, request_timeout=REQUEST_TIMEOUT):
+        self.rpc_url = rpc_url
+        self.pool_size = pool_size
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        urls = [url.strip() for url in rpc_url.split(',') if url.strip()] if isinstance(rpc_url, str) else list(rpc_url)
+        if len(urls) > 1:
+            self.provider = ProviderPool(urls, request_timeout=request_timeout)
+        else:
+            self.provider = AsyncHTTPProvider(
+                urls[0],
+                request_kwargs={"timeout": aiohttp.ClientTimeout(total=request_timeout)},
+                # web3 validates chainId around every call; it never changes, so answer it from cache
+                cache_allowed_requests=True,
+                cacheable_requests={"eth_chainId"}
+            )
+        self.w3 = AsyncWeb3(self.provider)
+        self.session = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """Attach a pooled keep-alive session to the provider"""
+        if self.session and not self.session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self.session = aiohttp.ClientSession(connector=connector)
+        await self.provider.cache_async_session(self.session)
+        logger.debug(f"Async RPC session opened for {self.rpc_url}")
+
+    async def close(self):
+        """Close the pooled session"""
+        if isinstance(self.provider, ProviderPool):
+            await self.provider.disconnect()
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Historical replay of the arbitrage decision logic
+Re-runs check_both_arbitrage_directions over a market_log recording -- every quote priced against
+its block's bonding-curve state, filtered by the profit threshold and size limits, best candidate per
+block traded -- vectorized with NumPy for every parameter set, and reports hypothetical PnL
+"""
+
+import argparse
+import itertools
+import time
+import logging
+import numpy as np
+import market_log
+from larry_pricing import FEE_BASE_10000
+
+logger = logging.getLogger(__name__)
+
+
+def join_states(log):
+    """Per-quote ETH in and ETH out (before the slippage haircut), priced against the curve state of the quote's block
+    Quotes without a state at or before their block are dropped
+    """
+    quotes, states = log['quotes'], log['states']
+    count = len(quotes['block'])
+    eth_in = np.full(count, np.nan)
+    eth_out = np.full(count, np.nan)
+
+    for market in np.unique(quotes['market']):
+        in_market = np.flatnonzero(quotes['market'] == market)
+        state_rows = np.flatnonzero(states['market'] == market)
+        if not len(state_rows):
+            continue
+        order = state_rows[np.argsort(states['block'][state_rows], kind='stable')]
+        state_blocks = states['block'][order]
+        # Latest snapshot at or before each quote's block
+        position = np.searchsorted(state_blocks, quotes['block'][in_market], side='right') - 1
+        known = position >= 0
+        rows = in_market[known]
+        snapshot = order[position[known]]
+
+        backing = states['backing'][snapshot]
+        supply = states['total_supply'][snapshot]
+        buy_fee = states['buy_fee'][snapshot]
+        amount_in = quotes['amount_in'][rows]
+        amount_out = quotes['amount_out'][rows]
+        direction_1 = quotes['eth_in'][rows] == 1
+
+        # Direction 1: ETH -> token (venue) -> ETH via LARRYtoETH
+        # Direction 2: ETH -> token via getBuyLARRY (invert it for the ETH spent) -> ETH (venue)
+        eth_in[rows] = np.where(direction_1, amount_in, amount_in * backing * FEE_BASE_10000 / (supply * buy_fee))
+        eth_out[rows] = np.where(direction_1, amount_out * backing / supply, amount_out)
+    return eth_in, eth_out
+
+
+def replay(log, min_profits, haircuts, min_sizes, max_sizes):
+    """Hypothetical results for every parameter combination; one trade per block at most"""
+    eth_in, eth_out = join_states(log)
+    valid = ~np.isnan(eth_in) & (eth_in > 0)
+    blocks = log['quotes']['block'][valid]
+    order = np.argsort(blocks, kind='stable')
+    blocks = blocks[order]
+    eth_in = eth_in[valid][order]
+    eth_out = eth_out[valid][order]
+    cost = log['quotes']['cost'][valid][order]
+    _, starts = np.unique(blocks, return_index=True)
+
+    results = []
+    for min_profit, haircut, min_size, max_size in itertools.product(min_profits, haircuts, min_sizes, max_sizes):
+        profit = eth_out * haircut - cost - eth_in
+        candidate = (profit / eth_in * 100 >= min_profit) & (eth_in >= min_size) & (eth_in <= max_size)
+        # Best candidate per block (the bot executes one opportunity per cycle)
+        best = np.maximum.reduceat(np.where(candidate, profit, -np.inf), starts) if len(starts) else np.zeros(0)
+        traded = best[np.isfinite(best)]
+        results.append({
+            'min_profit_pct': min_profit,
+            'haircut': haircut,
+            'min_size_eth': min_size / 1e18,
+            'max_size_eth': max_size / 1e18,
+            'trades': int(len(traded)),
+            'pnl_eth': float(traded.sum() / 1e18),
+            'avg_profit_eth': float(traded.mean() / 1e18) if len(traded) else 0.0,
+            'blocks': int(len(starts))
+        })
+    return sorted(results, key=lambda result: result['pnl_eth'], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a market_log recording over a grid of bot parameters")
+    parser.add_argument('path', help="market log directory (MARKET_LOG_DIR)")
+    parser.add_argument('--min-profit', type=float, nargs='+', default=[0.25, 0.5, 1.0, 1.2], help="MIN_PROFIT_PERCENTAGE values")
+    parser.add_argument('--haircut', type=float, nargs='+', default=[0.999, 0.997, 0.995], help="slippage haircut on quotes")
+    parser.add_argument('--min-size', type=float, nargs='+', default=[0.0005], help="smallest trade (ETH)")
+    parser.add_argument('--max-size', type=float, nargs='+', default=[0.01, 0.05, 0.1], help="largest trade (ETH)")
+    parser.add_argument('--top', type=int, default=10, help="parameter sets to print")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    started = time.perf_counter()
+    log = market_log.load(args.path)
+    results = replay(
+        log, args.min_profit, args.haircut,
+        [size * 1e18 for size in args.min_size], [size * 1e18 for size in args.max_size]
+    )
+    elapsed = time.perf_counter() - started
+    logger.info(f"📼 Replayed {len(log['quotes']['block']):,} quotes / {len(log['states']['block']):,} states "
+                f"({', '.join(log['markets'])}) over {len(results)} parameter sets in {elapsed:.2f}s")
+
+    for result in results[:args.top]:
+        logger.info(f"min profit {result['min_profit_pct']:.2f}% | haircut {result['haircut']} | size {result['min_size_eth']}-{result['max_size_eth']} ETH | "
+                    f"{result['trades']} trades in {result['blocks']} blocks | PnL {result['pnl_eth']:.6f} ETH (avg {result['avg_profit_eth']:.8f})")
+
+
+if __name__ == "__main__":
+    main()
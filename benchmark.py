@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the arbitrage bots
+Drives ArbitrageBot / V3ArbitrageBot scan cycles against a local KyberSwap aggregator stand-in
+and a fake Base JSON-RPC node, then reports cycle latency percentiles, throughput, RPC / API
+requests and memory allocated per cycle; --baseline fails the run when a metric regresses.
+--encode-sign N instead times calldata encoding and transaction signing per trade, old path vs new;
+--parse-quotes N times decoding /routes responses and memory kept per cached quote, dicts vs Quote
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+import logging
+from collections import Counter
+import numpy as np
+from aiohttp import web
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector
+from web3 import Web3
+from eth_account import Account
+from rpc_standin import StandinNode
+from multicall import encode_call
+from tx_encoder import CallEncoder, TxSigner
+from kyber_quote import parse_route, build_payload
+
+BENCH_PRIVATE_KEY = "0x" + "42" * 32  # Throwaway key; nothing leaves the machine
+BENCH_ADDRESS = Account.from_key(BENCH_PRIVATE_KEY).address
+
+LARRY_BACKING = 1000 * 10**18       # Larry DEX backing (ETH)
+LARRY_SUPPLY = 10**27               # LARRY supply -> 1e-6 ETH per LARRY
+LARRY_FEE = 9990                    # buy_fee / sell_fee (basis 10000)
+KYBER_ETH_RESERVE = 50 * 10**18     # ETH side of the simulated Kyber pool
+KYBER_FEE = 0.003                   # Simulated pool fee
+PRICE_SPREAD = 0.01                 # Std-dev of Kyber's price around Larry's, per block
+SWAP_DATA_SIZE = 900                # Bytes of calldata returned by /route/build
+GAS_USED = 320000                   # gasUsed reported in receipts
+BASE_FEE = 10**7                    # 0.01 gwei
+WALLET_BALANCE = 10 * 10**18
+GAS_REIMBURSEMENT = 5 * 10**13
+PROTOCOL_FEE = 500                  # protocolFee() (bps)
+SETTLED_RETURN = (10**16 + 10**14) * (10000 - PROTOCOL_FEE) // 10000  # Fee-reduced payout logged for a 0.01 ETH trade
+
+ALLOCATION_CYCLES = 50              # Cycles re-run under tracemalloc (it slows everything down)
+WARMUP_CYCLES = 5
+
+logger = logging.getLogger(__name__)
+
+
+def selector(signature):
+    return function_signature_to_4byte_selector(signature)
+
+
+class FakeKyber:
+    """aiohttp stand-in for the aggregator's /routes and /route/build over one constant-product pool"""
+
+    def __init__(self, latency=0.02, error_rate=0.0, rate_limit_rate=0.0, seed=1):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.eth_reserve = KYBER_ETH_RESERVE
+        self.larry_reserve = KYBER_ETH_RESERVE * LARRY_SUPPLY // LARRY_BACKING
+        self.requests = Counter()
+        self.runner = None
+        self.base_url = None
+
+    def set_block(self, block_number):
+        """Move the pool price to this block's (deterministic) level around Larry's price"""
+        rng = random.Random(self.seed * 1000003 + block_number)
+        larry_price = LARRY_BACKING / LARRY_SUPPLY
+        price = larry_price * math.exp(rng.gauss(0, PRICE_SPREAD))
+        self.larry_reserve = int(self.eth_reserve / price)
+
+    def quote(self, eth_in, amount_in):
+        reserve_in, reserve_out = (self.eth_reserve, self.larry_reserve) if eth_in else (self.larry_reserve, self.eth_reserve)
+        amount_in_after_fee = amount_in * (1 - KYBER_FEE)
+        return int(reserve_out * amount_in_after_fee / (reserve_in + amount_in_after_fee))
+
+    async def gate(self):
+        """Latency, then maybe an error or a rate-limit response"""
+        await asyncio.sleep(self.latency)
+        roll = self.random.random()
+        if roll < self.error_rate:
+            return web.json_response({'code': 4000, 'message': 'internal error'}, status=500)
+        if roll < self.error_rate + self.rate_limit_rate:
+            return web.json_response({'code': 4290, 'message': 'rate limited'}, status=429)
+        return None
+
+    async def routes(self, request):
+        self.requests['routes'] += 1
+        failure = await self.gate()
+        if failure:
+            return failure
+        token_in = request.query['tokenIn']
+        token_out = request.query['tokenOut']
+        amount_in = int(request.query['amountIn'])
+        amount_out = self.quote(token_in.lower() == '0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee', amount_in)
+        pools = 1 + amount_in % 2
+        return web.json_response({'code': 0, 'data': {
+            'routeSummary': {
+                'tokenIn': token_in,
+                'amountIn': str(amount_in),
+                'tokenOut': token_out,
+                'amountOut': str(amount_out),
+                'gas': '180000',
+                'route': [[
+                    {'pool': '0x' + f'{index:040x}', 'tokenIn': token_in, 'tokenOut': token_out,
+                     'swapAmount': str(amount_in), 'amountOut': str(amount_out), 'exchange': 'uniswap-v3'}
+                    for index in range(pools)
+                ]]
+            },
+            'routerAddress': '0x6131B5fae19EA4f9D964eAc0408E4408b66337b5'
+        }})
+
+    async def build(self, request):
+        self.requests['build'] += 1
+        failure = await self.gate()
+        if failure:
+            return failure
+        body = await request.json()
+        summary = body['routeSummary']
+        return web.json_response({'code': 0, 'data': {
+            'amountIn': summary['amountIn'],
+            'amountOut': summary['amountOut'],
+            'gas': '180000',
+            'data': '0xe21fd0e9' + os.urandom(SWAP_DATA_SIZE).hex(),
+            'routerAddress': '0x6131B5fae19EA4f9D964eAc0408E4408b66337b5'
+        }})
+
+    async def head(self, request):
+        return web.Response()
+
+    async def start(self, host='127.0.0.1'):
+        app = web.Application()
+        app.router.add_get('/base/api/v1/routes', self.routes)
+        app.router.add_post('/base/api/v1/route/build', self.build)
+        app.router.add_route('HEAD', '/base/api/v1', self.head)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, 0)
+        await site.start()
+        self.base_url = f"http://{host}:{site._server.sockets[0].getsockname()[1]}/base/api/v1"
+        return self.base_url
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+class BenchmarkNode(StandinNode):
+    """Fake Base node: Larry / Multicall3 / GasPriceOracle / bot views, nonces, fees, sends and receipts"""
+
+    def __init__(self, latency=0.002, **kwargs):
+        super().__init__(latency=latency, **kwargs)
+        self.block = 1000
+        self.calls = Counter()
+        self.pending = []             # Raw transactions waiting for the next block
+        self.receipts = {}            # tx hash -> receipt
+        self.mined = 0
+        self.views = {
+            selector('getBacking()'): lambda args: encode(['uint256'], [LARRY_BACKING]),
+            selector('totalSupply()'): lambda args: encode(['uint256'], [LARRY_SUPPLY]),
+            selector('buy_fee()'): lambda args: encode(['uint16'], [LARRY_FEE]),
+            selector('sell_fee()'): lambda args: encode(['uint16'], [LARRY_FEE]),
+            selector('LARRYtoETH(uint256)'): lambda args: encode(['uint256'], [decode(['uint256'], args)[0] * LARRY_BACKING // LARRY_SUPPLY]),
+            selector('getBuyLARRY(uint256)'): lambda args: encode(['uint256'], [decode(['uint256'], args)[0] * LARRY_SUPPLY * LARRY_FEE // LARRY_BACKING // 10000]),
+            selector('getEthBalance(address)'): lambda args: encode(['uint256'], [WALLET_BALANCE]),
+            selector('getBlockNumber()'): lambda args: encode(['uint256'], [self.block]),
+            selector('getBasefee()'): lambda args: encode(['uint256'], [BASE_FEE]),
+            selector('getL1Fee(bytes)'): lambda args: encode(['uint256'], [len(decode(['bytes'], args)[0]) * 16 * 10**6]),
+            selector('gasReimbursement()'): lambda args: encode(['uint256'], [GAS_REIMBURSEMENT]),
+            selector('profitRecipient()'): lambda args: encode(['address'], ['0x' + 'ab' * 20]),
+            selector('protocolFee()'): lambda args: encode(['uint256'], [PROTOCOL_FEE]),
+            selector('maxSlippage()'): lambda args: encode(['uint256'], [300]),
+            selector('minProfitWei()'): lambda args: encode(['uint256'], [0]),
+            # The bot's wallet owns the contract, so the V2 protocol fee comes back to it and V2 still trades
+            selector('owner()'): lambda args: encode(['address'], [BENCH_ADDRESS]),
+        }
+        self.aggregate3 = selector('aggregate3((address,bool,bytes)[])')
+        self.event_topic = Web3.keccak(text='ArbitrageDirectionExecuted(address,bool,uint256,uint256,uint256,uint256)').hex()
+
+    def block_number(self):
+        return self.block
+
+    def mine(self, block_number):
+        """Advance to block_number, including everything sent so far"""
+        self.block = block_number
+        for raw in self.pending:
+            tx_hash = Web3.to_hex(Web3.keccak(hexstr=raw))
+            self.receipts[tx_hash] = {
+                'transactionHash': tx_hash,
+                'blockNumber': hex(block_number),
+                'status': '0x1',
+                'gasUsed': hex(GAS_USED),
+                'effectiveGasPrice': hex(BASE_FEE),
+                'logs': [{
+                    'topics': ['0x' + self.event_topic.removeprefix('0x'), '0x' + '00' * 32],
+                    'data': '0x' + encode(['bool', 'uint256', 'uint256', 'uint256', 'uint256'], [True, 10**16, SETTLED_RETURN, SETTLED_RETURN, block_number]).hex()
+                }]
+            }
+            self.mined += 1
+        self.pending = []
+
+    def view(self, data):
+        handler = self.views.get(data[:4])
+        if handler is None:
+            return None
+        return handler(data[4:])
+
+    def call(self, params):
+        tx = params[0]
+        data = bytes.fromhex(tx.get('data', tx.get('input', '0x'))[2:])
+        if data[:4] == self.aggregate3:
+            (calls,) = decode(['(address,bool,bytes)[]'], data[4:])
+            results = []
+            for _, _, call_data in calls:
+                output = self.view(call_data)
+                results.append((output is not None, output or b''))
+            return encode(['(bool,bytes)[]'], [results])
+        output = self.view(data)
+        if output is None and tx.get('from'):
+            return b''  # Pre-flight of an arbitrage call: succeeds
+        return output
+
+    def answer(self, request):
+        method = request.get('method')
+        params = request.get('params') or []
+        self.calls[method] += 1
+        response = {'jsonrpc': '2.0', 'id': request.get('id')}
+        if method == 'eth_call':
+            output = self.call(params)
+            if output is None:
+                response['error'] = {'code': 3, 'message': 'execution reverted'}
+            else:
+                response['result'] = '0x' + output.hex()
+        elif method == 'eth_getTransactionCount':
+            response['result'] = hex(self.mined + (len(self.pending) if params[1] == 'pending' else 0))
+        elif method == 'eth_sendRawTransaction':
+            raw = params[0]
+            tx_hash = Web3.to_hex(Web3.keccak(hexstr=raw))
+            if raw in self.pending or tx_hash in self.receipts:
+                response['error'] = {'code': -32000, 'message': 'already known'}
+            else:
+                self.pending.append(raw)
+                response['result'] = tx_hash
+        elif method == 'eth_getTransactionReceipt':
+            response['result'] = self.receipts.get(params[0])
+        elif method == 'eth_getLogs':
+            response['result'] = []
+        elif method == 'eth_feeHistory':
+            count = int(params[0], 16)
+            response['result'] = {
+                'oldestBlock': hex(self.block - count + 1),
+                'baseFeePerGas': [hex(BASE_FEE)] * (count + 1),
+                'gasUsedRatio': [0.5] * count,
+                'reward': [[hex(10**6)]] * count
+            }
+        else:
+            return super().answer(request)
+        return response
+
+
+def percentiles(samples):
+    """p50 / p90 / p99 / max in milliseconds"""
+    values = np.array(samples) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)), 2),
+        'p90_ms': round(float(np.percentile(values, 90)), 2),
+        'p99_ms': round(float(np.percentile(values, 99)), 2),
+        'max_ms': round(float(values.max()), 2)
+    }
+
+
+async def run_cycles(bot, node, kyber, cycles, track_allocations=False):
+    """Run scan cycles on fresh blocks; returns per-cycle latencies and allocations"""
+    latencies = []
+    allocations = []
+    for _ in range(cycles):
+        block_number = node.block + 1
+        node.mine(block_number)
+        kyber.set_block(block_number)
+        if track_allocations:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        await bot.scan_block(block_number)
+        latencies.append(time.perf_counter() - started)
+        if track_allocations:
+            allocations.append(tracemalloc.get_traced_memory()[1] - before)
+    return latencies, allocations
+
+
+async def benchmark_bot(kind, cycles, kyber_options, node_options, kyber_budget=None):
+    """Benchmark one bot ('v2' or 'v3') against fresh stand-ins"""
+    os.environ.setdefault('PRIVATE_KEY', BENCH_PRIVATE_KEY)
+    if kind == 'v2':
+        from arbitrage_bot import ArbitrageBot as Bot
+    else:
+        from run_v3_bot import V3ArbitrageBot as Bot
+
+    node = BenchmarkNode(**node_options)
+    kyber = FakeKyber(**kyber_options)
+    rpc_url = await node.start()
+    kyber_url = await kyber.start()
+    bot = Bot(rpc_url=rpc_url, ws_url=None, kyber_url=kyber_url)
+    if hasattr(bot, 'kyber_budget'):
+        # The stand-in has no rate limit of its own; measure the bot, not the budget, unless asked to
+        budget = kyber_budget or float('inf')
+        bot.kyber_budget.rate = bot.kyber_budget.burst = bot.kyber_budget.tokens = budget
+
+    try:
+        async with bot.chain, bot.kyber:
+            if kind == 'v3':
+                await bot.load_contract_info()
+            await bot.nonces.sync()
+            await run_cycles(bot, node, kyber, WARMUP_CYCLES)
+
+            node.calls.clear()
+            node.requests = 0
+            kyber.requests.clear()
+            sent_before = node.mined + len(node.pending)
+            started = time.perf_counter()
+            latencies, _ = await run_cycles(bot, node, kyber, cycles)
+            elapsed = time.perf_counter() - started
+            rpc_methods = dict(node.calls.most_common())
+            rpc_calls = sum(rpc_methods.values())
+            http_posts = node.requests
+            kyber_requests = dict(kyber.requests)
+            trades = node.mined + len(node.pending) - sent_before
+
+            tracemalloc.start()
+            _, allocations = await run_cycles(bot, node, kyber, min(cycles, ALLOCATION_CYCLES), track_allocations=True)
+            tracemalloc.stop()
+            await bot.tracker.stop()
+    finally:
+        await node.stop()
+        await kyber.stop()
+
+    return dict(
+        percentiles(latencies),
+        bot=kind,
+        cycles=cycles,
+        throughput_cps=round(cycles / elapsed, 2),
+        rpc_calls_per_cycle=round(rpc_calls / cycles, 2),
+        http_posts_per_cycle=round(http_posts / cycles, 2),
+        rpc_methods=rpc_methods,
+        kyber_routes_per_cycle=round(kyber_requests.get('routes', 0) / cycles, 2),
+        kyber_builds_per_cycle=round(kyber_requests.get('build', 0) / cycles, 2),
+        trades_sent=trades,
+        alloc_kib_per_cycle=round(float(np.mean(allocations)) / 1024, 1),
+        alloc_kib_p99=round(float(np.percentile(allocations, 99)) / 1024, 1)
+    )
+
+
+async def loop_stall(sign, txns):
+    """Longest time the event loop went without running while txns were signed with sign"""
+    stalls = []
+
+    async def ticker():
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    for txn in txns:
+        result = sign(txn)
+        if asyncio.iscoroutine(result):
+            await result
+        await asyncio.sleep(0)
+    task.cancel()
+    return max(stalls) * 1000
+
+
+async def benchmark_encode_sign(iterations):
+    """Per-trade encode + sign cost: web3 contract call / eth_abi / eth_account vs CallEncoder / TxSigner"""
+    from arbitrage_bot import CONTRACT_ABI, CONTRACT_ADDRESS
+    contract = Web3().eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    account = Account.from_key(BENCH_PRIVATE_KEY)
+    encoder = CallEncoder(CONTRACT_ABI[0])
+    signer = TxSigner(account)
+    swap_data = '0x' + random.Random(1).randbytes(SWAP_DATA_SIZE).hex()
+    txns = [
+        dict(type=2, chainId=8453, nonce=nonce, maxPriorityFeePerGas=10**6, maxFeePerGas=BASE_FEE * 2 + 10**6,
+             gas=GAS_USED * 2, to=CONTRACT_ADDRESS, value=10**16, data=encoder.encode(swap_data, 1, True))
+        for nonce in range(iterations)
+    ]
+
+    def per_call_us(function, count=iterations):
+        started = time.perf_counter()
+        for i in range(count):
+            function(i)
+        return round((time.perf_counter() - started) / count * 1e6, 1)
+
+    report = {
+        'iterations': iterations,
+        'web3_encode_us': per_call_us(lambda i: contract.functions.executeArbitrageWithSwapData(
+            bytes.fromhex(swap_data[2:]), 1, True)._encode_transaction_data()),
+        'eth_abi_encode_us': per_call_us(lambda i: encode_call(contract.functions.executeArbitrageWithSwapData(
+            bytes.fromhex(swap_data[2:]), 1, True))),
+        'fast_encode_us': per_call_us(lambda i: encoder.encode(swap_data, 1, True)),
+        'eth_account_sign_us': per_call_us(lambda i: account.sign_transaction(txns[i])),
+        'fast_sign_us': per_call_us(lambda i: signer.sign_now(txns[i])),
+        # How long the event loop is held up while trades are signed inline vs on the signer thread
+        'inline_loop_stall_ms': round(await loop_stall(account.sign_transaction, txns), 2),
+        'threaded_loop_stall_ms': round(await loop_stall(signer.sign, txns), 2),
+    }
+    report['before_us'] = round(report['eth_abi_encode_us'] + report['eth_account_sign_us'], 1)
+    report['after_us'] = round(report['fast_encode_us'] + report['fast_sign_us'], 1)
+    signer.close()
+    return report
+
+
+def sample_route_body(seed=1):
+    """A /routes response shaped like the live aggregator's: 2 paths x 2 pools plus the usual extra fields"""
+    rng = random.Random(seed)
+    token_in, token_out = '0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE', '0x888d81e3ea5E8362B5f69188CBCF34Fa8da4b888'
+    amount_in = rng.randrange(10**15, 10**17)
+    return json.dumps({'code': 0, 'message': 'successfully', 'data': {
+        'routeSummary': {
+            'tokenIn': token_in, 'amountIn': str(amount_in), 'amountInUsd': '5.21',
+            'tokenOut': token_out, 'amountOut': str(amount_in * 10**6), 'amountOutUsd': '5.19',
+            'gas': '253000', 'gasPrice': '10000000', 'gasUsd': '0.0079',
+            'extraFee': {'feeAmount': '', 'chargeFeeBy': '', 'isInBps': False, 'feeReceiver': ''},
+            'route': [[
+                {'pool': '0x' + rng.randbytes(20).hex(), 'tokenIn': token_in, 'tokenOut': token_out,
+                 'swapAmount': str(amount_in // 2), 'amountOut': str(amount_in * 10**6 // 2),
+                 'exchange': 'uniswap-v3', 'poolType': 'uniswap-v3', 'poolExtra': {'swapFee': 3000}, 'extra': None}
+                for _ in range(2)
+            ] for _ in range(2)],
+            'routeID': rng.randbytes(16).hex(), 'checksum': str(rng.getrandbits(63)), 'timestamp': 1760000000
+        },
+        'routerAddress': '0x6131B5fae19EA4f9D964eAc0408E4408b66337b5'
+    }}).encode()
+
+
+def benchmark_quote_parse(iterations):
+    """Per-quote cost of the route response: json dicts kept and re-encoded for build vs Quote with summary bytes"""
+    bodies = [sample_route_body(seed) for seed in range(iterations)]
+
+    def dict_path(body):
+        route = json.loads(body)['data']
+        route['fetched_at'] = time.monotonic()
+        summary = route['routeSummary']
+        # Every consumer converted amountOut itself; /route/build re-encoded the summary
+        int(summary['amountOut']), int(summary['amountOut']), int(summary['amountOut'])
+        json.dumps({'routeSummary': summary, 'sender': BENCH_ADDRESS, 'recipient': BENCH_ADDRESS,
+                    'slippageTolerance': 300, 'deadline': 0})
+        return route
+
+    def quote_path(body):
+        quote = parse_route(body)
+        quote.amount_out, quote.amount_out, quote.amount_out
+        build_payload(quote, BENCH_ADDRESS, BENCH_ADDRESS, 300, 0)
+        return quote
+
+    def per_quote(path):
+        started = time.perf_counter()
+        for body in bodies:
+            path(body)
+        elapsed_us = (time.perf_counter() - started) / iterations * 1e6
+        # Memory a cache holding every quote keeps alive
+        tracemalloc.start()
+        kept = [path(body) for body in bodies]
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        return round(elapsed_us, 1), round(retained / iterations)
+
+    report = {'iterations': iterations, 'body_bytes': len(bodies[0])}
+    report['dict_us'], report['dict_bytes_kept'] = per_quote(dict_path)
+    report['quote_us'], report['quote_bytes_kept'] = per_quote(quote_path)
+    return report
+
+
+# Metrics where higher is worse, checked against --baseline
+REGRESSION_METRICS = ['p50_ms', 'p99_ms', 'rpc_calls_per_cycle', 'http_posts_per_cycle', 'kyber_routes_per_cycle', 'alloc_kib_per_cycle']
+
+
+def regressions(report, baseline, tolerance):
+    """Metrics that got worse than baseline by more than tolerance"""
+    found = []
+    for metric in REGRESSION_METRICS:
+        old, new = baseline.get(metric), report.get(metric)
+        if old is None or new is None:
+            continue
+        if new > old * (1 + tolerance) and new - old > 0.01:
+            found.append(f"{report['bot']} {metric}: {old} -> {new}")
+    return found
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for the arbitrage bots")
+    parser.add_argument('--bot', choices=['v2', 'v3', 'both'], default='both')
+    parser.add_argument('--cycles', type=int, default=200)
+    parser.add_argument('--kyber-latency', type=float, default=0.02, help="seconds per aggregator request")
+    parser.add_argument('--kyber-error-rate', type=float, default=0.0)
+    parser.add_argument('--kyber-rate-limit', type=float, default=0.0)
+    parser.add_argument('--kyber-budget', type=float, help="aggregator requests per second the bot may spend (default: unlimited)")
+    parser.add_argument('--rpc-latency', type=float, default=0.002, help="seconds per JSON-RPC request")
+    parser.add_argument('--rpc-failure-rate', type=float, default=0.0)
+    parser.add_argument('--json', help="write the report to this file")
+    parser.add_argument('--baseline', help="earlier --json report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed regression vs baseline (0.2 = 20%%)")
+    parser.add_argument('--verbose', action='store_true', help="keep the bots' own logging")
+    parser.add_argument('--encode-sign', type=int, metavar='N', help="only time calldata encoding + signing over N trades")
+    parser.add_argument('--parse-quotes', type=int, metavar='N', help="only time decoding N /routes responses")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if not args.verbose:
+        # The bots log every quote; at benchmark rates that would dominate the measurement
+        logging.getLogger().setLevel(logging.WARNING)
+        logger.setLevel(logging.INFO)
+
+    if args.encode_sign:
+        report = await benchmark_encode_sign(args.encode_sign)
+        logger.info(f"✍️ encode: web3 {report['web3_encode_us']}µs, eth_abi {report['eth_abi_encode_us']}µs, "
+                    f"CallEncoder {report['fast_encode_us']}µs")
+        logger.info(f"✍️ sign: eth_account {report['eth_account_sign_us']}µs, TxSigner {report['fast_sign_us']}µs; "
+                    f"longest event-loop stall inline {report['inline_loop_stall_ms']}ms vs signer thread {report['threaded_loop_stall_ms']}ms")
+        logger.info(f"✍️ encode + sign per trade: {report['before_us']}µs before, {report['after_us']}µs after")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
+        return
+
+    if args.parse_quotes:
+        report = benchmark_quote_parse(args.parse_quotes)
+        logger.info(f"🧮 per quote ({report['body_bytes']} B response): dicts {report['dict_us']}µs, "
+                    f"{report['dict_bytes_kept']} B kept; Quote {report['quote_us']}µs, {report['quote_bytes_kept']} B kept")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
+        return
+
+    kyber_options = {'latency': args.kyber_latency, 'error_rate': args.kyber_error_rate, 'rate_limit_rate': args.kyber_rate_limit}
+    node_options = {'latency': args.rpc_latency, 'failure_rate': args.rpc_failure_rate}
+    kinds = ['v2', 'v3'] if args.bot == 'both' else [args.bot]
+
+    reports = []
+    for kind in kinds:
+        report = await benchmark_bot(kind, args.cycles, kyber_options, node_options, args.kyber_budget)
+        reports.append(report)
+        logger.info(f"📊 {kind}: {report['cycles']} cycles, {report['throughput_cps']} cycles/s, "
+                    f"p50 {report['p50_ms']}ms / p90 {report['p90_ms']}ms / p99 {report['p99_ms']}ms / max {report['max_ms']}ms")
+        logger.info(f"   RPC {report['rpc_calls_per_cycle']} calls in {report['http_posts_per_cycle']} posts per cycle {report['rpc_methods']}")
+        logger.info(f"   Kyber {report['kyber_routes_per_cycle']} routes + {report['kyber_builds_per_cycle']} builds per cycle, "
+                    f"{report['trades_sent']} trades sent, {report['alloc_kib_per_cycle']} KiB allocated per cycle (p99 {report['alloc_kib_p99']} KiB)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {report['bot']: report for report in json.load(f)}
+        found = [line for report in reports if report['bot'] in baseline
+                 for line in regressions(report, baseline[report['bot']], args.tolerance)]
+        for line in found:
+            logger.error(f"❌ Regression: {line}")
+        if found:
+            sys.exit(1)
+        logger.info("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Block-driven scan scheduler
+Triggers one scan per new head (eth_subscribe newHeads over WebSocket, falling back to
+eth_blockNumber polling) and coalesces heads that arrive while a scan is still running
+"""
+
+import asyncio
+import aiohttp
+import json
+import time
+import logging
+
+POLL_INTERVAL = 1.0         # Seconds between eth_blockNumber polls (Base blocks are 2s)
+HEAD_TIMEOUT = 15           # Reconnect the WebSocket if no head arrives for this long
+RECONNECT_DELAY = 1         # Initial WebSocket reconnect backoff in seconds
+MAX_RECONNECT_DELAY = 30    # Backoff ceiling in seconds
+
+logger = logging.getLogger(__name__)
+
+
+class BlockScheduler:
+    def __init__(self, w3, ws_url=None, poll_interval=POLL_INTERVAL, head_timeout=HEAD_TIMEOUT):
+        self.w3 = w3
+        self.ws_url = ws_url
+        self.poll_interval = poll_interval
+        self.head_timeout = head_timeout
+        self.latest_block = 0
+        self.latest_seen_at = 0.0
+        self.scanned_blocks = 0
+        self.skipped_blocks = 0
+        self._new_head = asyncio.Event()
+
+    def publish(self, block_number):
+        """Record a new head and wake the scan loop"""
+        if block_number > self.latest_block:
+            self.latest_block = block_number
+            self.latest_seen_at = time.monotonic()
+            self._new_head.set()
+
+    async def run(self, on_block):
+        """Call on_block(block_number) for new heads; heads seen mid-scan collapse into the latest one"""
+        watcher = asyncio.create_task(self.watch_heads())
+        last_scanned = 0
+        try:
+            while True:
+                await self._new_head.wait()
+                self._new_head.clear()
+
+                block_number = self.latest_block
+                if block_number <= last_scanned:
+                    continue
+                if last_scanned and block_number > last_scanned + 1:
+                    self.skipped_blocks += block_number - last_scanned - 1
+                    logger.debug(f"Coalesced {block_number - last_scanned - 1} block(s) while previous scan was running")
+
+                last_scanned = block_number
+                self.scanned_blocks += 1
+                try:
+                    await on_block(block_number)
+                except Exception as e:
+                    logger.error(f"Error scanning block {block_number}: {e}")
+        finally:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+
+    async def watch_heads(self):
+        """Feed heads from the WebSocket subscription, polling whenever it is unavailable"""
+        if not self.ws_url:
+            await self.poll_heads()
+            return
+
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                await self.subscribe_heads()
+                delay = RECONNECT_DELAY
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"newHeads subscription dropped ({e}), polling for {delay}s before reconnecting")
+            # Keep scanning on polled heads while we back off
+            try:
+                await asyncio.wait_for(self.poll_heads(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def subscribe_heads(self):
+        """Stream heads from eth_subscribe newHeads until the socket closes or goes quiet"""
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(self.ws_url, heartbeat=self.head_timeout / 2) as ws:
+                await ws.send_str(json.dumps({
+                    "jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]
+                }))
+                logger.info(f"📡 Subscribed to newHeads on {self.ws_url}")
+                while True:
+                    msg = await ws.receive(timeout=self.head_timeout)
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        raise ConnectionError(f"WebSocket closed ({msg.type.name})")
+                    data = json.loads(msg.data)
+                    if 'error' in data:
+                        raise ConnectionError(data['error'])
+                    head = data.get('params', {}).get('result')
+                    if head and 'number' in head:
+                        self.publish(int(head['number'], 16))
+
+    async def poll_heads(self):
+        """Poll eth_blockNumber and publish only when the head moves"""
+        while True:
+            try:
+                self.publish(await self.w3.eth.block_number)
+            except Exception as e:
+                logger.warning(f"eth_blockNumber poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
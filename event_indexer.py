@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Incremental event indexer for the deployed arbitrage contracts
+Pulls the bot events with eth_getLogs in adaptive block ranges (halved when the provider refuses a
+range, grown again after successes), checkpoints the last indexed block, rewinds on reorgs and
+stores everything in SQLite, indexed for PnL / volume per day, contract and direction
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from web3 import Web3
+from async_chain import ChainClient
+from tx_tracker import BOT_EVENTS, decode_event
+
+load_dotenv()
+
+RPC_URL = os.getenv("BASE_RPC_URL", "https://mainnet.base.org")
+DB_PATH = os.getenv("EVENT_DB", "arb_events.db")
+CONTRACTS = {
+    'v2': "0xC14957db5A544167633cF8B480eB6FbB25b6da19",
+    'v3': "0x7Bee2beF4adC5504CD747106924304d26CcFBd94",
+}
+INDEXED_EVENTS = ['ArbitrageExecuted', 'ArbitrageDirectionExecuted', 'PrincipalProtectedArbitrage',
+                  'VolumeGenerated', 'GasReimbursementUpdated']
+START_BLOCK = 30767913      # First deployment in broadcast/; both contracts were deployed after it
+CONFIRMATIONS = 5           # Blocks behind head that are indexed (reorgs deeper than this are still rewound)
+INITIAL_RANGE = 2000        # Blocks per eth_getLogs to start with
+MIN_RANGE = 1
+MAX_RANGE = 10000
+REORG_DEPTH = 128           # Checkpoint hashes kept for finding the common ancestor after a reorg
+POLL_INTERVAL = 2.0         # Seconds between passes in --follow mode
+
+# Error text providers use when a getLogs range / result set is too big
+RANGE_LIMIT_ERRORS = ('block range', 'range is too large', 'more than', 'too many', 'limit exceeded',
+                      'response size', 'query timeout', 'exceeds', '-32005', '-32602')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    event TEXT NOT NULL,
+    timestamp INTEGER,
+    day TEXT,
+    direction INTEGER,          -- 1 = Kyber->Larry, 0 = Larry->Kyber, NULL if the event has none
+    path TEXT,                  -- principal_protected / swap_data / round_trip for trade events, else NULL
+    eth_in REAL,                -- ETH amounts as REAL (wei overflows SQLite integers); exact wei in args
+    eth_out REAL,
+    profit REAL,                -- eth_out - eth_in of the trade
+    reported_profit REAL,       -- The event's own profit figure (see row_for)
+    volume_larry REAL,
+    args TEXT NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_day ON events (day, contract, event);
+CREATE INDEX IF NOT EXISTS events_direction ON events (contract, direction, day);
+CREATE INDEX IF NOT EXISTS events_block ON events (block_number);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    block_number INTEGER PRIMARY KEY,
+    block_hash TEXT NOT NULL
+);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def eth(value):
+    return value / 1e18 if value is not None else None
+
+
+def row_for(log, event, contracts, timestamp, principal_protected=False):
+    """Raw log + its decoded event -> events row
+    The events' profit fields mean different things per emit path, so profit is always ETH out minus
+    ETH in and the raw figure goes to reported_profit:
+    - principal_protected (botv3 executePrincipalProtectedArbitrage, which also emits
+      PrincipalProtectedArbitrage in the same transaction): the share sent to the profit recipient
+    - swap_data (executeArbitrageWithSwapData / WithParams on either contract): netProfit, the
+      fee-reduced whole return with the principal in it -- the same as ethOutput
+    - round_trip (ArbitrageExecuted): everything sent back, principal included
+    """
+    name = event['event']
+    direction = event.get('direction')
+    path, eth_in, eth_out, profit, reported = None, event.get('ethInput', event.get('volumeETH')), None, None, None
+    if name == 'PrincipalProtectedArbitrage':
+        path, eth_in, reported = 'principal_protected', event['principalAmount'], event['profitAmount']
+    elif name == 'ArbitrageDirectionExecuted':
+        path = 'principal_protected' if principal_protected else 'swap_data'
+        eth_out, reported = event['ethOutput'], event['profit']
+        profit = eth_out - eth_in
+    elif name == 'ArbitrageExecuted':
+        path, eth_out, reported = 'round_trip', event['profit'], event['profit']
+        profit = eth_out - eth_in
+    return (
+        Web3.to_hex(log['transactionHash']),
+        int(log['logIndex']),
+        int(log['blockNumber']),
+        Web3.to_hex(log['blockHash']),
+        contracts.get(Web3.to_checksum_address(log['address']), log['address']),
+        name,
+        timestamp,
+        datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d') if timestamp else None,
+        None if direction is None else int(direction),
+        path,
+        eth(eth_in),
+        eth(eth_out),
+        eth(profit),
+        eth(reported),
+        eth(event.get('larryAmount', event.get('volumeLARRY'))),
+        json.dumps({key: str(value) for key, value in event.items() if key != 'event'})
+    )
+
+
+class EventIndexer:
+    def __init__(self, w3, db_path=DB_PATH, contracts=CONTRACTS, start_block=START_BLOCK,
+                 confirmations=CONFIRMATIONS, initial_range=INITIAL_RANGE):
+        self.w3 = w3
+        self.db = sqlite3.connect(db_path)
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(events)")]
+        if columns and 'reported_profit' not in columns:
+            # Rows from before profit meant ETH out - ETH in: index everything again
+            logger.warning("🗃️ Event database predates the path / reported_profit columns; reindexing from scratch")
+            self.db.executescript("DROP TABLE events; DROP TABLE IF EXISTS checkpoints;")
+        self.db.executescript(SCHEMA)
+        self.contracts = {Web3.to_checksum_address(address): name for name, address in contracts.items()}
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.range = initial_range
+        self.topics = [
+            Web3.to_hex(Web3.keccak(text=f"{name}({','.join(field[0] for field in BOT_EVENTS[name])})"))
+            for name in INDEXED_EVENTS
+        ]
+        self.shrinks = 0
+        self.reorgs = 0
+
+    def last_block(self):
+        """Last fully indexed block (start_block - 1 before the first pass)"""
+        row = self.db.execute("SELECT MAX(block_number) FROM checkpoints").fetchone()
+        return row[0] if row[0] is not None else self.start_block - 1
+
+    async def get_logs(self, from_block, to_block):
+        """eth_getLogs for [from_block, to_block]; raises on errors"""
+        return await self.w3.eth.get_logs({
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': list(self.contracts),
+            'topics': [self.topics]
+        })
+
+    async def fetch(self, from_block, to_block):
+        """Logs for as much of the range as the provider accepts; returns (logs, last block covered)"""
+        while True:
+            end = min(to_block, from_block + self.range - 1)
+            try:
+                logs = await self.get_logs(from_block, end)
+            except Exception as e:
+                message = str(e).lower()
+                if self.range > MIN_RANGE and any(text in message for text in RANGE_LIMIT_ERRORS):
+                    self.range = max(self.range // 2, MIN_RANGE)
+                    self.shrinks += 1
+                    logger.info(f"📉 getLogs range refused ({e}); retrying with {self.range} blocks")
+                    continue
+                raise
+            # Accepted: try a bigger range next time
+            self.range = min(self.range * 2, MAX_RANGE)
+            return logs, end
+
+    async def block_hash(self, block_number):
+        block = await self.w3.eth.get_block(block_number)
+        return Web3.to_hex(block['hash'])
+
+    async def check_reorg(self):
+        """Rewind to the newest checkpoint still on the canonical chain; returns blocks dropped"""
+        checkpoints = self.db.execute(
+            "SELECT block_number, block_hash FROM checkpoints ORDER BY block_number DESC"
+        ).fetchall()
+        if not checkpoints:
+            return 0
+        tip = checkpoints[0][0]
+        for block_number, stored in checkpoints:
+            if await self.block_hash(block_number) == stored:
+                break
+        else:
+            # Deeper than every checkpoint we kept: reindex from before the oldest one
+            block_number = checkpoints[-1][0] - 1
+        if block_number == tip:
+            return 0
+        with self.db:
+            self.db.execute("DELETE FROM events WHERE block_number > ?", (block_number,))
+            self.db.execute("DELETE FROM checkpoints WHERE block_number > ?", (block_number,))
+        self.reorgs += 1
+        logger.warning(f"🔀 Reorg: rewound from block {tip} to {block_number}")
+        return tip - block_number
+
+    async def store(self, logs, end):
+        """Insert a range's events and checkpoint its last block, atomically"""
+        rows = []
+        events = [(log, decode_event(log)) for log in logs]
+        protected = {
+            Web3.to_hex(log['transactionHash']) for log, event in events
+            if event and event['event'] == 'PrincipalProtectedArbitrage'
+        }
+        for log, event in events:
+            if not event or event['event'] not in INDEXED_EVENTS:
+                continue
+            timestamp = event.get('timestamp')
+            if timestamp is None:
+                # GasReimbursementUpdated has no timestamp argument
+                timestamp = (await self.w3.eth.get_block(int(log['blockNumber'])))['timestamp']
+            rows.append(row_for(log, event, self.contracts, timestamp, Web3.to_hex(log['transactionHash']) in protected))
+        end_hash = await self.block_hash(end)
+        with self.db:
+            self.db.executemany(f"INSERT OR REPLACE INTO events VALUES ({','.join('?' * 16)})", rows)
+            self.db.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?)", (end, end_hash))
+            self.db.execute(
+                "DELETE FROM checkpoints WHERE block_number NOT IN "
+                "(SELECT block_number FROM checkpoints ORDER BY block_number DESC LIMIT ?)",
+                (REORG_DEPTH,)
+            )
+        return len(rows)
+
+    async def run_once(self):
+        """Index from the checkpoint up to head - confirmations; returns events stored"""
+        await self.check_reorg()
+        target = await self.w3.eth.block_number - self.confirmations
+        stored = 0
+        last = self.last_block()
+        while last < target:
+            logs, end = await self.fetch(last + 1, target)
+            stored += await self.store(logs, end)
+            last = end
+            logger.debug(f"Indexed through block {end} ({stored} events, range {self.range})")
+        return stored
+
+    async def follow(self, interval=POLL_INTERVAL):
+        """Keep indexing as blocks arrive"""
+        while True:
+            stored = await self.run_once()
+            if stored:
+                logger.info(f"📥 {stored} new events, indexed through block {self.last_block()}")
+            await asyncio.sleep(interval)
+
+    def pnl_by_day(self, contract=None):
+        """[(day, contract, trades, profit ETH, volume ETH)] from the trade events, profit being ETH out - ETH in before gas
+        Every trade emits exactly one ArbitrageExecuted or ArbitrageDirectionExecuted; botv3's
+        PrincipalProtectedArbitrage comes alongside the latter and would count the trade twice
+        """
+        query = """
+            SELECT day, contract, COUNT(*), COALESCE(SUM(profit), 0), COALESCE(SUM(eth_in), 0)
+            FROM events
+            WHERE event IN ('ArbitrageExecuted', 'ArbitrageDirectionExecuted')
+            AND (? IS NULL OR contract = ?)
+            GROUP BY day, contract ORDER BY day, contract
+        """
+        return self.db.execute(query, (contract, contract)).fetchall()
+
+    def by_direction(self, contract=None):
+        """[(contract, direction, trades, profit ETH, volume ETH)] from ArbitrageDirectionExecuted"""
+        query = """
+            SELECT contract, direction, COUNT(*), COALESCE(SUM(profit), 0), COALESCE(SUM(eth_in), 0)
+            FROM events
+            WHERE event = 'ArbitrageDirectionExecuted' AND direction IS NOT NULL AND (? IS NULL OR contract = ?)
+            GROUP BY contract, direction ORDER BY contract, direction
+        """
+        return self.db.execute(query, (contract, contract)).fetchall()
+
+    def close(self):
+        self.db.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Index the arbitrage contracts' events into SQLite")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--rpc-url', default=RPC_URL)
+    parser.add_argument('--from-block', type=int, default=START_BLOCK, help="first block when the database is empty")
+    parser.add_argument('--follow', action='store_true', help="keep indexing new blocks")
+    parser.add_argument('--report', action='store_true', help="print PnL per day and per direction")
+    args = parser.parse_args()
+
+    async with ChainClient(args.rpc_url) as chain:
+        indexer = EventIndexer(chain.w3, args.db, start_block=args.from_block)
+        try:
+            if args.follow:
+                return await indexer.follow()
+            stored = await indexer.run_once()
+            logger.info(f"📥 {stored} events stored, indexed through block {indexer.last_block()} "
+                        f"({indexer.shrinks} range shrinks, {indexer.reorgs} reorgs)")
+            if args.report:
+                for day, contract, trades, profit, volume in indexer.pnl_by_day():
+                    logger.info(f"{day} {contract}: {trades} trades, profit {profit:.6f} ETH, volume {volume:.6f} ETH")
+                for contract, direction, trades, profit, volume in indexer.by_direction():
+                    name = "Kyber->Larry" if direction else "Larry->Kyber"
+                    logger.info(f"{contract} {name}: {trades} events, profit {profit:.6f} ETH, volume {volume:.6f} ETH")
+        finally:
+            indexer.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
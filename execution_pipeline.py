@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Speculative execution pipeline
+Builds KyberSwap calldata for the leading candidate while the rest of the cycle is still
+being priced, and fills transactions from state already in memory (chainId, this block's
+fees from FeeEngine), so deciding to trade costs one signature plus one send (the nonce comes
+from NonceManager)
+"""
+
+import asyncio
+import logging
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionPipeline:
+    def __init__(self, w3, build_swap, contract_address, fees):
+        self.w3 = w3
+        self.build_swap = build_swap
+        self.contract_address = Web3.to_checksum_address(contract_address)
+        self.fees = fees
+        self.block_number = None
+        self.leading_score = None
+        self.leading_quote = None
+        self.leading_build = None
+        self.chain_id_task = None
+        self.speculative_hits = 0
+        self.speculative_misses = 0
+
+    def new_block(self, block_number):
+        """Drop speculation left over from an earlier block"""
+        if block_number == self.block_number:
+            return
+        self.block_number = block_number
+        self._cancel_leading()
+
+    def _cancel_leading(self):
+        if self.leading_build and not self.leading_build.done():
+            self.leading_build.cancel()
+        self.leading_score = None
+        self.leading_quote = None
+        self.leading_build = None
+
+    def speculate(self, quote, score):
+        """Start building swap data for a candidate if it beats the current leader"""
+        if self.leading_score is not None and score <= self.leading_score:
+            return
+        self._cancel_leading()
+        self.leading_score = score
+        self.leading_quote = quote
+        self.leading_build = asyncio.create_task(self.build_swap(quote))
+        self.prepare_template()
+
+    def provide(self, quote, build):
+        """Swap data already built elsewhere (a scanner process) for a route, to be picked up by take_build"""
+        self._cancel_leading()
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(build)
+        self.leading_quote = quote
+        self.leading_build = future
+        self.prepare_template()
+
+    def prepare_template(self):
+        """Load chainId in the background ahead of the first transaction"""
+        if self.chain_id_task is None:
+            self.chain_id_task = asyncio.ensure_future(self.w3.eth.chain_id)
+
+    async def take_build(self, quote):
+        """Swap data for a route: the speculative build if it was for this route, otherwise built now"""
+        if self.leading_quote is quote and self.leading_build:
+            build, self.leading_build = self.leading_build, None
+            self.leading_quote = None
+            self.leading_score = None
+            try:
+                result = await build
+            except asyncio.CancelledError:
+                result = None
+            if result:
+                self.speculative_hits += 1
+                return result
+
+        self.speculative_misses += 1
+        return await self.build_swap(quote)
+
+    async def transaction(self, calldata, value, gas):
+        """Unsigned EIP-1559 transaction (no nonce yet) with this block's fees"""
+        self.prepare_template()
+        try:
+            chain_id = await self.chain_id_task
+        except Exception:
+            # A failed background load shouldn't stick
+            self.chain_id_task = None
+            raise
+        return dict(
+            self.fees.fee_fields(),
+            chainId=chain_id,
+            gas=gas,
+            to=self.contract_address,
+            value=value,
+            data=calldata
+        )
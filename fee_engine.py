@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+EIP-1559 fee engine for Base
+Derives maxFeePerGas / maxPriorityFeePerGas from eth_feeHistory once per block, keeps measured
+gasUsed per direction and Kyber route shape for tight gas limits, and tracks the L1 data fee
+(GasPriceOracle.getL1Fee) per block so the net-profit check sees the full cost of a trade
+"""
+
+import os
+import logging
+from collections import deque
+from statistics import median
+from web3 import Web3
+
+# OP-stack predeploy on Base
+GAS_PRICE_ORACLE_ADDRESS = "0x420000000000000000000000000000000000000F"
+
+GAS_PRICE_ORACLE_ABI = [
+    {
+        "inputs": [{"name": "_data", "type": "bytes"}],
+        "name": "getL1Fee",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+GAS_LIMIT = 800000              # Limit used until a route shape has been measured
+GAS_HEADROOM = 1.25             # Limit = largest measured gasUsed for the shape * headroom
+GAS_SAMPLES = 8                 # Measurements kept per (direction, route shape)
+FEE_HISTORY_BLOCKS = 5          # Blocks sampled by eth_feeHistory
+PRIORITY_PERCENTILE = 50        # Reward percentile used for the tip
+MIN_PRIORITY_FEE = 1000000      # 0.001 gwei floor for the tip
+BASE_FEE_MULTIPLIER = 2         # maxFeePerGas headroom over next block's base fee
+SAMPLE_CALLDATA_SIZE = 1500     # Bytes of calldata assumed for the L1 fee before the first trade
+
+logger = logging.getLogger(__name__)
+
+
+def route_shape(quote):
+    """(paths, pools) of a Kyber quote -- what the swap's gas cost mostly depends on"""
+    return quote.shape if quote else (0, 0)
+
+
+def _int(value):
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+class FeeEngine:
+    def __init__(self, w3, gas_limit=GAS_LIMIT, headroom=GAS_HEADROOM,
+                 history_blocks=FEE_HISTORY_BLOCKS, percentile=PRIORITY_PERCENTILE):
+        self.w3 = w3
+        self.gas_limit_default = gas_limit
+        self.headroom = headroom
+        self.history_blocks = history_blocks
+        self.percentile = percentile
+        self.oracle = w3.eth.contract(
+            address=Web3.to_checksum_address(GAS_PRICE_ORACLE_ADDRESS),
+            abi=GAS_PRICE_ORACLE_ABI
+        )
+        self.block_number = None
+        self.base_fee = 0
+        self.priority_fee = MIN_PRIORITY_FEE
+        self.l1_block = None
+        self.l1_fee = 0
+        # Incompressible until a real payload replaces it, so the L1 estimate errs high
+        self.sample_calldata = os.urandom(SAMPLE_CALLDATA_SIZE)
+        self.gas_used = {}    # (direction, shape) -> recent gasUsed
+
+    def history_request(self, block_number=None):
+        """eth_feeHistory as a raw JSON-RPC request, for use in a batch"""
+        block = hex(block_number) if block_number is not None else 'latest'
+        return ('eth_feeHistory', [hex(self.history_blocks), block, [self.percentile]])
+
+    def load_history(self, block_number, history):
+        """Take fees from an eth_feeHistory result (raw hex or web3-formatted)"""
+        # Last entry is the base fee of the block after the newest one sampled
+        self.base_fee = _int(history['baseFeePerGas'][-1])
+        rewards = [_int(reward[0]) for reward in history.get('reward') or [] if reward]
+        rewards = [reward for reward in rewards if reward > 0]
+        self.priority_fee = max(int(median(rewards)) if rewards else 0, MIN_PRIORITY_FEE)
+        self.block_number = block_number
+        logger.debug(f"Fees for next block: base {self.base_fee} wei, tip {self.priority_fee} wei")
+
+    def needs_refresh(self, block_number):
+        """Whether fees for this block haven't been sampled yet"""
+        return block_number is None or block_number != self.block_number
+
+    async def refresh(self, block_number=None):
+        """Sample eth_feeHistory (once per block)"""
+        if not self.needs_refresh(block_number):
+            return
+        history = await self.w3.eth.fee_history(self.history_blocks, block_number or 'latest', [self.percentile])
+        self.load_history(block_number, history)
+
+    def fee_fields(self):
+        """EIP-1559 fee fields for a transaction in the next block"""
+        return {
+            'type': 2,
+            'maxPriorityFeePerGas': self.priority_fee,
+            'maxFeePerGas': self.base_fee * BASE_FEE_MULTIPLIER + self.priority_fee
+        }
+
+    def l1_fee_call(self):
+        """getL1Fee for the sample payload, to ride along in the cycle's multicall"""
+        return self.oracle.functions.getL1Fee(self.sample_calldata)
+
+    def load_l1_fee(self, block_number, value):
+        """Store the L1 fee read for a block"""
+        if value is not None:
+            self.l1_block = block_number
+            self.l1_fee = value
+
+    async def refresh_l1_fee(self, block_number=None):
+        """Read the L1 fee directly when it didn't come from a multicall (cached per block)"""
+        if block_number is not None and block_number == self.l1_block:
+            return self.l1_fee
+        value = await self.l1_fee_call().call(block_identifier=block_number or 'latest')
+        self.load_l1_fee(block_number, value)
+        return self.l1_fee
+
+    def remember_calldata(self, calldata):
+        """Price the L1 fee on the most recent real payload from now on"""
+        self.sample_calldata = bytes(calldata)
+
+    def expected_gas(self, direction, quote):
+        """Typical gasUsed for this direction and route shape; the default limit if unmeasured"""
+        samples = self.gas_used.get((direction, route_shape(quote)))
+        if not samples:
+            samples = [gas for (d, _), recent in self.gas_used.items() if d == direction for gas in recent]
+        return int(median(samples)) if samples else self.gas_limit_default
+
+    def gas_limit(self, direction, quote):
+        """Tight gas limit from measurements of the same direction and route shape"""
+        samples = self.gas_used.get((direction, route_shape(quote)))
+        if not samples:
+            return self.gas_limit_default
+        return int(max(samples) * self.headroom)
+
+    def record_gas(self, direction, quote, gas_used):
+        """Feed back the gasUsed of a mined trade"""
+        key = (direction, route_shape(quote))
+        self.gas_used.setdefault(key, deque(maxlen=GAS_SAMPLES)).append(gas_used)
+
+    def trade_cost(self, direction, quote):
+        """Expected wei cost of a trade: L2 execution at next block's fees plus the L1 data fee"""
+        return self.expected_gas(direction, quote) * (self.base_fee + self.priority_fee) + self.l1_fee
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Long-lived KyberSwap Aggregator client shared by scanning and execution
+Keeps one pooled keep-alive connection set open so route -> build costs only request time
+"""
+
+import asyncio
+import contextlib
+import aiohttp
+import time
+import logging
+from kyber_quote import parse_route, build_payload, loads
+
+KYBER_API_BASE = "https://aggregator-api.kyberswap.com/base/api/v1"
+
+# Connection pool tuning
+POOL_SIZE = 16              # Max open sockets to the aggregator
+DNS_CACHE_TTL = 600         # Seconds to keep resolved addresses
+KEEPALIVE_TIMEOUT = 75      # Seconds an idle socket stays in the pool
+REQUEST_TIMEOUT = 10        # Seconds for a single route/build request
+WARM_CONNECTIONS = 2        # Sockets opened ahead of the first quote
+
+logger = logging.getLogger(__name__)
+
+
+class KyberClient:
+    def __init__(self, base_url=KYBER_API_BASE, pool_size=POOL_SIZE,
+                 dns_cache_ttl=DNS_CACHE_TTL, keepalive_timeout=KEEPALIVE_TIMEOUT,
+                 request_timeout=REQUEST_TIMEOUT, cache=None, sources=None, budget=None,
+                 on_quote=None):
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache
+        self.sources = sources    # includedSources filter (comma-separated), None = every source
+        self.budget = budget      # Shared RateBudget for API calls (cache hits don't spend it)
+        self.on_quote = on_quote  # Called with (token_in, token_out, amount_in, route) for every fresh quote
+        self.pool_size = pool_size
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        self.session = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self, warm_connections=WARM_CONNECTIONS):
+        """Open the pooled session and pre-warm connections"""
+        if self.session and not self.session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+            force_close=False,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            headers={"Connection": "keep-alive", "Accept-Encoding": "gzip, deflate"},
+        )
+        await self.warm_up(warm_connections)
+
+    async def warm_up(self, connections=WARM_CONNECTIONS):
+        """Resolve DNS and complete TCP/TLS handshakes before the first real request"""
+        async def _touch():
+            try:
+                async with self.session.head(self.base_url) as response:
+                    await response.read()
+            except Exception as e:
+                logger.debug(f"KyberSwap warm-up request failed: {e}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_touch() for _ in range(connections)))
+        logger.debug(f"KyberSwap pool warmed ({connections} connections) in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    async def close(self):
+        """Close the pooled session"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def get_route(self, token_in, token_out, amount_in, block_number=None):
+        """Get route from KyberSwap API (through the quote cache when one is attached)"""
+        if self.cache is None:
+            return await self.fetch_route(token_in, token_out, amount_in)
+        key = self.cache.key(token_in, token_out, amount_in, block_number)
+        return await self.cache.get_or_fetch(key, lambda: self.fetch_route(token_in, token_out, amount_in))
+
+    async def fetch_route(self, token_in, token_out, amount_in):
+        """Get a Quote from KyberSwap API (None if there is no route)"""
+        if self.session is None:
+            await self.start()
+        try:
+            params = {
+                "tokenIn": token_in,
+                "tokenOut": token_out,
+                "amountIn": str(amount_in)
+            }
+            if self.sources:
+                params["includedSources"] = self.sources
+
+            async with self.budget or contextlib.nullcontext(), self.session.get(f"{self.base_url}/routes", params=params) as response:
+                if response.status == 200:
+                    # Cached copies keep fetched_at, so quote age is measured from the API response
+                    quote = parse_route(await response.read(), time.monotonic())
+                    if quote and self.on_quote:
+                        self.on_quote(token_in, token_out, amount_in, quote)
+                    return quote
+                else:
+                    logger.error(f"KyberSwap route error: {response.status}")
+                    return None
+        except Exception as e:
+            logger.error(f"Error getting KyberSwap route: {e}")
+            return None
+
+    async def build_route(self, quote, sender, recipient, slippage_tolerance=300, deadline=None):
+        """Build swap data for a Quote from KyberSwap API"""
+        if self.session is None:
+            await self.start()
+        try:
+            payload = build_payload(quote, sender, recipient, slippage_tolerance, deadline or int(time.time()) + 3600)
+
+            async with self.budget or contextlib.nullcontext(), self.session.post(
+                f"{self.base_url}/route/build", data=payload, headers={"Content-Type": "application/json"}
+            ) as response:
+                if response.status == 200:
+                    data = loads(await response.read())
+                    return data.get('data')
+                else:
+                    logger.error(f"KyberSwap build error: {response.status}")
+                    return None
+        except Exception as e:
+            logger.error(f"Error building KyberSwap swap: {e}")
+            return None
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Compact KyberSwap quotes
+A /routes response is decoded once (orjson when installed, the json module otherwise) into a frozen,
+slotted Quote holding only what the bot uses -- integer wei amounts, gas estimate, route shape --
+plus the routeSummary as serialized bytes, which /route/build gets back as-is inside its payload
+"""
+
+import time
+import logging
+from dataclasses import dataclass
+
+try:
+    import orjson
+
+    loads = orjson.loads
+    dumps = orjson.dumps
+except ImportError:
+    import json
+
+    loads = json.loads
+
+    def dumps(value):
+        return json.dumps(value, separators=(',', ':')).encode()
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Quote:
+    """One aggregator quote"""
+    token_in: str
+    token_out: str
+    amount_in: int
+    amount_out: int
+    gas: int            # Aggregator's gas estimate for the swap
+    paths: int          # Split paths in the route
+    hops: int           # Pools across every path
+    router: str
+    summary: bytes      # routeSummary JSON, replayed verbatim to /route/build
+    fetched_at: float   # time.monotonic() of the response, so cached copies still age
+
+    @property
+    def shape(self):
+        """(paths, pools) -- what the swap's gas cost mostly depends on"""
+        return self.paths, self.hops
+
+
+def parse_route(body, fetched_at=None):
+    """Quote from a raw /routes response body; None if it carries no route"""
+    route = (loads(body) or {}).get('data')
+    summary = route.get('routeSummary') if route else None
+    if not summary:
+        return None
+    paths = summary.get('route') or []
+    return Quote(
+        token_in=summary['tokenIn'],
+        token_out=summary['tokenOut'],
+        amount_in=int(summary['amountIn']),
+        amount_out=int(summary['amountOut']),
+        gas=int(summary.get('gas') or 0),
+        paths=len(paths),
+        hops=sum(len(path) for path in paths),
+        router=route.get('routerAddress'),
+        summary=dumps(summary),
+        fetched_at=fetched_at if fetched_at is not None else time.monotonic()
+    )
+
+
+def build_payload(quote, sender, recipient, slippage_tolerance, deadline):
+    """/route/build request body with the quote's routeSummary bytes spliced in, not re-encoded"""
+    rest = dumps({
+        'sender': sender,
+        'recipient': recipient,
+        'slippageTolerance': slippage_tolerance,
+        'deadline': deadline
+    })
+    return b'{"routeSummary":' + quote.summary + b',' + rest[1:]
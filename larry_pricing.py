@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Local Larry DEX bonding-curve pricing engine
+Reads backing / supply / fees once per block and answers quotes with the same
+integer (round-down) math as the LarryTalbotXYZ contract, so pricing costs no RPC
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from web3 import Web3
+
+FEE_BASE_10000 = 10000
+
+# Larry DEX views needed to reproduce its pricing locally
+LARRY_STATE_ABI = [
+    {
+        "inputs": [],
+        "name": "getBacking",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "totalSupply",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "buy_fee",
+        "outputs": [{"name": "", "type": "uint16"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "sell_fee",
+        "outputs": [{"name": "", "type": "uint16"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"name": "value", "type": "uint256"}],
+        "name": "LARRYtoETH",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"name": "amount", "type": "uint256"}],
+        "name": "getBuyLARRY",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class LarryState:
+    """Larry DEX state at one block"""
+    block_number: int
+    backing: int
+    total_supply: int
+    buy_fee: int
+    sell_fee: int
+
+    def larry_to_eth(self, value):
+        """LARRYtoETH: mulDiv(value, getBacking(), totalSupply())"""
+        if self.total_supply == 0:
+            return 0
+        return value * self.backing // self.total_supply
+
+    def get_buy_larry(self, amount):
+        """getBuyLARRY: amount * totalSupply * buy_fee / getBacking / FEE_BASE_10000"""
+        if self.backing == 0:
+            return 0
+        return amount * self.total_supply * self.buy_fee // self.backing // FEE_BASE_10000
+
+    def sell_eth_after_fee(self, larry):
+        """ETH paid to the seller by sell(): LARRYtoETH(larry) * sell_fee / FEE_BASE_10000"""
+        return self.larry_to_eth(larry) * self.sell_fee // FEE_BASE_10000
+
+
+class LarryPricer:
+    def __init__(self, w3, larry_address, multicall=None):
+        self.w3 = w3
+        self.multicall = multicall
+        self.contract = w3.eth.contract(
+            address=Web3.to_checksum_address(larry_address),
+            abi=LARRY_STATE_ABI
+        )
+        self.state = None
+
+    def state_calls(self):
+        """View calls that make up a LarryState, for batching into a cycle's multicall"""
+        functions = self.contract.functions
+        return {
+            'backing': functions.getBacking(),
+            'total_supply': functions.totalSupply(),
+            'buy_fee': functions.buy_fee(),
+            'sell_fee': functions.sell_fee()
+        }
+
+    def load(self, block_number, values):
+        """Install state read elsewhere (e.g. from a batched multicall)"""
+        self.state = LarryState(
+            block_number,
+            values['backing'],
+            values['total_supply'],
+            values['buy_fee'],
+            values['sell_fee']
+        )
+        return self.state
+
+    async def refresh(self, block_number=None):
+        """Load Larry DEX state for a block (no-op if already loaded for that block)"""
+        if block_number is None:
+            block_number = await self.w3.eth.block_number
+        if self.state and self.state.block_number == block_number:
+            return self.state
+
+        calls = self.state_calls()
+        if self.multicall:
+            return self.load(block_number, await self.multicall.read(calls, block_number))
+
+        values = await asyncio.gather(*(fn.call(block_identifier=block_number) for fn in calls.values()))
+        return self.load(block_number, dict(zip(calls, values)))
+
+    async def verify(self, amounts):
+        """Check local quotes against the on-chain LARRYtoETH / getBuyLARRY views"""
+        state = await self.refresh()
+        functions = self.contract.functions
+        if self.multicall:
+            calls = []
+            for amount in amounts:
+                calls += [functions.LARRYtoETH(amount), functions.getBuyLARRY(amount)]
+            values = await self.multicall.aggregate(calls, state.block_number)
+            on_chain = list(zip(values[0::2], values[1::2]))
+        else:
+            on_chain = await asyncio.gather(*(
+                asyncio.gather(
+                    functions.LARRYtoETH(amount).call(block_identifier=state.block_number),
+                    functions.getBuyLARRY(amount).call(block_identifier=state.block_number)
+                )
+                for amount in amounts
+            ))
+
+        mismatches = []
+        for amount, (eth_out, larry_out) in zip(amounts, on_chain):
+            local = (state.larry_to_eth(amount), state.get_buy_larry(amount))
+            if local != (eth_out, larry_out):
+                mismatches.append((amount, local, (eth_out, larry_out)))
+                logger.error(f"Larry pricing mismatch at block {state.block_number} for {amount}: local {local} vs on-chain {(eth_out, larry_out)}")
+
+        if not mismatches:
+            logger.info(f"✅ Local Larry pricing matches on-chain views for {len(amounts)} amounts at block {state.block_number}")
+        return mismatches
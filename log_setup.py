@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Non-blocking logging pipeline
+The event loop only enqueues records (unformatted: %-style arguments are merged in the writer
+thread); a QueueListener formats them as text or JSON lines and writes to stderr or a rotating file.
+Repetitive chatter tagged with extra={'sample': key} is sampled 1-in-N per key
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")            # "text" or "json" (JSON lines)
+LOG_FILE = os.getenv("LOG_FILE")                        # Optional: rotating file instead of stderr
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "20"))  # Keep 1 in N sampled records per key (1 = keep all)
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# LogRecord attributes that are not user-supplied extras
+RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra={...} fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """Pass one record in every `every` per sample key; the one that passes carries how many were dropped"""
+
+    def __init__(self, every=LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.every = every
+        self.seen = {}
+
+    def filter(self, record):
+        key = getattr(record, 'sample', None)
+        if key is None or self.every <= 1:
+            return True
+        count = self.seen.get(key, 0)
+        self.seen[key] = count + 1
+        if count % self.every:
+            return False
+        if count:
+            record.suppressed = self.every - 1
+        return True
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread
+    The stock prepare() merges msg % args on the caller's thread; records here only carry
+    immutable arguments, so they can cross to the writer as they are
+    """
+
+    def prepare(self, record):
+        return record
+
+
+_listener = None
+_lock = threading.Lock()
+
+
+def setup_logging(level=LOG_LEVEL, fmt=LOG_FORMAT, path=LOG_FILE, max_bytes=LOG_MAX_BYTES,
+                  backups=LOG_BACKUPS, sample_every=LOG_SAMPLE_EVERY):
+    """Route the root logger through a queue to a background writer; safe to call more than once"""
+    global _listener
+    with _lock:
+        if _listener:
+            return _listener
+
+        if path:
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        else:
+            handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+        records = queue.SimpleQueue()
+        queue_handler = LazyQueueHandler(records)
+        # Sampling runs before enqueueing, so dropped chatter never crosses to the writer
+        queue_handler.addFilter(SampleFilter(sample_every))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
+
+
+def stop_logging():
+    """Flush whatever is still queued and stop the writer thread"""
+    global _listener
+    with _lock:
+        if _listener:
+            _listener.stop()
+            _listener = None
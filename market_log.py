@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Columnar market-data log
+Appends every Kyber quote and bonding-curve state snapshot the bot sees to one raw little-endian
+file per column (plus a small JSON index), so a log of millions of rows opens instantly as
+NumPy memmaps for backtest.py
+"""
+
+import json
+import os
+import time
+import logging
+import numpy as np
+
+FLUSH_ROWS = 1024   # Rows buffered per table before they are appended to disk
+
+# Wei amounts overflow int64, so they are kept as float64 (~15 significant digits)
+TABLES = {
+    'states': {
+        'block': '<u8',
+        'market': '<u2',
+        'backing': '<f8',
+        'total_supply': '<f8',
+        'buy_fee': '<u2',
+        'sell_fee': '<u2',
+    },
+    'quotes': {
+        'block': '<u8',
+        'market': '<u2',
+        'eth_in': '|u1',        # 1 = ETH -> token quote, 0 = token -> ETH
+        'amount_in': '<f8',
+        'amount_out': '<f8',
+        'cost': '<f8',          # Estimated trade cost (L2 + L1 fee) in wei when quoted
+        'timestamp': '<f8',
+    },
+}
+
+logger = logging.getLogger(__name__)
+
+
+class MarketLog:
+    def __init__(self, path, flush_rows=FLUSH_ROWS):
+        self.path = path
+        self.flush_rows = flush_rows
+        os.makedirs(path, exist_ok=True)
+        self.index_path = os.path.join(path, 'index.json')
+        self.markets = read_index(path)['markets']
+        self.buffers = {table: {column: [] for column in columns} for table, columns in TABLES.items()}
+        for table in TABLES:
+            # A crash between two column appends leaves the columns at different lengths; appending
+            # after that would shift every later row, so cut them all back to the last whole row
+            align(path, table)
+        self.files = {
+            table: {column: open(column_path(path, table, column), 'ab') for column in columns}
+            for table, columns in TABLES.items()
+        }
+        self.rows = 0
+
+    def market_id(self, name):
+        """Stable small integer for a market name (new names are added to the index)"""
+        if name not in self.markets:
+            self.markets.append(name)
+            with open(self.index_path, 'w') as f:
+                json.dump({'markets': self.markets, 'tables': TABLES}, f)
+        return self.markets.index(name)
+
+    def append(self, table, **row):
+        buffers = self.buffers[table]
+        for column, value in row.items():
+            buffers[column].append(value)
+        self.rows += 1
+        if len(buffers['block']) >= self.flush_rows:
+            self.flush_table(table)
+
+    def record_state(self, market, state):
+        """One bonding-curve snapshot (LarryState)"""
+        self.append(
+            'states',
+            block=state.block_number,
+            market=self.market_id(market),
+            backing=float(state.backing),
+            total_supply=float(state.total_supply),
+            buy_fee=state.buy_fee,
+            sell_fee=state.sell_fee
+        )
+
+    def record_quote(self, market, block_number, eth_in, amount_in, amount_out, cost):
+        """One aggregator quote"""
+        self.append(
+            'quotes',
+            block=block_number or 0,
+            market=self.market_id(market),
+            eth_in=1 if eth_in else 0,
+            amount_in=float(amount_in),
+            amount_out=float(amount_out),
+            cost=float(cost),
+            timestamp=time.time()
+        )
+
+    def flush_table(self, table):
+        buffers = self.buffers[table]
+        if not buffers['block']:
+            return
+        for column, dtype in TABLES[table].items():
+            np.asarray(buffers[column], dtype=dtype).tofile(self.files[table][column])
+            self.files[table][column].flush()
+            buffers[column].clear()
+
+    def flush(self):
+        for table in TABLES:
+            self.flush_table(table)
+
+    def close(self):
+        self.flush()
+        for files in self.files.values():
+            for f in files.values():
+                f.close()
+        logger.info(f"🗄️ Market log closed: {self.rows} rows written to {self.path}")
+
+
+def column_path(path, table, column):
+    return os.path.join(path, f"{table}.{column}.bin")
+
+
+def table_rows(path, table):
+    """Whole rows present in every column of a table"""
+    rows = None
+    for column, dtype in TABLES[table].items():
+        size = os.path.getsize(column_path(path, table, column)) if os.path.exists(column_path(path, table, column)) else 0
+        count = size // np.dtype(dtype).itemsize
+        rows = count if rows is None else min(rows, count)
+    return rows
+
+
+def align(path, table):
+    """Truncate every column of a table to the row count they share; returns that count"""
+    rows = table_rows(path, table)
+    for column, dtype in TABLES[table].items():
+        file_path = column_path(path, table, column)
+        size = rows * np.dtype(dtype).itemsize
+        if os.path.exists(file_path) and os.path.getsize(file_path) > size:
+            os.truncate(file_path, size)
+            logger.warning(f"🗄️ Dropped a torn tail of {table}.{column} ({rows} rows kept)")
+    return rows
+
+
+def read_index(path):
+    index_path = os.path.join(path, 'index.json')
+    if not os.path.exists(index_path):
+        return {'markets': [], 'tables': TABLES}
+    with open(index_path) as f:
+        return json.load(f)
+
+
+def load(path):
+    """Memory-map a log: {'markets': [...], 'states': {column: array}, 'quotes': {column: array}}
+    Every column of a table is read up to the shortest one, so rows a crash left half-written (and
+    that the next MarketLog truncates) are ignored; the files themselves are left untouched
+    """
+    log = {'markets': read_index(path)['markets']}
+    for table, columns in TABLES.items():
+        rows = table_rows(path, table)
+        log[table] = {
+            column: np.memmap(column_path(path, table, column), dtype=dtype, mode='r', shape=(rows,)) if rows else np.zeros(0, dtype=dtype)
+            for column, dtype in columns.items()
+        }
+    return log
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Markets the scanner watches
+A market is a bonding-curve token with the Larry DEX interface (getBacking / totalSupply / buy_fee /
+sell_fee, LARRYtoETH / getBuyLARRY), the arbitrage contract deployed for it and the counter-venue it
+trades against; venues are KyberSwap endpoints, optionally limited to some liquidity sources
+"""
+
+import asyncio
+import json
+import time
+import logging
+from dataclasses import dataclass
+from web3 import Web3
+from kyber_client import KYBER_API_BASE
+
+DEFAULT_VENUE = "Kyber"
+KYBER_RATE = 20.0           # Aggregator requests per second, shared by every venue
+KYBER_BURST = 20            # Requests allowed back-to-back before the rate applies
+KYBER_CONCURRENCY = 8       # Aggregator requests in flight at once
+SCAN_CONCURRENCY = 8        # Market / direction checks running at once
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Venue:
+    """Counter-venue: a KyberSwap endpoint, optionally restricted to some sources (includedSources)"""
+    name: str
+    url: str = KYBER_API_BASE
+    sources: str = None
+
+
+@dataclass(frozen=True)
+class Market:
+    """Bonding-curve token, its arbitrage contract and the venue it is arbitraged against"""
+    name: str       # DEX name used in logs, e.g. "Larry"
+    symbol: str     # Token symbol, e.g. "LARRY"
+    token: str
+    contract: str
+    venue: str = DEFAULT_VENUE
+
+
+def load_markets(path, markets, venues):
+    """Markets / venues from a JSON file ({"venues": [...], "markets": [...]}) on top of the defaults
+    Returns (markets, venues by name); the file's markets replace the default list
+    """
+    if not path:
+        return markets, {venue.name: venue for venue in venues}
+    with open(path) as f:
+        config = json.load(f)
+
+    venues = {venue.name: venue for venue in venues}
+    default_url = venues[DEFAULT_VENUE].url if DEFAULT_VENUE in venues else KYBER_API_BASE
+    for entry in config.get('venues', []):
+        # Venues are usually the same aggregator limited to other sources, so the URL defaults to Kyber's
+        venues[entry['name']] = Venue(entry['name'], entry.get('url', default_url), entry.get('sources'))
+
+    loaded = []
+    for entry in config.get('markets', []):
+        market = Market(
+            entry['name'],
+            entry.get('symbol', entry['name'].upper()),
+            Web3.to_checksum_address(entry['token']),
+            Web3.to_checksum_address(entry['contract']),
+            entry.get('venue', DEFAULT_VENUE)
+        )
+        if market.venue not in venues:
+            raise ValueError(f"Market {market.name} uses unknown venue {market.venue}")
+        loaded.append(market)
+    if len({market.name for market in loaded}) != len(loaded):
+        raise ValueError(f"Duplicate market names in {path}")
+
+    logger.info(f"Loaded {len(loaded)} markets / {len(venues)} venues from {path}")
+    return loaded or markets, venues
+
+
+class RateBudget:
+    """Token bucket (requests per second, burst) plus a cap on requests in flight"""
+
+    def __init__(self, rate=KYBER_RATE, burst=KYBER_BURST, concurrency=KYBER_CONCURRENCY):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.slots = asyncio.BoundedSemaphore(concurrency)
+        self.throttled = 0
+
+    async def acquire(self):
+        await self.slots.acquire()
+        try:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                self.throttled += 1
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def release(self):
+        self.slots.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Low-overhead hot-path metrics
+Fixed-bucket histograms and counters kept in plain lists / dicts (no locks: everything runs on the
+bot's event loop), rendered in Prometheus text format on a local /metrics endpoint
+"""
+
+import bisect
+import time
+import logging
+from contextlib import contextmanager
+from aiohttp import web
+
+METRICS_HOST = "127.0.0.1"  # Local only; put a reverse proxy in front to expose it
+METRICS_PORT = 9108
+
+# Seconds; covers a local pricing call (~us) up to a slow inclusion (minutes)
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+QUOTE_AGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16)
+
+logger = logging.getLogger(__name__)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}   # label values -> total
+
+    def inc(self, amount=1, *label_values):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def get(self, *label_values):
+        return self.values.get(label_values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in self.values.items():
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        self.series = {}   # label values -> [per-bucket counts (last is +Inf), sum, count]
+
+    def observe(self, value, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *label_values):
+        series = self.series.get(label_values)
+        return series[2] if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), label_values + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {count}")
+        return lines
+
+
+class Metrics:
+    def __init__(self, prefix="arb"):
+        self.prefix = prefix
+        self.metrics = {}
+        self.runner = None
+        self.stages = self.histogram('stage_seconds', "Wall time per hot-path stage", labels=['stage'])
+
+    def counter(self, name, help, labels=()):
+        """Get or create a counter (name is prefixed)"""
+        name = f"{self.prefix}_{name}"
+        if name not in self.metrics:
+            self.metrics[name] = Counter(name, help, labels)
+        return self.metrics[name]
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS, labels=()):
+        """Get or create a histogram (name is prefixed)"""
+        name = f"{self.prefix}_{name}"
+        if name not in self.metrics:
+            self.metrics[name] = Histogram(name, help, buckets, labels)
+        return self.metrics[name]
+
+    def stage(self, stage, seconds):
+        """Record one stage duration"""
+        self.stages.observe(seconds, stage)
+
+    @contextmanager
+    def time(self, stage):
+        """Time the enclosed block (awaits included) as one stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.observe(time.perf_counter() - started, stage)
+
+    def render(self):
+        """Everything in Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request):
+        return web.Response(body=self.render().encode(), headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    async def start(self, host=METRICS_HOST, port=METRICS_PORT):
+        """Serve /metrics from the running event loop; returns the URL, or None if the port is taken"""
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        try:
+            await site.start()
+        except OSError as e:
+            # Another bot on this host already serves metrics there; trade on without an endpoint
+            logger.warning(f"⚠️ Metrics disabled, cannot listen on {host}:{port}: {e}")
+            await self.stop()
+            return None
+        url = f"http://{host}:{site._server.sockets[0].getsockname()[1]}/metrics"
+        logger.info(f"📈 Metrics on {url}")
+        return url
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
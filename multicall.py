@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Multicall3 batched reads
+Packs every view call a cycle needs into one aggregate3 eth_call pinned to a single block
+"""
+
+import logging
+from eth_abi import decode, encode
+from eth_utils import function_abi_to_4byte_selector, to_checksum_address
+from eth_utils.abi import get_abi_input_types, get_abi_output_types
+from web3 import Web3
+
+# Same address on Base and every other major chain
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"}
+                ],
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"}
+                ],
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    },
+    {
+        "inputs": [{"name": "addr", "type": "address"}],
+        "name": "getEthBalance",
+        "outputs": [{"name": "balance", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "getBasefee",
+        "outputs": [{"name": "basefee", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "getBlockNumber",
+        "outputs": [{"name": "blockNumber", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+logger = logging.getLogger(__name__)
+
+
+def encode_call(fn):
+    """ABI-encode a bound contract function call"""
+    selector = function_abi_to_4byte_selector(fn.abi)
+    return selector + encode(get_abi_input_types(fn.abi), fn.args)
+
+
+def decode_result(fn, data):
+    """Decode return data the way web3 would (single outputs unwrapped, addresses checksummed)"""
+    output_types = get_abi_output_types(fn.abi)
+    values = [
+        to_checksum_address(value) if output_type == 'address' else value
+        for output_type, value in zip(output_types, decode(output_types, data))
+    ]
+    return values[0] if len(values) == 1 else tuple(values)
+
+
+class Multicall:
+    def __init__(self, w3, address=MULTICALL3_ADDRESS):
+        self.w3 = w3
+        self.contract = w3.eth.contract(
+            address=Web3.to_checksum_address(address),
+            abi=MULTICALL3_ABI
+        )
+        self.calls_made = 0
+
+    def eth_balance(self, address):
+        """Multicall3.getEthBalance(address) as a batchable call"""
+        return self.contract.functions.getEthBalance(Web3.to_checksum_address(address))
+
+    def base_fee(self):
+        """Multicall3.getBasefee() as a batchable call"""
+        return self.contract.functions.getBasefee()
+
+    def block_number(self):
+        """Multicall3.getBlockNumber() as a batchable call"""
+        return self.contract.functions.getBlockNumber()
+
+    def aggregate_request(self, calls, block_identifier='latest'):
+        """aggregate3 over bound contract function calls as a raw JSON-RPC request, for use in a batch"""
+        payload = [(fn.address, True, encode_call(fn)) for fn in calls]
+        block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+        return ('eth_call', [{'to': self.contract.address, 'data': '0x' + encode_call(self.contract.functions.aggregate3(payload)).hex()}, block])
+
+    def decode_aggregate(self, calls, data, block_identifier='latest'):
+        """Decode aggregate3 return data (None for any call that reverted)"""
+        if isinstance(data, str):
+            data = bytes.fromhex(data[2:])
+        results = decode_result(self.contract.functions.aggregate3([]), data)
+
+        decoded = []
+        for fn, (success, sub_data) in zip(calls, results):
+            if not success:
+                logger.warning(f"Multicall sub-call {fn.fn_name} reverted at block {block_identifier}")
+                decoded.append(None)
+                continue
+            decoded.append(decode_result(fn, sub_data))
+        return decoded
+
+    async def aggregate(self, calls, block_identifier='latest'):
+        """Run bound contract function calls in one aggregate3 eth_call (None for any call that reverted)"""
+        _, (params, block) = self.aggregate_request(calls, block_identifier)
+        self.calls_made += 1
+        data = await self.w3.eth.call(params, block)
+        return self.decode_aggregate(calls, data, block_identifier)
+
+    async def read(self, named_calls, block_identifier='latest'):
+        """Like aggregate(), but takes and returns a dict keyed by name"""
+        names = list(named_calls)
+        values = await self.aggregate([named_calls[name] for name in names], block_identifier)
+        return dict(zip(names, values))
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Local nonce manager
+Hands out nonces from memory so several trades can be in flight at once, fills the nonce of a
+failed send right away (rewinding, or a zero-value self-transfer when later nonces are already
+out), resyncs with the chain when it sees a gap and replaces stuck transactions with a fee bump
+on the same nonce; signatures are made on TxSigner's thread, off the event loop
+"""
+
+import asyncio
+import heapq
+import time
+import logging
+from web3 import Web3
+from tx_encoder import TxSigner
+
+STUCK_AFTER = 30        # Seconds before an unmined lowest nonce counts as stuck
+FEE_BUMP = 1.125        # Replacement fee multiplier (nodes require at least +10%)
+MAX_REPLACEMENTS = 5    # Give up bumping a nonce after this many replacements
+FILL_GAS = 21000        # Gas of the zero-value self-transfer that fills a failed send's nonce
+
+logger = logging.getLogger(__name__)
+
+
+class NonceManager:
+    def __init__(self, w3, account, stuck_after=STUCK_AFTER, fee_bump=FEE_BUMP,
+                 max_replacements=MAX_REPLACEMENTS, metrics=None, signer=None):
+        self.w3 = w3
+        self.account = account
+        self.address = account.address
+        self.stuck_after = stuck_after
+        self.fee_bump = fee_bump
+        self.max_replacements = max_replacements
+        self.next_nonce = None
+        self.free = []        # Nonces handed out, never broadcast and not yet filled (heap, lowest first)
+        self.inflight = {}    # nonce -> {'txn', 'raw', 'hash', 'hashes', 'sent_at', 'replacements'}
+        self.lock = asyncio.Lock()
+        self.resyncs = 0
+        self.replacements = 0
+        self.fills = 0
+        self.metrics = metrics
+        self.signer = signer or TxSigner(account)
+        self.on_replace = []  # Callbacks on_replace(nonce, tx_hash) run after each fee-bump replacement is sent
+
+    async def sync(self):
+        """Load the next nonce from the chain's pending count"""
+        async with self.lock:
+            pending = await self.w3.eth.get_transaction_count(self.address, 'pending')
+            if self.next_nonce is None or pending > self.next_nonce:
+                if self.next_nonce is not None:
+                    logger.warning(f"Nonce resync: chain pending {pending} ahead of local {self.next_nonce}")
+                    self.resyncs += 1
+                self.next_nonce = pending
+                self.free = [nonce for nonce in self.free if nonce >= pending]
+                heapq.heapify(self.free)
+
+    async def allocate(self):
+        """Next nonce to use: a refilled gap first, otherwise the next fresh one"""
+        if self.next_nonce is None:
+            await self.sync()
+        if self.free:
+            return heapq.heappop(self.free)
+        nonce = self.next_nonce
+        self.next_nonce += 1
+        return nonce
+
+    async def release(self, nonce, txn):
+        """Give back the nonce of a transaction that never made it out
+        The newest nonce is just rewound; below it, later nonces are (or are about to be) broadcast and
+        would wait behind the gap, so it is filled at once with a self-transfer at txn's fees
+        """
+        if nonce == self.next_nonce - 1:
+            self.next_nonce = nonce
+            return
+        if not await self.fill(nonce, txn):
+            heapq.heappush(self.free, nonce)
+
+    async def fill(self, nonce, txn):
+        """Zero-value self-transfer at nonce; returns True once broadcast"""
+        filler = {key: txn[key] for key in ('type', 'chainId', 'maxFeePerGas', 'maxPriorityFeePerGas', 'gasPrice') if key in txn}
+        filler.update(nonce=nonce, to=self.address, value=0, gas=FILL_GAS, data=b'')
+        try:
+            raw = await self.signer.sign(filler)
+            tx_hash = await self.w3.eth.send_raw_transaction(raw)
+        except Exception as e:
+            logger.warning(f"Filling nonce {nonce} failed, reusing it for the next trade: {e}")
+            return False
+        self.record(nonce, filler, raw, tx_hash)
+        self.fills += 1
+        logger.info(f"🕳️ Filled nonce {nonce} with a self-transfer: {tx_hash.hex()}")
+        return True
+
+    async def accepted(self, nonce):
+        """Whether the node already counts nonce as pending, i.e. a send that raised went out anyway"""
+        try:
+            pending = await self.w3.eth.get_transaction_count(self.address, 'pending')
+        except Exception:
+            return False
+        return pending > nonce
+
+    def record(self, nonce, txn, raw, tx_hash):
+        self.inflight[nonce] = {
+            'txn': dict(txn),
+            'raw': raw,
+            'hash': tx_hash,
+            'hashes': [tx_hash],
+            'sent_at': time.monotonic(),
+            'replacements': 0
+        }
+
+    async def send(self, txn):
+        """Assign a nonce (written into txn), sign and broadcast; returns the tx hash"""
+        nonce = await self.allocate()
+        txn['nonce'] = nonce
+        try:
+            started = time.perf_counter()
+            raw = await self.signer.sign(txn)
+            signed_at = time.perf_counter()
+        except Exception:
+            await self.release(nonce, txn)
+            raise
+        try:
+            tx_hash = await self.w3.eth.send_raw_transaction(raw)
+        except Exception as e:
+            # A timeout or a partial pooled broadcast can raise after the node took the transaction
+            if not await self.accepted(nonce):
+                await self.release(nonce, txn)
+                raise
+            tx_hash = Web3.keccak(raw)
+            logger.warning(f"Send of nonce {nonce} raised ({e}) but the node has it; tracking {tx_hash.hex()}")
+        if self.metrics:
+            self.metrics.stage('sign', signed_at - started)
+            self.metrics.stage('send', time.perf_counter() - signed_at)
+        self.record(nonce, txn, raw, tx_hash)
+        return tx_hash
+
+    def confirm(self, nonce):
+        """Forget a nonce once its transaction (or a replacement) is mined"""
+        self.inflight.pop(nonce, None)
+
+    async def refresh(self):
+        """Reconcile in-flight nonces with the chain; no RPC while nothing is outstanding"""
+        if not self.inflight and not self.free:
+            return
+        latest, pending = await asyncio.gather(
+            self.w3.eth.get_transaction_count(self.address, 'latest'),
+            self.w3.eth.get_transaction_count(self.address, 'pending')
+        )
+        for nonce in [nonce for nonce in self.inflight if nonce < latest]:
+            self.confirm(nonce)
+        if self.free and self.free[0] < latest:
+            self.free = [nonce for nonce in self.free if nonce >= latest]
+            heapq.heapify(self.free)
+
+        # Gap: the node forgot transactions we sent (dropped from its mempool) -- broadcast them again
+        dropped = sorted(nonce for nonce in self.inflight if nonce >= pending)
+        if dropped:
+            logger.warning(f"Nonce gap: chain pending {pending}, rebroadcasting {dropped}")
+            self.resyncs += 1
+            for nonce in dropped:
+                try:
+                    await self.w3.eth.send_raw_transaction(self.inflight[nonce]['raw'])
+                except Exception as e:
+                    logger.warning(f"Rebroadcast of nonce {nonce} failed: {e}")
+
+        if pending > self.next_nonce:
+            await self.sync()
+
+    def stuck(self):
+        """In-flight nonces that have waited longer than stuck_after"""
+        now = time.monotonic()
+        return sorted(
+            nonce for nonce, entry in self.inflight.items()
+            if now - entry['sent_at'] > self.stuck_after
+        )
+
+    def bump_fees(self, txn):
+        """Copy of txn with every fee field raised by fee_bump"""
+        bumped = dict(txn)
+        for field in ('gasPrice', 'maxFeePerGas', 'maxPriorityFeePerGas'):
+            if field in bumped:
+                bumped[field] = max(int(bumped[field] * self.fee_bump), bumped[field] + 1)
+        return bumped
+
+    async def replace(self, nonce):
+        """Re-send the transaction at nonce with higher fees; returns the new hash or None"""
+        entry = self.inflight.get(nonce)
+        if not entry or entry['replacements'] >= self.max_replacements:
+            return None
+        txn = self.bump_fees(entry['txn'])
+        try:
+            raw = await self.signer.sign(txn)
+            tx_hash = await self.w3.eth.send_raw_transaction(raw)
+        except Exception as e:
+            logger.warning(f"Replacement for nonce {nonce} failed: {e}")
+            return None
+        entry.update(
+            txn=txn,
+            raw=raw,
+            hash=tx_hash,
+            hashes=entry['hashes'] + [tx_hash],
+            sent_at=time.monotonic(),
+            replacements=entry['replacements'] + 1
+        )
+        self.replacements += 1
+        for callback in self.on_replace:
+            callback(nonce, tx_hash)
+        logger.info(f"⛽ Replaced stuck nonce {nonce} with higher fees: {tx_hash.hex()}")
+        return tx_hash
+
+    async def replace_stuck(self):
+        """Refresh against the chain, then fee-bump whatever is still stuck"""
+        await self.refresh()
+        for nonce in self.stuck():
+            await self.replace(nonce)
+
+    def close(self):
+        """Stop the signer thread"""
+        self.signer.close()
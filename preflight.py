@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Pre-flight simulation of arbitrage transactions
+eth_calls the exact payload we are about to sign against the pending block and only lets it
+through if it wouldn't revert; results are cached per (calldata hash, value, block). request() /
+load() let the call ride in a JSON-RPC batch made at that point; both bots price candidates from
+state already read for the block, so they send it with simulate() as a single extra post per trade
+"""
+
+import logging
+from collections import OrderedDict
+from web3 import Web3
+
+MAX_ENTRIES = 256   # Simulation results kept
+
+logger = logging.getLogger(__name__)
+
+
+def revert_reason(error):
+    """Human-readable reason from a JSON-RPC eth_call error"""
+    message = error.get('message', 'execution reverted') if isinstance(error, dict) else str(error)
+    return message.replace('execution reverted: ', '', 1)
+
+
+class Preflight:
+    def __init__(self, w3, account_address, contract_address, max_entries=MAX_ENTRIES):
+        self.w3 = w3
+        self.account_address = Web3.to_checksum_address(account_address)
+        self.contract_address = Web3.to_checksum_address(contract_address)
+        self.max_entries = max_entries
+        self.results = OrderedDict()   # (calldata hash, value, block) -> (passed, reason)
+        self.hits = 0
+        self.passed = 0
+        self.failed = 0
+
+    def key(self, calldata, value, block_number):
+        """Cache key: the payload, what it sends and the block it was simulated at"""
+        return (Web3.keccak(calldata), value, block_number)
+
+    def cached(self, calldata, value, block_number):
+        """Earlier result for the same payload at the same block, or None"""
+        result = self.results.get(self.key(calldata, value, block_number))
+        if result:
+            self.hits += 1
+        return result
+
+    def request(self, calldata, value, gas):
+        """The eth_call for this payload from our account against the pending block, as a raw JSON-RPC request"""
+        return ('eth_call', [{
+            'from': self.account_address,
+            'to': self.contract_address,
+            'value': hex(value),
+            'gas': hex(gas),
+            'data': '0x' + bytes(calldata).hex()
+        }, 'pending'])
+
+    def load(self, calldata, value, block_number, response):
+        """Record the batch response for a payload; returns (passed, reason)"""
+        if 'error' in response:
+            result = (False, revert_reason(response['error']))
+            self.failed += 1
+        else:
+            result = (True, None)
+            self.passed += 1
+        self.results[self.key(calldata, value, block_number)] = result
+        while len(self.results) > self.max_entries:
+            self.results.popitem(last=False)
+        return result
+
+    async def simulate(self, calldata, value, gas, block_number):
+        """Simulate one payload on its own (no batch to join); returns (passed, reason)"""
+        result = self.cached(calldata, value, block_number)
+        if result:
+            return result
+        (response,) = await self.w3.provider.make_batch_request([self.request(calldata, value, gas)])
+        return self.load(calldata, value, block_number, response)
+
+    def stats(self):
+        """Pass / fail counters"""
+        return {'passed': self.passed, 'failed': self.failed, 'cache_hits': self.hits}
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Multi-process mode for the bidirectional bot
+Scanner processes (the markets split between them) quote, price and rank opportunities on their
+own cores and publish the best one per block, swap data included, over a multiprocessing queue.
+Scanners only know the wallet address (no key, signer or nonces); a single executor process owns
+the key and the nonces, does all signing and sending, drops stale opportunities and acts on the
+most profitable fresh one. The supervisor restarts whichever worker dies, backing off when one
+keeps crashing
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from eth_account import Account
+from arbitrage_bot import (ArbitrageBot, MARKETS, RPC_URL, WS_URL, MARKETS_FILE, MARKET_LOG_DIR, METRICS_PORT,
+                           PRIVATE_KEY, MIN_TRADE_AMOUNT_WEI, MAX_TRADE_AMOUNT_WEI)
+from kyber_client import KYBER_API_BASE
+from log_setup import setup_logging
+from markets import Venue, load_markets, DEFAULT_VENUE, KYBER_RATE, KYBER_BURST
+from web3 import Web3
+
+SCANNERS = 2                # Scanner processes (capped at the number of markets)
+QUEUE_SIZE = 256            # Opportunities buffered between scanners and the executor
+STALE_BLOCKS = 1            # Opportunities priced more than this many blocks behind the executor's head are dropped
+RESTART_DELAY = 1.0         # Initial backoff before restarting a dead worker
+MAX_RESTART_DELAY = 60.0    # Backoff ceiling
+STABLE_AFTER = 60.0         # A worker that ran this long before dying restarts without backoff
+CHECK_INTERVAL = 0.5        # Seconds between supervisor liveness checks
+RECEIVE_TIMEOUT = 1.0       # Executor's blocking queue read, so it can still shut down when scanners are quiet
+WALLET_ADDRESS = os.getenv("WALLET_ADDRESS")   # Scanners' watch-only address (default: derived from PRIVATE_KEY by the supervisor)
+
+logger = logging.getLogger(__name__)
+
+
+class ScannerBot(ArbitrageBot):
+    """ArbitrageBot that publishes its best opportunity instead of executing it
+    Scans every count-th market starting at index; built watch-only from the wallet address, so it
+    holds no private key and has no signer, nonces or tracker
+    """
+
+    def __init__(self, outbox, index, count, address, **options):
+        super().__init__(address=address, **options)
+        self.outbox = outbox
+        self.index = index
+        self.markets = self.markets[index::count]
+        # Every scanner draws on the same aggregator allowance
+        self.kyber_budget.rate = KYBER_RATE / count
+        self.kyber_budget.burst = self.kyber_budget.tokens = max(KYBER_BURST // count, 1)
+
+    async def scan(self, block_number):
+        """Price this scanner's markets and hand the best opportunity to the executor"""
+        opportunity = await self.check_both_arbitrage_directions(block_number)
+        if not opportunity:
+            return
+        # Ship the swap data too (usually already built speculatively) so the executor doesn't wait on Kyber
+        opportunity['build'] = await self.pipelines[opportunity['market'].name].take_build(opportunity['route'])
+        opportunity['scanner'] = self.index
+        try:
+            self.outbox.put_nowait(opportunity)
+        except queue.Full:
+            self.opportunities.inc(1, 'skipped')
+            logger.warning("📭 Executor queue full, dropping opportunity", extra={'block': block_number})
+
+
+class ExecutorBot(ArbitrageBot):
+    """ArbitrageBot that executes opportunities published by scanner processes
+    Keeps fees, balance and stuck-nonce replacement current on every head, like a scan without the quoting
+    """
+
+    def __init__(self, inbox, stale_blocks=STALE_BLOCKS, **options):
+        super().__init__(**options)
+        self.inbox = inbox
+        self.stale_blocks = stale_blocks
+        self.reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inbox')
+
+    async def scan(self, block_number):
+        """Per head: tracker, fees / L1 fee / balance and stuck nonces"""
+        self.tracker.new_block(block_number)
+        await self.read_cycle_state(block_number)
+        await self.nonces.replace_stuck()
+
+    async def receive(self):
+        """Next batch: block until one opportunity arrives, then take whatever else is queued"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                batch = [await loop.run_in_executor(self.reader, self.inbox.get, True, RECEIVE_TIMEOUT)]
+                break
+            except queue.Empty:
+                continue
+        while True:
+            try:
+                batch.append(self.inbox.get_nowait())
+            except queue.Empty:
+                return batch
+
+    async def consume(self):
+        """Execute the most profitable fresh opportunity of each batch"""
+        while True:
+            batch = await self.receive()
+            if self.block_number is None:
+                # No fees loaded yet
+                continue
+            head = max(self.scheduler.latest_block, self.block_number)
+            fresh = [opportunity for opportunity in batch if opportunity['block_number'] >= head - self.stale_blocks]
+            if len(fresh) < len(batch):
+                self.opportunities.inc(len(batch) - len(fresh), 'skipped')
+                logger.info("🗑️ Dropped %d stale opportunities (head %s)", len(batch) - len(fresh), head)
+            if not fresh:
+                continue
+            best = max(fresh, key=lambda opportunity: opportunity['profit_wei'])
+            if best.get('build'):
+                self.pipelines[best['market'].name].provide(best['route'], best['build'])
+            await self.act_on(best)
+
+    async def run(self, metrics_port=METRICS_PORT):
+        consumer = asyncio.create_task(self.consume())
+        try:
+            await self.run_monitoring_loop(metrics_port)
+        finally:
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+            self.reader.shutdown(wait=False)
+
+
+def metrics_port_for(role_index):
+    """Executor keeps METRICS_PORT; scanner i listens on METRICS_PORT + 1 + i (0 stays off)"""
+    return METRICS_PORT + role_index if METRICS_PORT else 0
+
+
+async def run_scanner(outbox, index, count, options):
+    bot = ScannerBot(outbox, index, count, **options)
+    async with bot.chain, bot.kyber:
+        for market in bot.markets:
+            await bot.pricers[market.name].verify([MIN_TRADE_AMOUNT_WEI, MAX_TRADE_AMOUNT_WEI, Web3.to_wei(1000, 'ether')])
+        await bot.run_monitoring_loop(metrics_port_for(1 + index))
+
+
+async def run_executor(inbox, options):
+    bot = ExecutorBot(inbox, **options)
+    async with bot.chain, bot.kyber:
+        await bot.nonces.sync()
+        await bot.run(metrics_port_for(0))
+
+
+def scanner_main(outbox, index, count, address, options):
+    setup_logging()
+    asyncio.run(run_scanner(outbox, index, count, dict(options, address=address)))
+
+
+def executor_main(inbox, options):
+    setup_logging()
+    asyncio.run(run_executor(inbox, options))
+
+
+class Supervisor:
+    """Starts the executor and scanners and restarts any that exit, with per-worker backoff"""
+
+    def __init__(self, address, scanners=SCANNERS, options=None, queue_size=QUEUE_SIZE):
+        self.context = multiprocessing.get_context('spawn')
+        self.queue = self.context.Queue(queue_size)
+        options = options or {}
+        self.workers = {'executor': (executor_main, (self.queue, options))}
+        for index in range(scanners):
+            self.workers[f"scanner-{index}"] = (scanner_main, (self.queue, index, scanners, address, options))
+        self.processes = {}
+        self.started_at = {}
+        self.delays = {name: RESTART_DELAY for name in self.workers}
+        self.restart_at = {}
+        self.restarts = 0
+
+    def spawn(self, name):
+        target, args = self.workers[name]
+        process = self.context.Process(target=target, args=args, name=name, daemon=True)
+        process.start()
+        self.processes[name] = process
+        self.started_at[name] = time.monotonic()
+        logger.info(f"▶️ Started {name} (pid {process.pid})")
+
+    def start(self):
+        for name in self.workers:
+            self.spawn(name)
+
+    def check(self):
+        """Restart dead workers whose backoff has elapsed"""
+        now = time.monotonic()
+        for name, process in self.processes.items():
+            if process.is_alive():
+                continue
+            if name not in self.restart_at:
+                ran = now - self.started_at[name]
+                self.delays[name] = RESTART_DELAY if ran >= STABLE_AFTER else min(self.delays[name] * 2, MAX_RESTART_DELAY)
+                self.restart_at[name] = now + self.delays[name]
+                logger.error(f"💥 {name} exited with code {process.exitcode} after {ran:.0f}s; restarting in {self.delays[name]:.0f}s")
+            elif now >= self.restart_at[name]:
+                del self.restart_at[name]
+                self.restarts += 1
+                self.spawn(name)
+
+    def run(self, interval=CHECK_INTERVAL):
+        self.start()
+        try:
+            while True:
+                time.sleep(interval)
+                self.check()
+        except KeyboardInterrupt:
+            logger.info("🛑 Supervisor stopped by user")
+        finally:
+            self.stop()
+
+    def stop(self):
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=5)
+        logger.info(f"Workers stopped ({self.restarts} restarts)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bidirectional bot as scanner processes + one executor")
+    parser.add_argument('--scanners', type=int, default=SCANNERS)
+    parser.add_argument('--rpc-url', default=RPC_URL)
+    parser.add_argument('--ws-url', default=WS_URL)
+    parser.add_argument('--kyber-url', default=KYBER_API_BASE)
+    parser.add_argument('--markets-file', default=MARKETS_FILE)
+    parser.add_argument('--market-log-dir', default=MARKET_LOG_DIR)
+    args = parser.parse_args()
+
+    setup_logging()
+    options = {
+        'rpc_url': args.rpc_url,
+        'ws_url': args.ws_url,
+        'kyber_url': args.kyber_url,
+        'markets_file': args.markets_file,
+        'market_log_dir': None,
+    }
+    # One scanner per market at most; extra processes would have nothing to scan
+    markets, _ = load_markets(args.markets_file, MARKETS, [Venue(DEFAULT_VENUE, args.kyber_url)])
+    scanners = max(1, min(args.scanners, len(markets)))
+    if args.market_log_dir:
+        logger.warning("Market logging is single-process only; MARKET_LOG_DIR is ignored in multi-process mode")
+    if not WALLET_ADDRESS and not PRIVATE_KEY:
+        raise ValueError("PRIVATE_KEY not found in .env file")
+    # Only the address goes to the scanners; the executor loads the key itself
+    address = WALLET_ADDRESS or Account.from_key(PRIVATE_KEY).address
+    logger.info(f"🧵 {scanners} scanner process(es) for {len(markets)} market(s), 1 executor, wallet {address}")
+    Supervisor(address, scanners, options).run()
+
+
+if __name__ == "__main__":
+    main()
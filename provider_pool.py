@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Latency-aware pool of JSON-RPC endpoints
+A web3 async provider that ranks endpoints by latency / error EWMA, hedges reads (fastest first,
+a backup after that endpoint's p95 latency), broadcasts raw transactions to every endpoint and
+ejects failing endpoints until a probe shows they are healthy again
+"""
+
+import asyncio
+import json
+import random
+import time
+import logging
+from collections import deque
+import aiohttp
+from web3.providers.async_base import AsyncJSONBaseProvider
+
+LATENCY_ALPHA = 0.2         # EWMA weight of the newest latency sample
+ERROR_ALPHA = 0.2           # EWMA weight of the newest success / failure
+LATENCY_WINDOW = 64         # Samples kept for the p95 hedge delay
+HEDGE_MIN_DELAY = 0.05      # Seconds; never hedge sooner than this
+EJECT_ERROR_RATE = 0.5      # Error EWMA above which an endpoint is ejected
+EJECT_SECONDS = 5           # First ejection; doubles on each repeat
+MAX_EJECT_SECONDS = 120     # Cap on the ejection backoff
+REQUEST_TIMEOUT = 10        # Seconds for a single request to one endpoint
+EXPLORE_RATE = 0.05         # Share of reads sent to the runner-up first so its latency stays current
+
+BROADCAST_METHODS = {"eth_sendRawTransaction"}
+CACHEABLE_METHODS = {"eth_chainId"}
+RATE_LIMIT_CODES = {-32005, -32016, 429}
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointError(Exception):
+    """Transport-level failure of one endpoint (not a JSON-RPC error result)"""
+
+
+class ProviderError(Exception):
+    """A whole JSON-RPC batch refused with a single error object instead of per-request responses"""
+
+
+class Endpoint:
+    def __init__(self, url):
+        self.url = url
+        self.latency = None           # EWMA, seconds
+        self.error_rate = 0.0         # EWMA of failures
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.eject_seconds = EJECT_SECONDS
+        self.probing = False
+
+    @property
+    def healthy(self):
+        return self.ejected_until == 0.0
+
+    def score(self):
+        """Expected cost of routing a request here (lower is better); unmeasured endpoints go first"""
+        if self.latency is None:
+            return 0.0
+        return self.latency * (1 + 4 * self.error_rate)
+
+    def p95(self):
+        """95th percentile of recent latencies"""
+        if not self.samples:
+            return HEDGE_MIN_DELAY
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+    def record_success(self, elapsed):
+        self.requests += 1
+        self.samples.append(elapsed)
+        self.latency = elapsed if self.latency is None else self.latency + LATENCY_ALPHA * (elapsed - self.latency)
+        self.error_rate *= 1 - ERROR_ALPHA
+
+    def record_failure(self):
+        self.requests += 1
+        self.failures += 1
+        self.error_rate += ERROR_ALPHA * (1 - self.error_rate)
+
+
+class ProviderPool(AsyncJSONBaseProvider):
+    def __init__(self, urls, request_timeout=REQUEST_TIMEOUT, hedge_min_delay=HEDGE_MIN_DELAY,
+                 eject_error_rate=EJECT_ERROR_RATE):
+        super().__init__()
+        if not urls:
+            raise ValueError("ProviderPool needs at least one endpoint")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.request_timeout = aiohttp.ClientTimeout(total=request_timeout)
+        self.hedge_min_delay = hedge_min_delay
+        self.eject_error_rate = eject_error_rate
+        self.session = None
+        self.cache = {}
+        self.background = set()   # Probes and the slower legs of broadcasts
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def __str__(self):
+        return f"RPC pool of {len(self.endpoints)} endpoints"
+
+    async def cache_async_session(self, session):
+        """Use a shared pooled aiohttp session for every endpoint"""
+        self.session = session
+        return session
+
+    def spawn(self, coro):
+        """Run a task nobody waits for, keeping a reference and swallowing its outcome"""
+        task = asyncio.ensure_future(coro)
+        self.background.add(task)
+        task.add_done_callback(self._reap)
+        return task
+
+    def _reap(self, task):
+        self.background.discard(task)
+        if not task.cancelled():
+            task.exception()
+
+    async def disconnect(self):
+        for task in list(self.background):
+            task.cancel()
+        await asyncio.gather(*self.background, return_exceptions=True)
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    def ranked(self):
+        """Healthy endpoints, fastest first; every endpoint when none are healthy"""
+        now = time.monotonic()
+        for endpoint in self.endpoints:
+            if not endpoint.healthy and now >= endpoint.ejected_until and not endpoint.probing:
+                endpoint.probing = True
+                self.spawn(self.probe(endpoint))
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.healthy]
+        ranked = sorted(healthy or self.endpoints, key=Endpoint.score)
+        if len(ranked) > 1 and random.random() < EXPLORE_RATE:
+            ranked[0], ranked[1] = ranked[1], ranked[0]
+        return ranked
+
+    def eject(self, endpoint):
+        """Take an endpoint out of rotation; ejection time doubles on every repeat"""
+        endpoint.ejected_until = time.monotonic() + endpoint.eject_seconds
+        logger.warning(f"🚫 RPC endpoint ejected for {endpoint.eject_seconds}s: {endpoint.url} (error rate {endpoint.error_rate:.2f})")
+        endpoint.eject_seconds = min(endpoint.eject_seconds * 2, MAX_EJECT_SECONDS)
+
+    async def probe(self, endpoint):
+        """Readmit an ejected endpoint once a cheap request succeeds"""
+        try:
+            await self.post(endpoint, self.encode_rpc_request("eth_blockNumber", []))
+            endpoint.ejected_until = 0.0
+            endpoint.eject_seconds = EJECT_SECONDS
+            endpoint.error_rate = self.eject_error_rate / 2
+            logger.info(f"✅ RPC endpoint readmitted: {endpoint.url}")
+        except EndpointError:
+            self.eject(endpoint)
+        finally:
+            endpoint.probing = False
+
+    async def post(self, endpoint, request_data):
+        """POST to one endpoint, updating its latency / error statistics"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+        started = time.perf_counter()
+        try:
+            async with self.session.post(
+                endpoint.url,
+                data=request_data,
+                headers={"Content-Type": "application/json"},
+                timeout=self.request_timeout
+            ) as response:
+                if response.status != 200:
+                    raise EndpointError(f"HTTP {response.status}")
+                body = await response.read()
+            decoded = json.loads(body)
+            if isinstance(decoded, dict) and isinstance(decoded.get('error'), dict) and decoded['error'].get('code') in RATE_LIMIT_CODES:
+                raise EndpointError(f"rate limited: {decoded['error'].get('message')}")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, EndpointError) as e:
+            endpoint.record_failure()
+            if endpoint.healthy and endpoint.error_rate > self.eject_error_rate:
+                self.eject(endpoint)
+            raise EndpointError(f"{endpoint.url}: {e}") from e
+        endpoint.record_success(time.perf_counter() - started)
+        return decoded
+
+    async def hedged(self, request_data):
+        """Send to the fastest endpoint; if it hasn't answered by its p95, race the next one"""
+        queue = self.ranked()
+        pending = {}
+        errors = []
+
+        def launch(as_hedge=False):
+            endpoint = queue.pop(0)
+            pending[asyncio.ensure_future(self.post(endpoint, request_data))] = as_hedge
+            return endpoint
+
+        latest = launch()
+        while pending:
+            delay = max(latest.p95(), self.hedge_min_delay) if queue else None
+            done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                # Slower than it usually is: fire a backup alongside it
+                self.hedges += 1
+                latest = launch(as_hedge=True)
+                continue
+            for task in done:
+                was_hedge = pending.pop(task)
+                if task.exception():
+                    errors.append(task.exception())
+                    continue
+                for other in pending:
+                    other.cancel()
+                if was_hedge:
+                    self.hedge_wins += 1
+                return task.result()
+            if not pending and queue:
+                # Failed outright: go to the next endpoint without waiting
+                latest = launch()
+        raise EndpointError(f"All RPC endpoints failed: {errors}")
+
+    async def broadcast(self, request_data):
+        """Send to every endpoint in parallel; first success wins, the rest propagate the transaction"""
+        tasks = [self.spawn(self.post(endpoint, request_data)) for endpoint in self.ranked()]
+        first_error = None
+        for future in asyncio.as_completed(tasks):
+            try:
+                response = await future
+            except EndpointError as e:
+                first_error = first_error or e
+                continue
+            if 'error' not in response:
+                return response
+            # "already known" from a slower endpoint is expected; keep the first real answer
+            first_error = first_error or response
+        if isinstance(first_error, dict):
+            return first_error
+        raise first_error
+
+    async def make_request(self, method, params):
+        if method in CACHEABLE_METHODS and method in self.cache:
+            return dict(self.cache[method])
+        request_data = self.encode_rpc_request(method, params)
+        if method in BROADCAST_METHODS:
+            return await self.broadcast(request_data)
+        response = await self.hedged(request_data)
+        if method in CACHEABLE_METHODS and 'result' in response:
+            self.cache[method] = response
+        return response
+
+    async def make_batch_request(self, batch_requests):
+        request_data = self.encode_batch_rpc_request(batch_requests)
+        if any(method in BROADCAST_METHODS for method, _ in batch_requests):
+            response = await self.broadcast(request_data)
+        else:
+            response = await self.hedged(request_data)
+        if not isinstance(response, list):
+            # Callers index batch responses positionally; a lone error object would crash them further down
+            raise ProviderError(f"Batch of {len(batch_requests)} requests failed: {response.get('error', response)}")
+        return sorted(response, key=lambda item: item.get('id', 0))
+
+    def stats(self):
+        """Per-endpoint latency / health"""
+        return {
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'endpoints': [
+                {
+                    'url': endpoint.url,
+                    'healthy': endpoint.healthy,
+                    'latency_ms': round((endpoint.latency or 0) * 1000, 1),
+                    'p95_ms': round(endpoint.p95() * 1000, 1),
+                    'error_rate': round(endpoint.error_rate, 3),
+                    'requests': endpoint.requests,
+                    'failures': endpoint.failures
+                }
+                for endpoint in self.endpoints
+            ]
+        }
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+In-process quote bus: several strategies off one market-data feed
+Once per block a single task reads a snapshot (every subscribed token's Larry DEX state, wallet
+balance, fee history and whatever views each strategy adds) in one JSON-RPC batch and fetches
+the Kyber quotes the strategies will need, each distinct one once. Every strategy (its own
+contract, sizes and thresholds) then decides against that same snapshot, so adding one costs no
+extra RPC round trips and any quote it shares with another costs no extra aggregator call
+"""
+
+import argparse
+import asyncio
+import os
+import logging
+from dataclasses import dataclass
+from dotenv import load_dotenv
+from web3 import Web3
+from arbitrage_bot import ArbitrageBot
+from run_v3_bot import V3ArbitrageBot
+from async_chain import ChainClient
+from block_scheduler import BlockScheduler
+from fee_engine import FeeEngine
+from kyber_client import KyberClient, KYBER_API_BASE
+from larry_pricing import LarryPricer
+from log_setup import setup_logging
+from markets import RateBudget
+from metrics import Metrics
+from multicall import Multicall
+from nonce_manager import NonceManager
+from quote_cache import QuoteCache
+from tx_tracker import TxTracker
+
+load_dotenv()
+
+RPC_URL = os.getenv("BASE_RPC_URL", "https://mainnet.base.org")
+WS_URL = os.getenv("BASE_WS_URL")
+PRIVATE_KEY = os.getenv("PRIVATE_KEY")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+STRATEGIES = ['v2', 'v3']   # Strategies run by default: arbitrage_bot.py's and run_v3_bot.py's
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Everything the strategies decide on for one block"""
+    block_number: int
+    balance: int
+    states: dict        # token (lowercase) -> LarryState
+    fee_history: dict   # eth_feeHistory result (None if the read failed)
+    values: dict        # strategy name -> {key: value} read by its state_calls()
+    responses: dict     # strategy name -> JSON-RPC responses to its requests()
+
+    def state(self, token):
+        return self.states[token.lower()]
+
+
+class QuoteBus:
+    """Reads one Snapshot per block and hands it to every subscribed strategy
+    A strategy has a unique name, the tokens whose Larry DEX state it needs, a Metrics of its own,
+    and the methods state_calls(block_number), requests(block_number), quote_requests(snapshot),
+    async on_snapshot(snapshot) and async close(), and calls reserve(txn) before signing a trade.
+    ArbitrageBot and V3ArbitrageBot built with bus=... do all of it and share this bus's chain
+    client, wallet, nonces and Kyber client
+    """
+
+    def __init__(self, rpc_url=RPC_URL, ws_url=WS_URL, kyber_url=KYBER_API_BASE, private_key=PRIVATE_KEY):
+        if not private_key:
+            raise ValueError("PRIVATE_KEY not found in .env file")
+        self.chain = ChainClient(rpc_url)
+        self.w3 = self.chain.w3
+        self.account = self.w3.eth.account.from_key(private_key)
+        self.multicall = Multicall(self.w3)
+        self.scheduler = BlockScheduler(self.w3, ws_url)
+        self.metrics = Metrics()
+        self.kyber_budget = RateBudget()
+        self.kyber = KyberClient(kyber_url, cache=QuoteCache(), budget=self.kyber_budget)
+        self.nonces = NonceManager(self.w3, self.account, metrics=self.metrics)
+        self.tracker = TxTracker(self.w3, self.nonces)
+        self.fees = FeeEngine(self.w3)   # Only builds the fee-history request; each strategy keeps its own gas samples
+        self.pricers = {}                # token (lowercase) -> LarryPricer
+        self.strategies = []
+        self.available = 0               # This block's balance not yet claimed by a strategy's trade
+        self.snapshots = 0
+        self.quotes_requested = 0
+        self.quotes_fetched = 0
+        self.reservations_refused = 0
+
+    def subscribe(self, strategy):
+        """Add a strategy; its metrics are served on the bus's /metrics endpoint"""
+        if any(other.name == strategy.name for other in self.strategies):
+            raise ValueError(f"Strategy {strategy.name} is already subscribed")
+        self.strategies.append(strategy)
+        for token in strategy.tokens:
+            if token.lower() not in self.pricers:
+                self.pricers[token.lower()] = LarryPricer(self.w3, token, self.multicall)
+        self.metrics.metrics.update(strategy.metrics.metrics)
+        logger.info(f"📡 Strategy {strategy.name} subscribed ({len(self.strategies)} on the bus)")
+
+    async def read(self, block_number=None):
+        """Snapshot for a block in one JSON-RPC batch: a multicall of every token's state, the balance
+        and each strategy's views, plus eth_feeHistory and each strategy's raw requests
+        """
+        calls = {}
+        for token, pricer in self.pricers.items():
+            calls.update({(token, key): call for key, call in pricer.state_calls().items()})
+        for strategy in self.strategies:
+            calls.update({(strategy.name, key): call for key, call in strategy.state_calls(block_number).items()})
+        calls['balance'] = self.multicall.eth_balance(self.account.address)
+        calls['block_number'] = self.multicall.block_number()
+        requests = [
+            self.multicall.aggregate_request(list(calls.values()), block_number or 'latest'),
+            self.fees.history_request(block_number)
+        ]
+        # Identical raw requests (two strategies on one contract) go out once
+        positions = {}
+        owners = {strategy.name: [] for strategy in self.strategies}
+        for strategy in self.strategies:
+            for method, params in strategy.requests(block_number):
+                key = (method, repr(params))
+                if key not in positions:
+                    positions[key] = len(requests)
+                    requests.append((method, params))
+                owners[strategy.name].append(positions[key])
+
+        with self.metrics.time('state_read'):
+            responses = await self.w3.provider.make_batch_request(requests)
+        self.multicall.calls_made += 1
+        if 'error' in responses[0]:
+            raise ValueError(f"Multicall failed: {responses[0]['error']}")
+        values = dict(zip(calls, self.multicall.decode_aggregate(list(calls.values()), responses[0]['result'], block_number)))
+
+        grouped = {name: {} for name in list(self.pricers) + [strategy.name for strategy in self.strategies]}
+        for name, value in values.items():
+            if isinstance(name, tuple):
+                grouped[name[0]][name[1]] = value
+        self.snapshots += 1
+        return Snapshot(
+            block_number=values['block_number'],
+            balance=values['balance'],
+            states={token: pricer.load(values['block_number'], grouped[token]) for token, pricer in self.pricers.items()},
+            fee_history=responses[1].get('result'),
+            values={strategy.name: grouped[strategy.name] for strategy in self.strategies},
+            responses={name: [responses[index] for index in indexes] for name, indexes in owners.items()}
+        )
+
+    async def prefetch(self, snapshot):
+        """Fetch every quote the strategies asked for, each distinct (pair, amount) once, into the
+        shared per-block quote cache their own route lookups go through
+        """
+        wanted = {}
+        for strategy in self.strategies:
+            for token_in, token_out, amount in strategy.quote_requests(snapshot):
+                self.quotes_requested += 1
+                key = self.kyber.cache.key(token_in, token_out, amount, snapshot.block_number)
+                wanted.setdefault(key, (token_in, token_out, amount))
+        self.quotes_fetched += len(wanted)
+        with self.metrics.time('prefetch'):
+            await asyncio.gather(
+                *(self.kyber.get_route(token_in, token_out, amount, snapshot.block_number)
+                  for token_in, token_out, amount in wanted.values()),
+                return_exceptions=True
+            )
+
+    def reserve(self, txn, l1_fee=0):
+        """Claim what txn can spend (value plus its worst-case L2 and L1 gas) from this block's balance
+        Strategies decide concurrently on the same balance, so each calls this right before signing;
+        False means others already committed the ETH and the trade must not take a nonce
+        """
+        amount = txn['value'] + txn['gas'] * txn.get('maxFeePerGas', txn.get('gasPrice', 0)) + l1_fee
+        if amount > self.available:
+            self.reservations_refused += 1
+            return False
+        self.available -= amount
+        return True
+
+    async def scan(self, block_number):
+        """One block: snapshot, quotes (stuck nonces handled meanwhile), then every strategy decides concurrently"""
+        self.tracker.new_block(block_number)
+        snapshot = await self.read(block_number)
+        self.available = snapshot.balance
+        await asyncio.gather(self.prefetch(snapshot), self.nonces.replace_stuck())
+        results = await asyncio.gather(*(strategy.on_snapshot(snapshot) for strategy in self.strategies), return_exceptions=True)
+        for strategy, result in zip(self.strategies, results):
+            if isinstance(result, Exception):
+                logger.error(f"Strategy {strategy.name} failed on block {snapshot.block_number}: {result}")
+
+    async def scan_block(self, block_number):
+        with self.metrics.time('cycle'):
+            await self.scan(block_number)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Quote bus: %s", self.stats())
+            logger.debug("Quote cache: %s", self.kyber.cache.stats())
+            logger.debug("Transactions: %s", self.tracker.stats())
+
+    def stats(self):
+        return {
+            'strategies': len(self.strategies),
+            'snapshots': self.snapshots,
+            'quotes_requested': self.quotes_requested,
+            'quotes_fetched': self.quotes_fetched,
+            'reservations_refused': self.reservations_refused,
+        }
+
+    async def verify(self, amounts):
+        """Check local bonding-curve math against every subscribed token's contract"""
+        for pricer in self.pricers.values():
+            await pricer.verify(amounts)
+
+    async def run(self, metrics_port=METRICS_PORT):
+        """One snapshot per new block until stopped"""
+        logger.info(f"🚀 Starting quote bus with {', '.join(strategy.name for strategy in self.strategies)}...")
+        if metrics_port:
+            await self.metrics.start(port=metrics_port)
+
+        try:
+            await self.scheduler.run(self.scan_block)
+        except KeyboardInterrupt:
+            logger.info("🛑 Bot stopped by user")
+        finally:
+            await self.tracker.stop()
+            await self.metrics.stop()
+            self.nonces.close()
+            for strategy in self.strategies:
+                await strategy.close()
+
+
+def build_strategy(name, bus, markets_file=None):
+    """One of the built-in strategies, sharing the bus"""
+    if name == 'v2':
+        return ArbitrageBot(markets_file=markets_file, market_log_dir=None, bus=bus, name=name)
+    if name == 'v3':
+        return V3ArbitrageBot(bus=bus, name=name)
+    raise ValueError(f"Unknown strategy {name}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run several strategies off one per-block market-data feed")
+    parser.add_argument('--strategies', nargs='+', choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument('--rpc-url', default=RPC_URL)
+    parser.add_argument('--ws-url', default=WS_URL)
+    parser.add_argument('--kyber-url', default=KYBER_API_BASE)
+    parser.add_argument('--markets-file', default=os.getenv("MARKETS_FILE"))
+    args = parser.parse_args()
+
+    bus = QuoteBus(args.rpc_url, args.ws_url, args.kyber_url)
+    for name in dict.fromkeys(args.strategies):
+        bus.subscribe(build_strategy(name, bus, args.markets_file))
+
+    async with bus.chain, bus.kyber:
+        balance = await bus.w3.eth.get_balance(bus.account.address)
+        logger.info(f"💰 Account balance: {Web3.from_wei(balance, 'ether')} ETH")
+        await bus.nonces.sync()
+        # Make sure local bonding-curve math agrees with the deployed DEXes
+        await bus.verify([Web3.to_wei(amount, 'ether') for amount in ("0.001", "0.05", "1000")])
+        await bus.run()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+TTL + block-scoped LRU cache for KyberSwap route quotes
+Identical in-flight requests are coalesced into a single API call
+"""
+
+import asyncio
+import time
+import logging
+from collections import OrderedDict
+
+QUOTE_TTL = 4.0         # Seconds a quote stays valid (two Base blocks)
+MAX_ENTRIES = 512       # LRU capacity
+BUCKET_WEI = 1          # Amount granularity of the cache key (1 = exact amounts)
+
+logger = logging.getLogger(__name__)
+
+
+class QuoteCache:
+    def __init__(self, ttl=QUOTE_TTL, max_entries=MAX_ENTRIES, bucket_wei=BUCKET_WEI):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.bucket_wei = bucket_wei
+        self.entries = OrderedDict()  # key -> (expires_at, quote)
+        self.inflight = {}            # key -> task fetching that quote
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def key(self, token_in, token_out, amount_in, block_number=None):
+        """Cache key: token pair, amount bucket and the block the quote is for"""
+        return (token_in.lower(), token_out.lower(), int(amount_in) // self.bucket_wei, block_number)
+
+    async def get_or_fetch(self, key, fetch):
+        """Return a fresh cached quote, join an identical in-flight request, or run fetch() once"""
+        entry = self.entries.get(key)
+        if entry:
+            if entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self.entries[key]
+
+        task = self.inflight.get(key)
+        if task:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self._store(key, done))
+        # Shield so one caller hitting its deadline doesn't cancel the fetch for everyone else
+        return await asyncio.shield(task)
+
+    def _store(self, key, task):
+        """Record a finished fetch; failures and empty quotes are not cached"""
+        self.inflight.pop(key, None)
+        if task.cancelled() or task.exception() or task.result() is None:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, task.result())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Hit / miss counters"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Local stand-in JSON-RPC endpoints for exercising the provider pool
+Each stand-in answers a handful of methods with configurable latency, jitter, latency spikes and
+failure rate; run this file to put a pool of three (spiky, jittery, flaky) through reads and broadcasts
+"""
+
+import asyncio
+import random
+import time
+import logging
+from aiohttp import web
+from web3 import Web3
+
+BASE_CHAIN_ID = 8453
+BLOCK_TIME = 2.0    # Seconds per stand-in block
+
+logger = logging.getLogger(__name__)
+
+
+class StandinNode:
+    def __init__(self, latency=0.01, jitter=0.0, spike_rate=0.0, spike_latency=0.5,
+                 failure_rate=0.0, rate_limit_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.spike_rate = spike_rate
+        self.spike_latency = spike_latency
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.random = random.Random(seed)
+        self.started = time.monotonic()
+        self.requests = 0
+        self.transactions = []
+        self.runner = None
+        self.url = None
+
+    def block_number(self):
+        return 1000 + int((time.monotonic() - self.started) / BLOCK_TIME)
+
+    def answer(self, request):
+        """Result (or error) for one JSON-RPC request"""
+        method = request.get('method')
+        params = request.get('params') or []
+        response = {'jsonrpc': '2.0', 'id': request.get('id')}
+        if method == 'eth_chainId':
+            response['result'] = hex(BASE_CHAIN_ID)
+        elif method == 'eth_blockNumber':
+            response['result'] = hex(self.block_number())
+        elif method == 'eth_gasPrice':
+            response['result'] = hex(10**7)
+        elif method == 'eth_getBalance':
+            response['result'] = hex(10**18)
+        elif method == 'eth_sendRawTransaction':
+            raw = params[0]
+            if raw in self.transactions:
+                response['error'] = {'code': -32000, 'message': 'already known'}
+            else:
+                self.transactions.append(raw)
+                response['result'] = Web3.to_hex(Web3.keccak(hexstr=raw))
+        else:
+            response['error'] = {'code': -32601, 'message': f'the method {method} does not exist/is not available'}
+        return response
+
+    async def handle(self, request):
+        self.requests += 1
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if self.random.random() < self.spike_rate:
+            delay = self.spike_latency
+        await asyncio.sleep(max(delay, 0))
+        if self.random.random() < self.failure_rate:
+            return web.Response(status=503, text='upstream unavailable')
+        body = await request.json()
+        if self.random.random() < self.rate_limit_rate:
+            return web.json_response({'jsonrpc': '2.0', 'id': None, 'error': {'code': -32005, 'message': 'rate limit exceeded'}})
+        if isinstance(body, list):
+            return web.json_response([self.answer(item) for item in body])
+        return web.json_response(self.answer(body))
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Serve on host:port (0 = any free port); returns the endpoint URL"""
+        app = web.Application()
+        app.router.add_post('/', self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}/"
+        return self.url
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+async def main():
+    """Drive a three-endpoint pool and print what it learned"""
+    from async_chain import ChainClient
+
+    nodes = [
+        StandinNode(latency=0.01, spike_rate=0.1, seed=1),          # Fast, with occasional 500ms stalls
+        StandinNode(latency=0.03, jitter=0.01, seed=2),             # Slower but steady
+        StandinNode(latency=0.005, failure_rate=0.6, seed=3),       # Fastest but flaky
+    ]
+    urls = [await node.start() for node in nodes]
+
+    async with ChainClient(','.join(urls)) as chain:
+        started = time.perf_counter()
+        for _ in range(200):
+            await chain.w3.eth.block_number
+        elapsed = time.perf_counter() - started
+        logger.info(f"200 reads in {elapsed:.2f}s ({elapsed / 200 * 1000:.1f}ms avg)")
+
+        account = chain.w3.eth.account.create()
+        signed = account.sign_transaction({
+            'chainId': BASE_CHAIN_ID, 'nonce': 0, 'gas': 21000, 'gasPrice': 10**7,
+            'to': account.address, 'value': 0
+        })
+        tx_hash = await chain.w3.eth.send_raw_transaction(signed.raw_transaction)
+        await asyncio.sleep(0.1)  # Let the slower endpoints receive it too
+        logger.info(f"Broadcast {tx_hash.hex()}: reached {sum(signed.raw_transaction.to_0x_hex() in node.transactions for node in nodes)}/{len(nodes)} endpoints")
+
+        for endpoint in chain.provider.stats()['endpoints']:
+            logger.info(f"{endpoint}")
+        logger.info(f"Hedges fired: {chain.provider.hedges}, won by a backup: {chain.provider.hedge_wins}")
+
+    for node in nodes:
+        await node.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Hedging abandons slow responses mid-flight; the stand-ins don't need to complain about it
+    logging.getLogger('aiohttp.server').setLevel(logging.CRITICAL)
+    asyncio.run(main())
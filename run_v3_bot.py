@@ -5,23 +5,44 @@ Contract: 0x7Bee2beF4adC5504CD747106924304d26CcFBd94
 """
 
 import asyncio
-import aiohttp
-import time
 import os
+import time
 from web3 import Web3
 from decimal import Decimal
 import logging
+import numpy as np
 from dotenv import load_dotenv
+from kyber_client import KyberClient, KYBER_API_BASE
+from quote_cache import QuoteCache
+from async_chain import ChainClient
+from block_scheduler import BlockScheduler
+from multicall import Multicall
+from larry_pricing import LarryPricer
+from settlement_model import SettlementModel
+from execution_pipeline import ExecutionPipeline
+from nonce_manager import NonceManager
+from tx_encoder import CallEncoder
+from tx_tracker import TxTracker
+from fee_engine import FeeEngine
+from preflight import Preflight
+from metrics import Metrics, QUOTE_AGE_BUCKETS
+from log_setup import setup_logging
 
 # Load environment variables
 load_dotenv()
 
 # Configuration
 RPC_URL = os.getenv("BASE_RPC_URL", "https://mainnet.base.org")
+WS_URL = os.getenv("BASE_WS_URL")  # Optional: newHeads subscription, otherwise eth_blockNumber polling
 CONTRACT_ADDRESS = "0x7Bee2beF4adC5504CD747106924304d26CcFBd94"  # V3 Contract
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
 TRADE_AMOUNT_ETH = "0.002"
-TRADE_AMOUNT_WEI = Web3.to_wei(TRADE_AMOUNT_ETH, 'ether')
+TRADE_SIZES_ETH = ["0.001", TRADE_AMOUNT_ETH, "0.005"]  # Candidate principals, all priced every block
+TRADE_SIZES_WEI = [Web3.to_wei(size, 'ether') for size in TRADE_SIZES_ETH]
+GAS_RESERVE_ETH = "0.0005"  # Kept back from the balance for gas
+GAS_RESERVE_WEI = Web3.to_wei(GAS_RESERVE_ETH, 'ether')
+MAX_PENDING_TRADES = 3  # Trades allowed in flight before new opportunities are skipped
+METRICS_PORT = int(os.getenv("V3_METRICS_PORT", "9118"))  # Local Prometheus /metrics endpoint (0 = off); arbitrage_bot.py has 9108
 
 # Token addresses
 ETH_ADDRESS = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
@@ -55,102 +76,220 @@ CONTRACT_ABI = [
     }
 ]
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class V3ArbitrageBot:
-    def __init__(self):
-        if not PRIVATE_KEY:
-            raise ValueError("PRIVATE_KEY not found in .env file")
-        
-        self.w3 = Web3(Web3.HTTPProvider(RPC_URL))
-        self.account = self.w3.eth.account.from_key(PRIVATE_KEY)
+    def __init__(self, rpc_url=RPC_URL, ws_url=WS_URL, kyber_url=KYBER_API_BASE, bus=None, name='v3',
+                 contract_address=CONTRACT_ADDRESS, trade_sizes_wei=TRADE_SIZES_WEI, min_net_wei=0):
+        self.name = name
+        self.bus = bus
+        self.contract_address = Web3.to_checksum_address(contract_address)
+        self.trade_sizes_wei = sorted(trade_sizes_wei)
+        self.min_net_wei = min_net_wei  # Caller's net gain a trade must beat
+        if bus:
+            # Chain access, wallet, nonces and Kyber quotes are shared with the other strategies on the quote bus
+            self.chain, self.w3, self.account = bus.chain, bus.w3, bus.account
+            self.scheduler, self.multicall, self.kyber = bus.scheduler, bus.multicall, bus.kyber
+            self.metrics = Metrics(prefix=f"arb_{name}")
+        else:
+            if not PRIVATE_KEY:
+                raise ValueError("PRIVATE_KEY not found in .env file")
+            self.chain = ChainClient(rpc_url)
+            self.w3 = self.chain.w3
+            self.account = self.w3.eth.account.from_key(PRIVATE_KEY)
+            self.kyber = KyberClient(kyber_url, cache=QuoteCache())
+            self.scheduler = BlockScheduler(self.w3, ws_url)
+            self.multicall = Multicall(self.w3)
+            self.metrics = Metrics()
         self.contract = self.w3.eth.contract(
-            address=Web3.to_checksum_address(CONTRACT_ADDRESS),
+            address=self.contract_address,
             abi=CONTRACT_ABI
         )
+        self.opportunities = self.metrics.counter('opportunities_total', "Opportunities by outcome", ['outcome'])
+        self.profit = self.metrics.counter('profit_wei_total', "Profit reported by PrincipalProtectedArbitrage events (wei)")
+        self.quote_age = self.metrics.histogram('quote_age_seconds', "Age of the Kyber quote when its trade is sent", QUOTE_AGE_BUCKETS)
+        self.nonces = bus.nonces if bus else NonceManager(self.w3, self.account, metrics=self.metrics)
+        self.encoder = CallEncoder(CONTRACT_ABI[0])  # Calldata without eth_abi / web3 contract machinery
+        self.tracker = bus.tracker if bus else TxTracker(self.w3, self.nonces)
+        self.fees = FeeEngine(self.w3)
+        self.pipeline = ExecutionPipeline(self.w3, self.build_kyberswap_swap, self.contract_address, self.fees)
+        self.preflight = Preflight(self.w3, self.account.address, self.contract_address)
+        self.pricer = LarryPricer(self.w3, LARRY_ADDRESS, self.multicall)
+        self.settlement = SettlementModel(self.w3, self.contract_address, self.account.address)
+        self.tokens = [LARRY_ADDRESS]
+        self.balance = None
+        self.block_number = None
+
+    def state_calls(self, block_number):
+        """Views of this strategy's own for the cycle's multicall: its L1 fee and, when due, the settlement parameters"""
+        calls = {'l1_fee': self.fees.l1_fee_call()}
+        if self.settlement.needs_refresh(block_number):
+            calls.update({('settlement', key): call for key, call in self.settlement.parameter_calls().items()})
+        return calls
+
+    def requests(self, block_number):
+        """Raw JSON-RPC requests for the cycle's batch: GasReimbursementUpdated logs since the last check"""
+        logs = None if self.settlement.needs_refresh(block_number) else self.settlement.logs_request(block_number)
+        return [logs] if logs else []
+
+    def load_state(self, block_number, values, responses):
+        """Take what state_calls() and requests() read for a block"""
+        self.fees.load_l1_fee(block_number, values['l1_fee'])
+        settlement = {key[1]: value for key, value in values.items() if isinstance(key, tuple)}
+        if settlement:
+            self.settlement.load(block_number, settlement)
+        for response in responses:
+            self.settlement.load_logs(block_number, response)
+
+    async def read_cycle_state(self, block_number=None):
+        """Read Larry DEX state, wallet balance, L1 fee and (when due) the contract's settlement
+        parameters in one multicall pinned to one block; fee history and GasReimbursementUpdated
+        logs go in the same JSON-RPC batch. Returns the block number read
+        """
+        calls = {('larry', key): call for key, call in self.pricer.state_calls().items()}
+        calls.update({('own', key): call for key, call in self.state_calls(block_number).items()})
+        calls['balance'] = self.multicall.eth_balance(self.account.address)
+        calls['block_number'] = self.multicall.block_number()
+        requests = [self.multicall.aggregate_request(list(calls.values()), block_number or 'latest')]
+        fetch_fees = self.fees.needs_refresh(block_number)
+        if fetch_fees:
+            requests.append(self.fees.history_request(block_number))
+        own_requests = self.requests(block_number)
+        requests += own_requests
         
-        # Get contract info
-        self.gas_reimbursement = self.contract.functions.gasReimbursement().call()
-        self.profit_recipient = self.contract.functions.profitRecipient().call()
+        with self.metrics.time('state_read'):
+            responses = await self.w3.provider.make_batch_request(requests)
+        self.multicall.calls_made += 1
+        if 'error' in responses[0]:
+            raise ValueError(f"Multicall failed: {responses[0]['error']}")
+        values = dict(zip(calls, self.multicall.decode_aggregate(list(calls.values()), responses[0]['result'], block_number)))
+        
+        self.balance = values['balance']
+        self.block_number = values['block_number']
+        if fetch_fees and 'result' in responses[1]:
+            self.fees.load_history(block_number, responses[1]['result'])
+        grouped = {'larry': {}, 'own': {}}
+        for name, value in values.items():
+            if isinstance(name, tuple):
+                grouped[name[0]][name[1]] = value
+        self.pricer.load(values['block_number'], grouped['larry'])
+        self.load_state(values['block_number'], grouped['own'], responses[len(responses) - len(own_requests):])
+        return values['block_number']
+
+    def load_snapshot(self, snapshot):
+        """Take a quote bus snapshot in place of read_cycle_state()"""
+        self.balance = snapshot.balance
+        self.block_number = snapshot.block_number
+        self.pricer.state = snapshot.state(LARRY_ADDRESS)
+        if snapshot.fee_history:
+            self.fees.load_history(snapshot.block_number, snapshot.fee_history)
+        self.load_state(snapshot.block_number, snapshot.values[self.name], snapshot.responses[self.name])
+
+    async def load_contract_info(self):
+        """Read gas reimbursement and profit recipient from the V3 contract"""
+        await self.read_cycle_state()
         
         logger.info(f"🤖 V3 Bot initialized")
-        logger.info(f"📄 Contract: {CONTRACT_ADDRESS}")
+        logger.info(f"📄 Contract: {self.contract_address}")
         logger.info(f"👤 Account: {self.account.address}")
-        logger.info(f"💰 Trade amount: {TRADE_AMOUNT_ETH} ETH")
-        logger.info(f"⛽ Gas reimbursement: {Web3.from_wei(self.gas_reimbursement, 'ether')} ETH")
-        logger.info(f"📬 Profit recipient: {self.profit_recipient}")
+        logger.info(f"💰 Trade sizes: {', '.join(str(Web3.from_wei(size, 'ether')) for size in self.trade_sizes_wei)} ETH")
+        logger.info(f"⛽ Gas reimbursement: {Web3.from_wei(self.settlement.gas_reimbursement, 'ether')} ETH")
+        logger.info(f"📬 Profit recipient: {self.settlement.profit_recipient}")
 
-    async def get_kyberswap_route(self, session, token_in, token_out, amount_in):
-        """Get route from KyberSwap API"""
-        try:
-            url = "https://aggregator-api.kyberswap.com/base/api/v1/routes"
-            params = {
-                "tokenIn": token_in,
-                "tokenOut": token_out,
-                "amountIn": str(amount_in)
-            }
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('data')
-                else:
-                    logger.error(f"KyberSwap route error: {response.status}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error getting KyberSwap route: {e}")
-            return None
+    async def get_kyberswap_route(self, token_in, token_out, amount_in):
+        """Get route from KyberSwap API (cached per block)"""
+        with self.metrics.time('route_fetch'):
+            return await self.kyber.get_route(token_in, token_out, amount_in, self.block_number)
 
-    async def build_kyberswap_swap(self, session, route_summary):
+    async def build_kyberswap_swap(self, quote):
         """Build swap data from KyberSwap API"""
-        try:
-            url = "https://aggregator-api.kyberswap.com/base/api/v1/route/build"
-            deadline = int(time.time()) + 3600
-            
-            payload = {
-                "routeSummary": route_summary,
-                "sender": CONTRACT_ADDRESS,
-                "recipient": CONTRACT_ADDRESS,
-                "slippageTolerance": 300,  # 3%
-                "deadline": deadline
-            }
-            
-            async with session.post(url, json=payload) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('data')
-                else:
-                    logger.error(f"KyberSwap build error: {response.status}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error building KyberSwap swap: {e}")
-            return None
+        with self.metrics.time('build'):
+            return await self.kyber.build_route(
+                quote,
+                sender=self.contract_address,
+                recipient=self.contract_address,
+                slippage_tolerance=300  # 3%
+            )
+
+    def candidate_quotes(self, state, sizes):
+        """(direction, size, token_in, token_out, amount) of the Kyber quote behind each candidate
+        Direction 1 buys LARRY on Kyber; direction 2 sells what Larry DEX would sell us for the principal
+        """
+        quotes = [(True, size, ETH_ADDRESS, LARRY_ADDRESS, size) for size in sizes]
+        quotes += [(False, size, LARRY_ADDRESS, ETH_ADDRESS, state.get_buy_larry(size)) for size in sizes]
+        return [quote for quote in quotes if quote[4] > 0]
+
+    def affordable_sizes(self, balance):
+        return [size for size in self.trade_sizes_wei if size + GAS_RESERVE_WEI <= balance]
 
-    async def check_opportunities(self, session):
-        """Check for arbitrage opportunities"""
+    def quote_requests(self, snapshot):
+        """Kyber quotes check_opportunities() will ask for at a quote bus snapshot"""
+        sizes = self.affordable_sizes(snapshot.balance)
+        return [quote[2:] for quote in self.candidate_quotes(snapshot.state(LARRY_ADDRESS), sizes)]
+
+    async def check_opportunities(self, block_number):
+        """Price every candidate size in both directions and keep the one that pays the caller most
+        Returns come from this block's Larry DEX state and the Kyber quotes; the settlement model then
+        decides for all candidates at once which would revert and what the caller nets after gas
+        """
         try:
-            # Check ETH -> LARRY (Kyber) -> ETH (Larry)
-            route_kyber_larry = await self.get_kyberswap_route(
-                session, ETH_ADDRESS, LARRY_ADDRESS, TRADE_AMOUNT_WEI
+            state = self.pricer.state
+            sizes = self.affordable_sizes(self.balance)
+            if not sizes:
+                logger.warning("Balance %s ETH is below the smallest trade size plus gas reserve", Web3.from_wei(self.balance, 'ether'),
+                               extra={'sample': 'low_balance', 'block': block_number})
+                return None
+            
+            quotes = self.candidate_quotes(state, sizes)
+            routes = await asyncio.gather(
+                *(self.get_kyberswap_route(token_in, token_out, amount) for _, _, token_in, token_out, amount in quotes),
+                return_exceptions=True
             )
             
-            if route_kyber_larry and route_kyber_larry.get('routeSummary'):
-                larry_amount = int(route_kyber_larry['routeSummary']['amountOut'])
-                logger.info(f"Kyber->Larry route: {TRADE_AMOUNT_ETH} ETH -> {larry_amount/1e18:.6f} LARRY")
-                
-                # Since this is volume generation, we execute if we get back at least principal + gas
-                return {
-                    'direction': True,
-                    'direction_name': 'ETH->LARRY(Kyber)->ETH(Larry)',
-                    'route': route_kyber_larry['routeSummary']
-                }
+            candidates = []
+            for (direction, size, _, _, _), route in zip(quotes, routes):
+                if isinstance(route, BaseException) or not route:
+                    continue
+                amount_out = route.amount_out * 999 // 1000  # 0.1% slippage
+                # Direction 1 ends with sell() on Larry DEX (sell fee applies); direction 2 ends with Kyber's ETH
+                total_return = state.sell_eth_after_fee(amount_out) if direction else amount_out
+                candidates.append({
+                    'direction': direction, 'amount_wei': size, 'route': route, 'quoted_at': route.fetched_at,
+                    'total_return': total_return, 'cost': self.fees.trade_cost(direction, route)
+                })
+            if not candidates:
+                return None
             
-            # Also check Larry -> Kyber direction
-            # (Implementation depends on Larry DEX ABI availability)
+            outcome = self.settlement.principal_protected(
+                [candidate['amount_wei'] for candidate in candidates],
+                [candidate['total_return'] for candidate in candidates],
+                [candidate['cost'] for candidate in candidates]
+            )
+            paying = np.flatnonzero(~outcome['reverts'] & (outcome['caller_net'] > self.min_net_wei))
+            if logger.isEnabledFor(logging.DEBUG):
+                for candidate, reverts, caller_net in zip(candidates, outcome['reverts'], outcome['caller_net']):
+                    logger.debug("[block %s] %s %.6f ETH: return %.6f ETH, %s, caller net %.8f ETH", block_number,
+                                 'Kyber->Larry' if candidate['direction'] else 'Larry->Kyber', candidate['amount_wei'] / 1e18,
+                                 candidate['total_return'] / 1e18, 'reverts' if reverts else 'settles', caller_net / 1e18)
+            if not len(paying):
+                return None
             
-            return None
+            # Most for the caller first, then the most profit for the recipient
+            best = paying[np.lexsort((outcome['recipient_share'][paying], outcome['caller_net'][paying]))[-1]]
+            opportunity = dict(
+                candidates[best],
+                block_number=block_number,
+                caller_net=int(outcome['caller_net'][best]),
+                recipient_share=int(outcome['recipient_share'][best]),
+                at_risk=bool(outcome['reverts_at_max_slippage'][best])
+            )
+            opportunity['direction_name'] = 'ETH->LARRY(Kyber)->ETH(Larry)' if opportunity['direction'] else 'ETH->LARRY(Larry)->ETH(Kyber)'
+            self.pipeline.speculate(opportunity['route'], opportunity['caller_net'])
+            logger.info("[block %s] %s with %.6f ETH: caller nets %.8f ETH, recipient gets %.8f ETH (%d of %d candidates pay)",
+                        block_number, opportunity['direction_name'], opportunity['amount_wei'] / 1e18,
+                        opportunity['caller_net'] / 1e18, opportunity['recipient_share'] / 1e18, len(paying), len(candidates),
+                        extra={'block': block_number, 'direction': 1 if opportunity['direction'] else 2, 'profit_wei': opportunity['caller_net']})
+            return opportunity
                 
         except Exception as e:
             logger.error(f"Error checking opportunities: {e}")
@@ -159,108 +298,174 @@ class V3ArbitrageBot:
     async def execute_arbitrage(self, opportunity):
         """Execute arbitrage trade"""
         try:
-            async with aiohttp.ClientSession() as session:
-                # Build swap data
-                swap_data_response = await self.build_kyberswap_swap(session, opportunity['route'])
-                
-                if not swap_data_response or not swap_data_response.get('data'):
-                    logger.error("Failed to build swap data")
-                    return False
-                
-                swap_data = swap_data_response['data']
-                
-                logger.info(f"Executing {opportunity['direction_name']} arbitrage...")
-                logger.info(f"Principal: {TRADE_AMOUNT_ETH} ETH (protected)")
-                logger.info(f"Gas reimbursement: {Web3.from_wei(self.gas_reimbursement, 'ether')} ETH")
-                
-                # Prepare transaction
-                nonce = self.w3.eth.get_transaction_count(self.account.address)
-                gas_price = int(self.w3.eth.gas_price * 1.2)  # 20% higher
-                
-                # Build transaction
-                txn = self.contract.functions.executePrincipalProtectedArbitrage(
-                    bytes.fromhex(swap_data[2:]),  # Remove 0x prefix
-                    opportunity['direction']
-                ).build_transaction({
-                    'from': self.account.address,
-                    'value': TRADE_AMOUNT_WEI,
-                    'gas': 800000,
-                    'gasPrice': gas_price,
-                    'nonce': nonce
-                })
-                
-                # Sign and send
-                signed_txn = self.w3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-                tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-                
-                logger.info(f"Transaction sent: {tx_hash.hex()}")
-                logger.info(f"View on BaseScan: https://basescan.org/tx/{tx_hash.hex()}")
-                
-                # Wait for confirmation
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+            # Swap data was built speculatively as soon as the route came back
+            swap_data_response = await self.pipeline.take_build(opportunity['route'])
+            
+            if not swap_data_response or not swap_data_response.get('data'):
+                logger.error("Failed to build swap data")
+                return False
+            
+            swap_data = swap_data_response['data']
+            calldata = self.encoder.encode(swap_data, opportunity['direction'])
+            gas = self.fees.gas_limit(opportunity['direction'], opportunity['route'])
+            
+            # Simulate the exact payload against the pending block; a revert here costs no gas.
+            # This is one extra JSON-RPC post on cycles that send: candidates are priced locally from
+            # read_cycle_state(), so the payload only exists after that batch has returned, and holding
+            # the simulation for the next block's batch would cost a block of latency instead
+            with self.metrics.time('preflight'):
+                passed, reason = await self.preflight.simulate(calldata, opportunity['amount_wei'], gas, opportunity['block_number'])
+            
+            if not passed:
+                self.opportunities.inc(1, 'rejected')
+                logger.warning(f"🛑 Pre-flight simulation reverted, not broadcasting: {reason}")
+                return False
+            
+            logger.info("Executing %s arbitrage...", opportunity['direction_name'])
+            logger.info("Principal: %s ETH (protected)", Web3.from_wei(opportunity['amount_wei'], 'ether'))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Gas reimbursement: %s ETH (est. gas cost %s ETH)", Web3.from_wei(self.settlement.gas_reimbursement, 'ether'),
+                             Web3.from_wei(opportunity['cost'], 'ether'))
+            if opportunity['at_risk']:
+                logger.info("Would revert if Kyber filled at the %s bps slippage limit", self.settlement.max_slippage)
+            
+            # Build transaction from state already in memory (chainId, this block's fees)
+            txn = await self.pipeline.transaction(calldata, opportunity['amount_wei'], gas)
+            if self.bus and not self.bus.reserve(txn, self.fees.l1_fee):
+                self.opportunities.inc(1, 'skipped')
+                logger.info("💸 Skipping trade: other strategies already committed this block's balance")
+                return False
+            
+            # Sign and send (nonce assigned locally)
+            if opportunity.get('quoted_at'):
+                self.quote_age.observe(time.monotonic() - opportunity['quoted_at'])
+            tx_hash = await self.nonces.send(txn)
+            self.fees.remember_calldata(calldata)
+            self.opportunities.inc(1, 'executed')
+            
+            logger.info("Transaction sent: %s (https://basescan.org/tx/%s)", tx_hash.hex(), tx_hash.hex(),
+                        extra={'block': opportunity['block_number'], 'nonce': txn['nonce']})
+            
+            # Confirmation is picked up by the background tracker; scanning carries on
+            self.tracker.track(tx_hash, txn['nonce'], self.on_trade_settled, opportunity)
+            return True
                 
-                if receipt.status == 1:
-                    logger.info(f"✅ Trade executed successfully!")
-                    logger.info(f"Gas used: {receipt.gasUsed}")
-                    logger.info(f"You received: {TRADE_AMOUNT_ETH} ETH + 0.00005 ETH gas reimbursement")
-                    logger.info(f"Any profits sent to: {self.profit_recipient}")
-                    return True
-                else:
-                    logger.error(f"❌ Transaction failed")
-                    return False
-                    
         except Exception as e:
             logger.error(f"Error executing arbitrage: {e}")
             return False
 
+    def on_trade_settled(self, outcome):
+        """Log the result of a trade once the tracker sees it settle"""
+        self.opportunities.inc(1, outcome['status'])
+        if outcome['status'] != 'timeout':
+            self.metrics.stage('inclusion', outcome['latency'])
+        if outcome['status'] == 'success':
+            # Reverts stop early, so only successful trades feed the gas-limit cache
+            context = outcome['context']
+            self.fees.record_gas(context['direction'], context['route'], outcome['gas_used'])
+            logger.info(f"✅ Trade executed successfully! Block {outcome['block_number']} ({outcome['latency']:.1f}s)")
+            logger.info(f"Gas used: {outcome['gas_used']}")
+            for event in outcome['events']:
+                if event['event'] == 'PrincipalProtectedArbitrage':
+                    self.profit.inc(event['profitAmount'])
+                    logger.info(f"You received: {Web3.from_wei(event['principalAmount'], 'ether')} ETH (principal + gas reimbursement)")
+                    logger.info(f"Profit {Web3.from_wei(event['profitAmount'], 'ether')} ETH sent to: {event['profitRecipient']}")
+        elif outcome['status'] == 'reverted':
+            logger.error(f"❌ Transaction failed - reverted in block {outcome['block_number']}: {outcome['tx_hash']}")
+        else:
+            logger.warning(f"⌛ No receipt after {outcome['latency']:.0f}s for {outcome['tx_hash']}")
+
+    async def scan_block(self, block_number):
+        """Check one block for an opportunity and execute it"""
+        with self.metrics.time('cycle'):
+            await self.scan(block_number)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Quote cache: %s", self.kyber.cache.stats())
+            logger.debug("Transactions: %s", self.tracker.stats())
+            logger.debug("Pre-flight: %s", self.preflight.stats())
+
+    async def scan(self, block_number):
+        """One scan cycle: look for an opportunity, then execute it"""
+        self.tracker.new_block(block_number)
+        # One batched state read per block; every Larry DEX quote and payout below is then local
+        block_number = await self.read_cycle_state(block_number)
+        self.pipeline.new_block(block_number)
+        opportunity = await self.check_opportunities(block_number)
+        await self.nonces.replace_stuck()
+        await self.act_on(opportunity, block_number)
+
+    async def on_snapshot(self, snapshot):
+        """Quote bus cycle: decide against the shared snapshot (the bus handles the tracker and stuck nonces)"""
+        self.load_snapshot(snapshot)
+        self.pipeline.new_block(snapshot.block_number)
+        opportunity = await self.check_opportunities(snapshot.block_number)
+        await self.act_on(opportunity, snapshot.block_number)
+
+    async def act_on(self, opportunity, block_number):
+        """Execute an opportunity unless too many trades are still pending"""
+        if opportunity:
+            self.opportunities.inc(1, 'seen')
+        if opportunity and len(self.tracker.pending) >= MAX_PENDING_TRADES:
+            self.opportunities.inc(1, 'skipped')
+            logger.info("⏸️ Skipping opportunity: %d trades still pending", len(self.tracker.pending))
+        elif opportunity:
+            logger.info("🎯 Opportunity found: %s (priced at block %s, head %s)",
+                        opportunity['direction_name'], opportunity['block_number'], self.scheduler.latest_block)
+            
+            success = await self.execute_arbitrage(opportunity)
+            
+            if success:
+                logger.info("📤 Volume trade submitted")
+            else:
+                logger.error("❌ Trade execution failed")
+        else:
+            logger.info("⏳ Waiting for opportunities...", extra={'sample': 'no_opportunity', 'block': block_number})
+
+    async def close(self):
+        """Nothing of its own to release: the chain client, Kyber client and nonces belong to the caller or the bus"""
+
     async def run_monitoring_loop(self):
-        """Main monitoring loop"""
+        """Main monitoring loop: one scan per new block"""
         logger.info("🚀 Starting V3 arbitrage bot...")
         logger.info("💡 Principal protected + gas reimbursement")
+        if METRICS_PORT:
+            await self.metrics.start(port=METRICS_PORT)
         
-        while True:
-            try:
-                async with aiohttp.ClientSession() as session:
-                    opportunity = await self.check_opportunities(session)
-                    
-                    if opportunity:
-                        logger.info(f"🎯 Opportunity found: {opportunity['direction_name']}")
-                        
-                        success = await self.execute_arbitrage(opportunity)
-                        
-                        if success:
-                            logger.info("💰 Volume generated successfully!")
-                        else:
-                            logger.error("❌ Trade execution failed")
-                    else:
-                        logger.info("⏳ Waiting for opportunities...")
-                
-                await asyncio.sleep(30)
-                
-            except KeyboardInterrupt:
-                logger.info("🛑 Bot stopped by user")
-                break
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                await asyncio.sleep(30)
+        try:
+            await self.scheduler.run(self.scan_block)
+        except KeyboardInterrupt:
+            logger.info("🛑 Bot stopped by user")
+        finally:
+            await self.tracker.stop()
+            await self.metrics.stop()
+            self.nonces.close()
 
 async def main():
     """Main entry point"""
     bot = V3ArbitrageBot()
     
-    # Check account balance
-    balance = bot.w3.eth.get_balance(bot.account.address)
-    balance_eth = bot.w3.from_wei(balance, 'ether')
-    
-    min_required = Decimal(TRADE_AMOUNT_ETH) + Decimal('0.0005')  # Trade + gas buffer
-    
-    if balance_eth < min_required:
-        logger.error(f"Insufficient balance: {balance_eth} ETH (need at least {min_required} ETH)")
-        return
-    
-    logger.info(f"💰 Account balance: {balance_eth} ETH")
-    
-    await bot.run_monitoring_loop()
+    # One pooled RPC session and one pooled KyberSwap session for the lifetime of the bot
+    async with bot.chain, bot.kyber:
+        await bot.load_contract_info()
+        await bot.nonces.sync()
+        # Make sure local bonding-curve math agrees with the deployed Larry DEX
+        await bot.pricer.verify(bot.trade_sizes_wei + [Web3.to_wei(1000, 'ether')])
+        
+        # Check account balance
+        balance = await bot.w3.eth.get_balance(bot.account.address)
+        balance_eth = bot.w3.from_wei(balance, 'ether')
+        
+        min_required = Decimal(TRADE_SIZES_ETH[0]) + Decimal(GAS_RESERVE_ETH)  # Smallest trade + gas buffer
+        
+        if balance_eth < min_required:
+            logger.error(f"Insufficient balance: {balance_eth} ETH (need at least {min_required} ETH)")
+            return
+        
+        logger.info(f"💰 Account balance: {balance_eth} ETH")
+        
+        await bot.run_monitoring_loop()
 
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(main())
\ No newline at end of file
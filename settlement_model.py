@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Settlement model of ArbitrageLarryImprovedV2 (botv3.sol)
+Mirrors how the contract pays out a trade -- principal protection and gas reimbursement for
+executePrincipalProtectedArbitrage, protocol fee and profit thresholds for executeArbitrageWithSwapData --
+for a whole batch of candidate trades at once, in exact integer wei. Contract parameters are read in
+one multicall, then kept current from GasReimbursementUpdated logs and a periodic re-read
+"""
+
+import logging
+import numpy as np
+from eth_abi import decode
+from web3 import Web3
+
+BPS = 10000
+REFRESH_BLOCKS = 300    # Re-read every parameter this often: only setGasReimbursement emits an event
+
+# Public state of ArbitrageLarryImprovedV2 that decides a trade's outcome
+SETTLEMENT_ABI = [
+    {"inputs": [], "name": name, "outputs": [{"name": "", "type": output}], "stateMutability": "view", "type": "function"}
+    for name, output in [
+        ('gasReimbursement', 'uint256'),
+        ('protocolFee', 'uint256'),
+        ('maxSlippage', 'uint256'),
+        ('minProfitWei', 'uint256'),
+        ('profitRecipient', 'address'),
+        ('owner', 'address'),
+    ]
+]
+
+logger = logging.getLogger(__name__)
+
+
+def wei_array(values):
+    """Wei as Python ints in an object array: exact over the contracts' whole 100 ETH range, where
+    int64 would overflow past ~9.2 ETH and float64 would round
+    """
+    return np.asarray(values, dtype=object)
+
+
+def bps_of(amount, bps):
+    """amount * bps / 10000 rounded down like Solidity"""
+    return amount * bps // BPS
+
+
+class SettlementModel:
+    def __init__(self, w3, contract_address, caller, refresh_blocks=REFRESH_BLOCKS):
+        self.contract_address = Web3.to_checksum_address(contract_address)
+        self.contract = w3.eth.contract(address=self.contract_address, abi=SETTLEMENT_ABI)
+        self.caller = Web3.to_checksum_address(caller)
+        self.refresh_blocks = refresh_blocks
+        self.topic = Web3.to_hex(Web3.keccak(text='GasReimbursementUpdated(uint256)'))
+        self.gas_reimbursement = 0
+        self.protocol_fee = 0
+        self.max_slippage = 0
+        self.min_profit = 0
+        self.profit_recipient = None
+        self.owner = None
+        self.loaded_block = None
+        self.logs_from = None   # First block not yet checked for GasReimbursementUpdated
+        self.refreshes = 0
+
+    def needs_refresh(self, block_number):
+        """Parameters never read, invalidated, or older than refresh_blocks"""
+        return (self.loaded_block is None or block_number is None
+                or block_number - self.loaded_block >= self.refresh_blocks)
+
+    def parameter_calls(self):
+        """Every parameter as multicall calls, keyed like load() expects"""
+        functions = self.contract.functions
+        return {
+            'gas_reimbursement': functions.gasReimbursement(),
+            'protocol_fee': functions.protocolFee(),
+            'max_slippage': functions.maxSlippage(),
+            'min_profit': functions.minProfitWei(),
+            'profit_recipient': functions.profitRecipient(),
+            'owner': functions.owner(),
+        }
+
+    def load(self, block_number, values):
+        """Take parameters read by parameter_calls() at block_number"""
+        for name, value in values.items():
+            # A view the deployed contract doesn't have keeps its default
+            if value is not None:
+                setattr(self, name, value)
+        self.loaded_block = block_number
+        self.logs_from = block_number + 1 if block_number is not None else None
+        self.refreshes += 1
+        logger.debug(f"Settlement parameters at block {block_number}: reimbursement {self.gas_reimbursement} wei, "
+                     f"protocol fee {self.protocol_fee} bps, max slippage {self.max_slippage} bps")
+
+    def logs_request(self, block_number):
+        """eth_getLogs for GasReimbursementUpdated since the last check, as a raw JSON-RPC request (None if not needed)"""
+        if self.logs_from is None or block_number is None or block_number < self.logs_from:
+            return None
+        return ('eth_getLogs', [{
+            'address': self.contract_address,
+            'topics': [self.topic],
+            'fromBlock': hex(self.logs_from),
+            'toBlock': hex(block_number)
+        }])
+
+    def load_logs(self, block_number, response):
+        """Apply GasReimbursementUpdated logs from a logs_request() response"""
+        if 'error' in response:
+            # Can't tell whether anything changed: read everything again next cycle
+            self.loaded_block = None
+            return
+        logs = response.get('result') or []
+        if logs:
+            (self.gas_reimbursement,) = decode(['uint256'], bytes.fromhex(logs[-1]['data'][2:]))
+            logger.info(f"⛽ Gas reimbursement changed to {Web3.from_wei(self.gas_reimbursement, 'ether')} ETH")
+        self.logs_from = block_number + 1
+
+    def max_slippage_return(self, total_return):
+        """Return if the aggregator fills at the edge of the contract's slippage tolerance"""
+        total_return = wei_array(total_return)
+        return total_return - bps_of(total_return, self.max_slippage)
+
+    def principal_protected(self, principal, total_return, cost):
+        """Outcome of executePrincipalProtectedArbitrage for arrays of candidates
+        principal: msg.value; total_return: ETH the round trip brings back; cost: L2 + L1 fee of the transaction.
+        Returns arrays: reverts, caller_payout, recipient_share, caller_net (after the fee; the recipient
+        share counts too when the caller is the profit recipient), reverts_at_max_slippage
+        """
+        principal, total_return, cost = wei_array(principal), wei_array(total_return), wei_array(cost)
+        required = principal + self.gas_reimbursement
+        reverts = total_return < required
+        recipient_share = np.where(reverts, 0, total_return - required)
+        caller_net = np.where(reverts, -cost, self.gas_reimbursement - cost)
+        if self.profit_recipient == self.caller:
+            caller_net = caller_net + recipient_share
+        return {
+            'reverts': reverts,
+            'caller_payout': np.where(reverts, 0, required),
+            'recipient_share': recipient_share,
+            'caller_net': caller_net,
+            'reverts_at_max_slippage': self.max_slippage_return(total_return) < required,
+        }
+
+    def swap_data(self, principal, total_return, cost, min_return=1):
+        """Outcome of executeArbitrageWithSwapData for arrays of candidates
+        The contract measures gross profit from balance - msg.value, so (holding no ETH between trades)
+        gross is the whole return, principal included, and the protocol fee is charged on all of it.
+        Reverts on a zero return, below minProfitWei or below minReturnAmount; otherwise the fee goes
+        to the owner and the rest of the return to the caller
+        """
+        principal, total_return, cost = wei_array(principal), wei_array(total_return), wei_array(cost)
+        reverts = (total_return <= 0) | (total_return < self.min_profit) | (total_return < min_return)
+        fee = np.where(reverts, 0, bps_of(total_return, self.protocol_fee))
+        caller_payout = np.where(reverts, 0, total_return - fee)
+        caller_net = np.where(reverts, -cost, total_return - fee - principal - cost)
+        if self.owner == self.caller:
+            caller_net = caller_net + fee
+        slipped = self.max_slippage_return(total_return)
+        return {
+            'reverts': reverts,
+            'caller_payout': caller_payout,
+            'protocol_fee': fee,
+            'caller_net': caller_net,
+            'reverts_at_max_slippage': (slipped <= 0) | (slipped < self.min_profit) | (slipped < min_return),
+        }
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+EventIndexer reports against logs built the way the deployed contracts emit them
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from eth_abi import encode
+from web3 import Web3
+from event_indexer import EventIndexer, CONTRACTS
+
+CALLER = "0x" + "11" * 20
+RECIPIENT = "0x" + "22" * 20
+TIMESTAMP = 1748300000      # 2025-05-26 UTC
+BLOCK = 31000000
+
+
+class Chain:
+    """Just enough of w3.eth for store()"""
+    async def get_block(self, block_number):
+        return {'hash': Web3.keccak(text=f"block{block_number}"), 'timestamp': TIMESTAMP}
+
+
+def log(contract, signature, types, values, log_index, tx_hash):
+    return {
+        'address': CONTRACTS[contract],
+        'topics': [Web3.keccak(text=signature), bytes(12) + bytes.fromhex(CALLER[2:])],
+        'data': encode(types, values),
+        'blockNumber': BLOCK,
+        'blockHash': Web3.keccak(text=f"block{BLOCK}"),
+        'transactionHash': tx_hash,
+        'logIndex': log_index,
+    }
+
+
+def principal_protected_trade(tx_hash, principal, total_return, reimbursement):
+    """The two logs one botv3 executePrincipalProtectedArbitrage emits"""
+    profit = total_return - principal - reimbursement
+    return [
+        log('v3', 'PrincipalProtectedArbitrage(address,uint256,uint256,address,uint256)',
+            ['uint256', 'uint256', 'address', 'uint256'], [principal, profit, RECIPIENT, TIMESTAMP], 0, tx_hash),
+        log('v3', 'ArbitrageDirectionExecuted(address,bool,uint256,uint256,uint256,uint256)',
+            ['bool', 'uint256', 'uint256', 'uint256', 'uint256'], [True, principal, total_return, profit, TIMESTAMP], 1, tx_hash),
+    ]
+
+
+def swap_data_trade(tx_hash, direction, value, swap_return, protocol_fee=500):
+    """The log executeArbitrageWithSwapData emits: gross is the whole return, netProfit what the trader gets"""
+    net_profit = swap_return - swap_return * protocol_fee // 10000
+    return log('v2', 'ArbitrageDirectionExecuted(address,bool,uint256,uint256,uint256,uint256)',
+               ['bool', 'uint256', 'uint256', 'uint256', 'uint256'], [direction, value, net_profit, net_profit, TIMESTAMP], 0, tx_hash)
+
+
+def indexed(logs):
+    indexer = EventIndexer(SimpleNamespace(eth=Chain()), ':memory:')
+    asyncio.run(indexer.store(logs, BLOCK))
+    return indexer
+
+
+def test_one_v3_trade_counts_once():
+    # 0.002 ETH in, 0.00215 back: 0.00005 reimbursement to the caller, 0.0001 to the recipient
+    indexer = indexed(principal_protected_trade(Web3.keccak(text="tx1"), 2 * 10**15, 215 * 10**13, 5 * 10**13))
+    [(day, contract, trades, profit, volume)] = indexer.pnl_by_day()
+    assert (day, contract, trades) == ('2025-05-26', 'v3', 1)
+    assert profit == pytest.approx(0.00015)
+    assert volume == 0.002
+    [(contract, direction, trades, profit, volume)] = indexer.by_direction()
+    assert (contract, direction, trades, volume) == ('v3', 1, 1, 0.002)
+    assert profit == pytest.approx(0.00015)
+    paths = indexer.db.execute("SELECT event, path, reported_profit FROM events ORDER BY log_index").fetchall()
+    assert paths == [('PrincipalProtectedArbitrage', 'principal_protected', 0.0001),
+                     ('ArbitrageDirectionExecuted', 'principal_protected', 0.0001)]
+
+
+def test_swap_data_profit_is_out_minus_in():
+    # 0.01 ETH in; swaps bring back 0.0106 (fee 0.00053 -> 0.01007 paid out) and 0.0102 (-> 0.00969, a loss)
+    indexer = indexed([
+        swap_data_trade(Web3.keccak(text="tx1"), False, 10**16, 106 * 10**14),
+        swap_data_trade(Web3.keccak(text="tx2"), True, 10**16, 102 * 10**14),
+    ])
+    [(_, contract, trades, profit, volume)] = indexer.pnl_by_day()
+    assert (contract, trades, volume) == ('v2', 2, 0.02)
+    assert profit == pytest.approx(0.00007 - 0.00031)
+    assert [(direction, round(profit, 8)) for _, direction, _, profit, _ in indexer.by_direction()] == [(0, 0.00007), (1, -0.00031)]
+    rows = indexer.db.execute("SELECT path, reported_profit FROM events ORDER BY tx_hash").fetchall()
+    assert sorted(rows) == [('swap_data', 0.00969), ('swap_data', 0.01007)]
+
+
+def test_trades_per_contract():
+    logs = principal_protected_trade(Web3.keccak(text="tx1"), 2 * 10**15, 215 * 10**13, 5 * 10**13)
+    logs += principal_protected_trade(Web3.keccak(text="tx2"), 3 * 10**15, 3 * 10**15, 0)
+    logs.append(swap_data_trade(Web3.keccak(text="tx3"), False, 10**16, 106 * 10**14))
+    rows = indexed(logs).pnl_by_day()
+    assert [(contract, trades) for _, contract, trades, _, _ in rows] == [('v2', 1), ('v3', 2)]
+    assert rows[1][4] == 0.005
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+SettlementModel against outcomes worked out by hand from botv3.sol
+"""
+
+from web3 import Web3
+from settlement_model import SettlementModel
+
+CONTRACT = "0x7Bee2beF4adC5504CD747106924304d26CcFBd94"
+CALLER = "0x" + "11" * 20
+RECIPIENT = "0x" + "22" * 20
+OWNER = "0x" + "33" * 20
+
+
+def model(**parameters):
+    settlement = SettlementModel(Web3(), CONTRACT, CALLER)
+    settlement.profit_recipient = Web3.to_checksum_address(RECIPIENT)
+    settlement.owner = Web3.to_checksum_address(OWNER)
+    for name, value in parameters.items():
+        setattr(settlement, name, value)
+    return settlement
+
+
+def test_principal_protected_pays_principal_and_reimbursement():
+    # 0.002 ETH in, 0.00215 back, 0.0001 reimbursement: caller gets 0.0021, recipient the other 0.00005
+    outcome = model(gas_reimbursement=10**14).principal_protected([2 * 10**15], [215 * 10**13], [2 * 10**13])
+    assert not outcome['reverts'][0]
+    assert outcome['caller_payout'][0] == 21 * 10**14
+    assert outcome['recipient_share'][0] == 5 * 10**13
+    assert outcome['caller_net'][0] == 10**14 - 2 * 10**13
+
+
+def test_principal_protected_reverts_below_principal_plus_reimbursement():
+    # 0.00205 back < 0.002 + 0.0001 required: the caller only pays gas
+    outcome = model(gas_reimbursement=10**14).principal_protected([2 * 10**15], [205 * 10**13], [2 * 10**13])
+    assert outcome['reverts'][0]
+    assert outcome['caller_payout'][0] == 0
+    assert outcome['recipient_share'][0] == 0
+    assert outcome['caller_net'][0] == -2 * 10**13
+
+
+def test_principal_protected_caller_is_profit_recipient():
+    settlement = model(gas_reimbursement=10**14)
+    settlement.profit_recipient = settlement.caller
+    outcome = settlement.principal_protected([2 * 10**15], [215 * 10**13], [2 * 10**13])
+    assert outcome['caller_net'][0] == 10**14 + 5 * 10**13 - 2 * 10**13
+
+
+def test_principal_protected_max_slippage():
+    # 1% slippage: 0.00215 -> 0.0021285 still covers 0.0021, 0.00211 -> 0.0020889 doesn't
+    outcome = model(gas_reimbursement=10**14, max_slippage=100).principal_protected(
+        [2 * 10**15, 2 * 10**15], [215 * 10**13, 211 * 10**13], [0, 0])
+    assert list(outcome['reverts_at_max_slippage']) == [False, True]
+
+
+def test_swap_data_charges_fee_on_whole_return():
+    # 0.002 ETH in, 0.0021 back, 5% fee: fee 0.000105, caller gets 0.001995 -- a 0.000005 ETH loss
+    outcome = model(protocol_fee=500).swap_data([2 * 10**15], [21 * 10**14], [0])
+    assert not outcome['reverts'][0]
+    assert outcome['protocol_fee'][0] == 105 * 10**12
+    assert outcome['caller_payout'][0] == 1995 * 10**12
+    assert outcome['caller_net'][0] == -5 * 10**12
+
+
+def test_swap_data_includes_cost():
+    outcome = model(protocol_fee=500).swap_data([2 * 10**15], [21 * 10**14], [10**13])
+    assert outcome['caller_net'][0] == -15 * 10**12
+
+
+def test_swap_data_owner_keeps_fee():
+    settlement = model(protocol_fee=500)
+    settlement.owner = settlement.caller
+    outcome = settlement.swap_data([2 * 10**15], [21 * 10**14], [0])
+    assert outcome['caller_net'][0] == 10**14
+
+
+def test_swap_data_reverts():
+    # Zero return, under minProfitWei (compared with the whole return), under minReturnAmount
+    settlement = model(protocol_fee=500, min_profit=3 * 10**15)
+    outcome = settlement.swap_data([2 * 10**15] * 3, [0, 21 * 10**14, 4 * 10**15], [10**13] * 3, min_return=5 * 10**15)
+    assert list(outcome['reverts']) == [True, True, True]
+    assert list(outcome['caller_net']) == [-10**13] * 3
+    assert list(outcome['caller_payout']) == [0] * 3
+    outcome = settlement.swap_data([2 * 10**15], [4 * 10**15], [0], min_return=4 * 10**15)
+    assert not outcome['reverts'][0]
+    assert outcome['caller_net'][0] == 4 * 10**15 - 2 * 10**14 - 2 * 10**15
+
+
+def test_swap_data_max_slippage():
+    # 1% slippage on 0.0021 leaves 0.002079, under a 0.00209 minReturnAmount
+    outcome = model(protocol_fee=500, max_slippage=100).swap_data([2 * 10**15], [21 * 10**14], [0], min_return=209 * 10**13)
+    assert not outcome['reverts'][0]
+    assert outcome['reverts_at_max_slippage'][0]
+
+
+def test_exact_up_to_the_contracts_100_eth_limit():
+    # validAmount allows 100 ETH; one large candidate must not stop the batch from being ranked
+    principal, total_return = [2 * 10**15, 100 * 10**18], [215 * 10**13, 100 * 10**18 + 10**18 + 1]
+    outcome = model(gas_reimbursement=10**14, max_slippage=300).principal_protected(principal, total_return, [0, 0])
+    assert list(outcome['reverts']) == [False, False]
+    assert outcome['recipient_share'][1] == 10**18 + 1 - 10**14
+    outcome = model(protocol_fee=500).swap_data(principal, total_return, [0, 0])
+    assert outcome['protocol_fee'][1] == (101 * 10**18 + 1) * 500 // 10000
+    assert outcome['caller_net'][1] == 101 * 10**18 + 1 - (101 * 10**18 + 1) * 500 // 10000 - 100 * 10**18
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Trade-size optimizer
+Builds each direction's profit curve over a ladder of sizes -- Larry side vectorized with
+NumPy over the bonding-curve formula, Kyber side interpolated from a few concurrently
+fetched anchor quotes -- then refines the best rung with a golden-section search
+"""
+
+import asyncio
+import logging
+import math
+import numpy as np
+from larry_pricing import FEE_BASE_10000
+
+MAX_CONTRACT_AMOUNT = 100 * 10**18  # validAmount() upper bound in both arbitrage contracts
+ANCHOR_COUNT = 4                    # Real Kyber quotes per direction per cycle
+LADDER_SIZE = 64                    # Sizes evaluated on the interpolated curve
+GOLDEN_ITERATIONS = 30              # Refinement steps around the best rung
+SLIPPAGE_HAIRCUT = 0.999            # Same 0.1% haircut the bot applies to every quote
+
+INV_PHI = (math.sqrt(5) - 1) / 2
+
+logger = logging.getLogger(__name__)
+
+
+def larry_to_eth_curve(state, larry_amounts):
+    """Vectorized LARRYtoETH over an array of LARRY amounts"""
+    return larry_amounts * (state.backing / state.total_supply)
+
+
+def buy_larry_curve(state, eth_amounts):
+    """Vectorized getBuyLARRY over an array of ETH amounts"""
+    return eth_amounts * (state.total_supply * state.buy_fee / state.backing / FEE_BASE_10000)
+
+
+def interpolate_output(anchor_in, anchor_out, amounts):
+    """Kyber output at any size from the anchor quotes
+    Interpolates the effective price (in / out), which is linear in size for constant-product
+    liquidity, so a handful of anchors track the real impact curve closely
+    """
+    prices = anchor_in / anchor_out
+    return amounts / np.interp(amounts, anchor_in, prices)
+
+
+def golden_section_max(profit, lo, hi, iterations=GOLDEN_ITERATIONS):
+    """Maximize a unimodal scalar function on [lo, hi]"""
+    a, b = lo, hi
+    c = b - INV_PHI * (b - a)
+    d = a + INV_PHI * (b - a)
+    fc, fd = profit(c), profit(d)
+    for _ in range(iterations):
+        if fc >= fd:
+            b, d, fd = d, c, fc
+            c = b - INV_PHI * (b - a)
+            fc = profit(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + INV_PHI * (b - a)
+            fd = profit(d)
+    return (c, fc) if fc >= fd else (d, fd)
+
+
+class TradeSizer:
+    def __init__(self, get_route, eth_address, token_address, min_amount,
+                 anchors=ANCHOR_COUNT, ladder=LADDER_SIZE):
+        self.get_route = get_route
+        self.eth_address = eth_address
+        self.token_address = token_address
+        self.min_amount = min_amount
+        self.anchors = anchors
+        self.ladder = ladder
+
+    def max_amount(self, balance, reserve, cap):
+        """Largest size we can send: wallet balance less a gas reserve, the configured cap and validAmount"""
+        return min(max(balance - reserve, 0), cap, MAX_CONTRACT_AMOUNT)
+
+    def anchor_eth(self, max_amount):
+        """ETH sizes of the anchor quotes for a cycle"""
+        return np.geomspace(self.min_amount, max_amount, self.anchors)
+
+    def anchor_quotes(self, state, max_amount):
+        """(token_in, token_out, amount) of every anchor quote both directions will fetch, so they can be prefetched"""
+        if max_amount < self.min_amount:
+            return []
+        anchor_eth = self.anchor_eth(max_amount)
+        quotes = [(self.eth_address, self.token_address, int(amount)) for amount in anchor_eth]
+        quotes += [(self.token_address, self.eth_address, state.get_buy_larry(int(amount))) for amount in anchor_eth]
+        return [quote for quote in quotes if quote[2] > 0]
+
+    async def fetch_anchors(self, token_in, token_out, amounts_in):
+        """Quote every anchor concurrently; returns (amounts_in, amounts_out) for the ones that came back"""
+        quotes = await asyncio.gather(*(
+            self.get_route(token_in, token_out, int(amount)) for amount in amounts_in
+        ))
+        points = [
+            (float(amount), float(quote.amount_out))
+            for amount, quote in zip(amounts_in, quotes)
+            if amount > 0 and quote and quote.amount_out > 0
+        ]
+        if not points:
+            return None, None
+        anchor_in, anchor_out = np.array(points).T
+        return anchor_in, anchor_out
+
+    def best_size(self, profit_curve, max_amount):
+        """Scan the ladder, then golden-section search the bracket around the best rung"""
+        ladder = np.geomspace(self.min_amount, max_amount, self.ladder)
+        profits = profit_curve(ladder)
+        best = int(np.argmax(profits))
+        lo = ladder[max(best - 1, 0)]
+        hi = ladder[min(best + 1, len(ladder) - 1)]
+        amount, profit = golden_section_max(lambda x: float(profit_curve(np.array([x]))[0]), lo, hi)
+        if profits[best] > profit:
+            amount, profit = ladder[best], profits[best]
+        return int(amount), profit
+
+    async def size_kyber_to_larry(self, state, max_amount):
+        """Best ETH size for ETH -> LARRY (Kyber) -> ETH (Larry); None if no size looks profitable"""
+        if max_amount < self.min_amount:
+            return None
+        anchor_eth = self.anchor_eth(max_amount)
+        anchor_in, anchor_out = await self.fetch_anchors(self.eth_address, self.token_address, anchor_eth)
+        if anchor_in is None:
+            return None
+
+        def profit_curve(eth_in):
+            larry = interpolate_output(anchor_in, anchor_out, eth_in) * SLIPPAGE_HAIRCUT
+            return larry_to_eth_curve(state, larry) - eth_in
+
+        amount, profit = self.best_size(profit_curve, max_amount)
+        logger.debug(f"Direction 1 sizing: best {amount/1e18:.6f} ETH, est. profit {profit/1e18:.8f} ETH")
+        return amount if profit > 0 else None
+
+    async def size_larry_to_kyber(self, state, max_amount):
+        """Best ETH size for ETH -> LARRY (Larry) -> ETH (Kyber); None if no size looks profitable"""
+        if max_amount < self.min_amount:
+            return None
+        anchor_eth = self.anchor_eth(max_amount)
+        anchor_larry = [state.get_buy_larry(int(amount)) for amount in anchor_eth]
+        anchor_in, anchor_out = await self.fetch_anchors(self.token_address, self.eth_address, anchor_larry)
+        if anchor_in is None:
+            return None
+
+        def profit_curve(eth_in):
+            larry = buy_larry_curve(state, eth_in)
+            return interpolate_output(anchor_in, anchor_out, larry) * SLIPPAGE_HAIRCUT - eth_in
+
+        amount, profit = self.best_size(profit_curve, max_amount)
+        logger.debug(f"Direction 2 sizing: best {amount/1e18:.6f} ETH, est. profit {profit/1e18:.8f} ETH")
+        return amount if profit > 0 else None
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Zero-RPC transaction encoding and off-loop signing
+CallEncoder ABI-encodes a contract call from a precomputed selector and head layout around its
+one dynamic `bytes` argument (the KyberSwap swapData); TxSigner serializes EIP-1559 transactions
+with RLP directly and runs the ECDSA signature on a dedicated thread so the event loop keeps going
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import rlp
+from eth_keys import keys
+from eth_utils import function_abi_to_4byte_selector, keccak
+from eth_utils.abi import get_abi_input_types
+
+WORD = 32
+ZERO_WORD = bytes(WORD)
+TRUE_WORD = (1).to_bytes(WORD, 'big')
+EIP1559_TYPE = b'\x02'
+
+logger = logging.getLogger(__name__)
+
+
+def uint_word(value):
+    return value.to_bytes(WORD, 'big')
+
+
+def bool_word(value):
+    return TRUE_WORD if value else ZERO_WORD
+
+
+def address_word(value):
+    return bytes(12) + bytes.fromhex(value[2:])
+
+
+# Encoders for the static argument types the bot contracts take
+STATIC_WORDS = {
+    'uint256': uint_word,
+    'bool': bool_word,
+    'address': address_word,
+}
+
+
+class CallEncoder:
+    """Calldata for a function with exactly one `bytes` argument and otherwise static ones
+    Same output as eth_abi, but the selector, the offset word and the per-argument encoders are
+    worked out once, so a call is a handful of to_bytes and one join
+    """
+
+    def __init__(self, fn_abi):
+        types = get_abi_input_types(fn_abi)
+        if types.count('bytes') != 1 or any(t != 'bytes' and t not in STATIC_WORDS for t in types):
+            raise ValueError(f"{fn_abi['name']}({','.join(types)}) needs one bytes argument plus {'/'.join(STATIC_WORDS)}")
+        self.name = fn_abi['name']
+        self.selector = function_abi_to_4byte_selector(fn_abi)
+        self.bytes_index = types.index('bytes')
+        # The bytes tail starts right after the head: one word per argument
+        self.offset_word = uint_word(WORD * len(types))
+        self.words = [None if t == 'bytes' else STATIC_WORDS[t] for t in types]
+
+    def encode(self, *args):
+        """Calldata for args in ABI order; the bytes argument may be raw bytes or a 0x hex string"""
+        data = args[self.bytes_index]
+        if isinstance(data, str):
+            data = bytes.fromhex(data[2:] if data.startswith('0x') else data)
+        parts = [self.selector]
+        for word, value in zip(self.words, args):
+            parts.append(word(value) if word else self.offset_word)
+        parts.append(uint_word(len(data)))
+        parts.append(data)
+        parts.append(bytes(-len(data) % WORD))
+        return b''.join(parts)
+
+
+class TxSigner:
+    """Signs EIP-1559 transactions from a dict (chainId, nonce, fees, gas, to, value, data)
+    Transactions without the EIP-1559 fee fields go through eth_account as before
+    """
+
+    def __init__(self, account):
+        self.account = account
+        self.key = keys.PrivateKey(bytes(account.key))
+        self.addresses = {}   # checksum address -> 20 raw bytes
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='signer')
+
+    def to_bytes(self, address):
+        raw = self.addresses.get(address)
+        if raw is None:
+            raw = self.addresses[address] = bytes.fromhex(address[2:])
+        return raw
+
+    def fields(self, txn):
+        data = txn.get('data', b'')
+        if isinstance(data, str):
+            data = bytes.fromhex(data[2:])
+        return [
+            txn['chainId'],
+            txn['nonce'],
+            txn['maxPriorityFeePerGas'],
+            txn['maxFeePerGas'],
+            txn['gas'],
+            self.to_bytes(txn['to']),
+            txn.get('value', 0),
+            data,
+            txn.get('accessList', []),
+        ]
+
+    def sign_now(self, txn):
+        """Raw signed transaction bytes, on the calling thread"""
+        if 'maxFeePerGas' not in txn:
+            return self.account.sign_transaction(txn).raw_transaction
+        fields = self.fields(txn)
+        signature = self.key.sign_msg_hash(keccak(EIP1559_TYPE + rlp.encode(fields)))
+        return EIP1559_TYPE + rlp.encode(fields + [signature.v, signature.r, signature.s])
+
+    async def sign(self, txn):
+        """Raw signed transaction bytes, signed on the signer thread"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.sign_now, txn)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
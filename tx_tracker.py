@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Background transaction lifecycle tracker
+Takes submitted tx hashes, checks all outstanding receipts in one JSON-RPC batch per block,
+decodes the arbitrage contract events and reports each outcome through a callback, so the
+scanner never waits on a confirmation
+"""
+
+import asyncio
+import time
+import logging
+from eth_abi import decode
+from web3 import Web3
+
+POLL_INTERVAL = 2.0     # Seconds between receipt checks when no new block wakes the tracker
+RECEIPT_TIMEOUT = 120   # Seconds before a transaction is reported as timed out
+
+# Events emitted by botv3.sol (and ArbitrageLarryImproved.sol): name -> [(type, name, indexed)]
+BOT_EVENTS = {
+    'ArbitrageExecuted': [
+        ('address', 'trader', True), ('uint256', 'ethInput', False), ('uint256', 'larryAmount', False),
+        ('uint256', 'profit', False), ('uint256', 'timestamp', False)
+    ],
+    'ArbitrageDirectionExecuted': [
+        ('address', 'trader', True), ('bool', 'direction', False), ('uint256', 'ethInput', False),
+        ('uint256', 'ethOutput', False), ('uint256', 'profit', False), ('uint256', 'timestamp', False)
+    ],
+    'PrincipalProtectedArbitrage': [
+        ('address', 'caller', True), ('uint256', 'principalAmount', False), ('uint256', 'profitAmount', False),
+        ('address', 'profitRecipient', False), ('uint256', 'timestamp', False)
+    ],
+    'VolumeGenerated': [
+        ('address', 'caller', True), ('uint256', 'volumeETH', False), ('uint256', 'volumeLARRY', False),
+        ('bool', 'direction', False), ('uint256', 'timestamp', False)
+    ],
+    'GasReimbursementUpdated': [
+        ('uint256', 'newAmount', False)
+    ],
+}
+
+EVENT_TOPICS = {
+    Web3.keccak(text=f"{name}({','.join(field[0] for field in fields)})"): (name, fields)
+    for name, fields in BOT_EVENTS.items()
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _bytes(value):
+    return bytes.fromhex(value[2:]) if isinstance(value, str) else bytes(value)
+
+
+def _hex(value):
+    return '0x' + _bytes(value).hex()
+
+
+def decode_event(log):
+    """Decode a raw receipt log into {'event': name, **args}; None if it isn't one of BOT_EVENTS"""
+    topics = log.get('topics') or []
+    if not topics:
+        return None
+    match = EVENT_TOPICS.get(_bytes(topics[0]))
+    if not match:
+        return None
+    name, fields = match
+    indexed = [field for field in fields if field[2]]
+    data_fields = [field for field in fields if not field[2]]
+    event = {'event': name}
+    for (kind, arg, _), topic in zip(indexed, topics[1:]):
+        event[arg] = decode([kind], _bytes(topic))[0]
+    values = decode([field[0] for field in data_fields], _bytes(log.get('data', '0x')))
+    for (_, arg, _), value in zip(data_fields, values):
+        event[arg] = value
+    return event
+
+
+class TxTracker:
+    def __init__(self, w3, nonces=None, poll_interval=POLL_INTERVAL, timeout=RECEIPT_TIMEOUT):
+        self.w3 = w3
+        self.nonces = nonces
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.pending = {}     # tx hash -> {'nonce', 'hashes', 'submitted_at', 'on_done', 'context'}
+        self.wake = asyncio.Event()
+        self.task = None
+        self.confirmed = 0
+        self.reverted = 0
+        self.timed_out = 0
+        if nonces is not None:
+            nonces.on_replace.append(self.replaced)
+
+    def track(self, tx_hash, nonce=None, on_done=None, context=None):
+        """Watch a submitted transaction; on_done(outcome) runs when it settles or times out"""
+        self.pending[_hex(tx_hash)] = {
+            'nonce': nonce,
+            'hashes': [_hex(tx_hash)],
+            'submitted_at': time.monotonic(),
+            'on_done': on_done,
+            'context': context
+        }
+        self.start()
+
+    def new_block(self, block_number):
+        """Check receipts now that a block has landed"""
+        self.wake.set()
+
+    def start(self):
+        """Start the background loop (idempotent)"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the background loop"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def run(self):
+        """Check outstanding receipts on every block (or poll_interval) until nothing is pending"""
+        while self.pending:
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            try:
+                await self.check()
+            except Exception as e:
+                logger.warning(f"Receipt check failed: {e}")
+
+    def replaced(self, nonce, tx_hash):
+        """Remember a fee-bump replacement so its receipt settles the original entry, even after
+        the nonce manager has forgotten the nonce
+        """
+        for entry in self.pending.values():
+            if entry['nonce'] == nonce and _hex(tx_hash) not in entry['hashes']:
+                entry['hashes'].append(_hex(tx_hash))
+
+    async def check(self):
+        """One JSON-RPC batch for every outstanding receipt"""
+        lookups = [
+            (tx_hash, candidate)
+            for tx_hash, entry in list(self.pending.items())
+            for candidate in list(entry['hashes'])
+        ]
+        if not lookups:
+            return
+        responses = await self.w3.provider.make_batch_request([
+            ('eth_getTransactionReceipt', [candidate]) for _, candidate in lookups
+        ])
+        settled = {}
+        for (tx_hash, _), response in zip(lookups, responses):
+            receipt = response.get('result') if isinstance(response, dict) else None
+            if receipt and tx_hash not in settled:
+                settled[tx_hash] = receipt
+
+        now = time.monotonic()
+        for tx_hash, entry in list(self.pending.items()):
+            if tx_hash in settled:
+                await self.finish(tx_hash, self.outcome(tx_hash, entry, settled[tx_hash]))
+            elif now - entry['submitted_at'] > self.timeout:
+                await self.finish(tx_hash, self.outcome(tx_hash, entry, None))
+
+    def outcome(self, tx_hash, entry, receipt):
+        """Settlement summary handed to the callback"""
+        result = {
+            'tx_hash': tx_hash,
+            'nonce': entry['nonce'],
+            'context': entry['context'],
+            'latency': time.monotonic() - entry['submitted_at'],
+        }
+        if receipt is None:
+            result['status'] = 'timeout'
+            return result
+        result.update(
+            status='success' if int(receipt['status'], 16) == 1 else 'reverted',
+            mined_hash=receipt['transactionHash'],
+            block_number=int(receipt['blockNumber'], 16),
+            gas_used=int(receipt['gasUsed'], 16),
+            effective_gas_price=int(receipt.get('effectiveGasPrice') or '0x0', 16),
+            events=[event for event in map(decode_event, receipt.get('logs', [])) if event]
+        )
+        return result
+
+    async def finish(self, tx_hash, outcome):
+        """Drop a settled entry, free its nonce and run the callback"""
+        entry = self.pending.pop(tx_hash)
+        if outcome['status'] == 'success':
+            self.confirmed += 1
+        elif outcome['status'] == 'reverted':
+            self.reverted += 1
+        else:
+            self.timed_out += 1
+        if self.nonces is not None and entry['nonce'] is not None and outcome['status'] != 'timeout':
+            self.nonces.confirm(entry['nonce'])
+        if entry['on_done']:
+            try:
+                result = entry['on_done'](outcome)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Settlement callback failed for {tx_hash}: {e}")
+
+    def stats(self):
+        """Outcome counters"""
+        return {
+            'pending': len(self.pending),
+            'confirmed': self.confirmed,
+            'reverted': self.reverted,
+            'timed_out': self.timed_out
+        }